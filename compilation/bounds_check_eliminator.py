@@ -0,0 +1,299 @@
+from compilation.constant_folder import ConstantFolder, JUMP_OPERATIONS
+from compilation.dead_code_eliminator import DeadCodeEliminator
+from compilation.loop_invariant_mover import LoopInvariantMover
+from compilation.temp_allocator import TempAllocator
+from helpers.operations import Operations
+from helpers.types import Types
+from memory.ranges import ScopeRanges
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The lowest and the highest value an integer can hold at a quad.
+Interval = Tuple[int, int]
+
+
+class InductionVariable(NamedTuple):
+    """ A local variable that counts up the iterations of a loop until it reaches a bound.
+    """
+    # The address of the variable.
+    address: int
+    # The first quad of the loop.
+    header: int
+    # The last back edge of the loop.
+    latch: int
+    # The GOTOF that leaves the loop when the variable reaches its bound.
+    exit: int
+    # The bound of the variable, compared before the exit.
+    bound: Variable
+    # Whether the bound is a valid value of the variable, that is the comparison is a <=.
+    inclusive: bool
+
+
+class BoundsCheckEliminator:
+    """ The BoundsCheckEliminator removes the VER_ACCS quads of a method whose index is always
+        within the bounds of its dimension.
+
+        The range analysis finds the induction variables of the loops, the local integers that
+        start at a known value, are only increased inside of the loop and are compared with a bound
+        right before the GOTOF that leaves it, like the index of a for loop. Inside of the loop and
+        until it is increased, an induction variable is between its first value and its bound.
+
+        The interval of an index is computed from:
+            - Its value, if it is a constant.
+            - The loops it is the induction variable of, if it is a local variable.
+            - The quad that computes it, if it is a temporal. The ADD, SUBS, PROD, PROD_LIT and
+              ASSIGN quads are evaluated with interval arithmetic.
+        An access whose interval is unknown or not contained in the dimension keeps its check.
+
+        This pass runs before the TempAllocator, while every temporal is written by a single quad.
+
+        The main parts of the BoundsCheckEliminator are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __class_directory [SymbolTable]: The classes, whose methods are renumbered.
+            __definitions [Dict[int, List[int]]]: The quads of the method that write each address.
+            __induction_variables [List[InductionVariable]]: The induction variables of the loops.
+            __removed [int]: The amount of checks removed.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        self.__quads = quads
+        self.__start = start
+        self.__class_directory = class_directory
+        self.__definitions: Dict[int, List[int]] = {}
+        for ip in range(start, len(quads)):
+            for address in TempAllocator.uses_and_definitions(quads[ip])[1]:
+                self.__definitions.setdefault(address, []).append(ip)
+        self.__induction_variables: List[InductionVariable] = []
+        self.__removed = 0
+
+    @property
+    def removed(self) -> int:
+        return self.__removed
+
+    def eliminate(self) -> int:
+        """ Removes the checks of the method that cannot fail.
+
+            Returns:
+                - [int]: The amount of checks removed.
+        """
+        loops = LoopInvariantMover(self.__quads, self.__start, self.__class_directory).loops()
+        self.__induction_variables = [variable for variable in map(self.induction_variable, loops)
+                                      if variable is not None]
+
+        safe = set()
+        for ip in range(self.__start, len(self.__quads)):
+            quad = self.__quads[ip]
+            if quad[0] != Operations.VER_ACCS:
+                continue
+            interval = self.interval(quad[1], ip, set())
+            if interval is not None and quad[2] <= interval[0] and interval[1] < quad[3]:
+                safe.add(ip)
+        if safe:
+            DeadCodeEliminator(self.__quads, self.__start, self.__class_directory).remove(safe)
+        self.__removed = len(safe)
+
+        logger.debug(f"Removed {self.__removed} bounds checks.")
+        return self.__removed
+
+    def induction_variable(self, loop: Tuple[int, int]) -> Optional[InductionVariable]:
+        """ Finds the induction variable of a loop, compared right before the first jump of the loop
+            and only increased by its ADD quads.
+
+            Arguments:
+                - loop [Tuple[int, int]]: The header and the last back edge of the loop.
+
+            Returns:
+                - [Optional[InductionVariable]]: The induction variable, or None if the loop has none.
+        """
+        quads = self.__quads
+        header, latch = loop
+        exit = header
+        while exit < latch and quads[exit][0] not in JUMP_OPERATIONS:
+            exit += 1
+        if exit == header or quads[exit][0] != Operations.GOTOF or quads[exit][2] <= latch:
+            return None
+        comparison = quads[exit - 1]
+        if (comparison[0] not in (Operations.LESS, Operations.LESS_EQUAL_THAN)
+                or comparison[3] != quads[exit][1].memory_space):
+            return None
+
+        variable = comparison[1]
+        if (variable.var_type != Types.INT or variable.has_multiple_dimensions()
+                or not ScopeRanges.is_local(variable.memory_space)):
+            return None
+        definitions = [ip for ip in self.__definitions.get(variable.memory_space, []) if header <= ip <= latch]
+        if not all(self.is_increment(ip, variable.memory_space) for ip in definitions):
+            return None
+        return InductionVariable(variable.memory_space, header, latch, exit, comparison[2],
+                                 comparison[0] == Operations.LESS_EQUAL_THAN)
+
+    def is_increment(self, ip: int, address: int) -> bool:
+        """ Whether a quad writes a variable with its value increased by a nonnegative constant.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+                - address [int]: The address of the variable.
+
+            Returns:
+                - [bool]: True if the quad increases the variable.
+        """
+        step = BoundsCheckEliminator.increment_step(self.__quads, self.__definitions, ip, address)
+        return step is not None and step >= 0
+
+    @staticmethod
+    def increment_step(quads: List[Tuple], definitions: Dict[int, List[int]], ip: int, address: int) -> Optional[int]:
+        """ Gets the constant a quad adds to a variable, either with an ADD to the variable or with the
+            ASSIGN of the result of such an ADD.
+
+            Arguments:
+                - quads [List[Tuple]]: The quads of the program.
+                - definitions [Dict[int, List[int]]]: The quads that write each address.
+                - ip [int]: The address of the quad.
+                - address [int]: The address of the variable.
+
+            Returns:
+                - [Optional[int]]: The constant added, or None if the quad is not an increment.
+        """
+        quad = quads[ip]
+        if quad[0] == Operations.ASSIGN and not quad[1].is_array_pointer():
+            source = quad[2].memory_space
+            sources = definitions.get(source, [])
+            if not TempAllocator.is_temp(source) or len(sources) != 1 or sources[0] != ip - 1:
+                return None
+            quad = quads[ip - 1]
+        if quad[0] != Operations.ADD:
+            return None
+        operands = (quad[1], quad[2])
+        step = next((operand for operand in operands if operand.memory_space != address), None)
+        if (step is None or not any(operand.memory_space == address for operand in operands)
+                or not ConstantFolder.is_constant(step) or step.var_type != Types.INT):
+            return None
+        return ConstantFolder.value(step)
+
+    def is_bounded_at(self, variable: InductionVariable, ip: int) -> bool:
+        """ Whether an induction variable is known to be within its bound at a quad, that is the quad
+            runs after the exit of the loop and before the variable is increased.
+
+            Arguments:
+                - variable [InductionVariable]: The induction variable.
+                - ip [int]: The address of the quad.
+
+            Returns:
+                - [bool]: True if the comparison with the bound still holds.
+        """
+        if not variable.exit < ip <= variable.latch:
+            return False
+        increments = [definition for definition in self.__definitions.get(variable.address, [])
+                      if variable.header <= definition <= variable.latch]
+        if any(definition < ip for definition in increments):
+            return False
+        # A jump back over the quad from an increment reaches it again without comparing the variable.
+        for source in range(ip + 1, variable.latch + 1):
+            quad = self.__quads[source]
+            if (quad[0] in JUMP_OPERATIONS and quad[2] is not None and quad[2] <= ip
+                    and quad[2] != variable.header and any(definition <= source for definition in increments)):
+                return False
+        return True
+
+    def first_value(self, variable: InductionVariable) -> Optional[Tuple[Variable, int]]:
+        """ Finds the value an induction variable holds when its loop is entered, assigned in the
+            quads that always run right before the loop.
+
+            Arguments:
+                - variable [InductionVariable]: The induction variable.
+
+            Returns:
+                - [Optional[Tuple[Variable, int]]]: The value assigned and the address of the ASSIGN,
+                    or None if it is not known.
+        """
+        quads = self.__quads
+        targets = {quads[ip][2] for ip in range(self.__start, len(quads))
+                   if quads[ip][0] in JUMP_OPERATIONS and quads[ip][2] is not None
+                   and not variable.header <= ip <= variable.latch}
+        ip = variable.header
+        while ip > self.__start and ip not in targets:
+            ip -= 1
+            quad = quads[ip]
+            if quad[0] in JUMP_OPERATIONS or quad[0] in (Operations.RETURN, Operations.END_FUNC):
+                return None
+            if variable.address in TempAllocator.uses_and_definitions(quad)[1]:
+                if quad[0] == Operations.ASSIGN and not quad[1].is_array_pointer():
+                    return quad[2], ip
+                return None
+        return None
+
+    def interval(self, operand, ip: int, visiting: Set[int]) -> Optional[Interval]:
+        """ Computes the values an integer operand can hold when a quad runs.
+
+            Arguments:
+                - operand [Variable]: The operand.
+                - ip [int]: The address of the quad.
+                - visiting [Set[int]]: The addresses being computed, to stop on cycles.
+
+            Returns:
+                - [Optional[Interval]]: The lowest and the highest value, or None if they are not known.
+        """
+        if (not isinstance(operand, Variable) or operand.var_type != Types.INT or operand.is_array_pointer()
+                or operand.has_multiple_dimensions()):
+            return None
+        if operand.is_constant():
+            value = ConstantFolder.value(operand)
+            return value, value
+        address = operand.memory_space
+        if address in visiting:
+            return None
+        visiting = visiting | {address}
+
+        if TempAllocator.is_temp(address):
+            definitions = self.__definitions.get(address, [])
+            return self.computed_interval(definitions[0], visiting) if len(definitions) == 1 else None
+
+        interval = None
+        for variable in self.__induction_variables:
+            if variable.address != address or not self.is_bounded_at(variable, ip):
+                continue
+            first_value = self.first_value(variable)
+            if first_value is None:
+                continue
+            low = self.interval(first_value[0], first_value[1], visiting)
+            high = self.interval(variable.bound, variable.exit - 1, visiting)
+            if low is None or high is None:
+                continue
+            bounded = (low[0], high[1] if variable.inclusive else high[1] - 1)
+            interval = bounded if interval is None else (max(interval[0], bounded[0]), min(interval[1], bounded[1]))
+        return interval
+
+    def computed_interval(self, ip: int, visiting: Set[int]) -> Optional[Interval]:
+        """ Computes the values of the result of a quad with interval arithmetic.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+                - visiting [Set[int]]: The addresses being computed, to stop on cycles.
+
+            Returns:
+                - [Optional[Interval]]: The lowest and the highest value, or None if they are not known.
+        """
+        quad = self.__quads[ip]
+        op = quad[0]
+        if op == Operations.ASSIGN:
+            return self.interval(quad[2], ip, visiting)
+        if op == Operations.PROD_LIT:
+            interval = self.interval(quad[1], ip, visiting)
+            return None if interval is None else tuple(sorted((interval[0] * quad[2], interval[1] * quad[2])))
+        if op not in (Operations.ADD, Operations.SUBS, Operations.PROD):
+            return None
+        left = self.interval(quad[1], ip, visiting)
+        right = self.interval(quad[2], ip, visiting)
+        if left is None or right is None:
+            return None
+        if op == Operations.ADD:
+            return left[0] + right[0], left[1] + right[1]
+        if op == Operations.SUBS:
+            return left[0] - right[1], left[1] - right[0]
+        products = [l * r for l in left for r in right]
+        return min(products), max(products)
@@ -1,4 +1,6 @@
 from .interpreter import Interpreter
+from .pass_manager import PassManager
+from .temp_allocator import TempAllocator
 from scope.class_scope import ClassScope
 from scope.method_scope import MethodScope
 from scope.symbol_table import SymbolTable
@@ -28,6 +30,8 @@ class Compiler:
            to add all the methods and attributes to the correct class.
          _interpreter [Interpreter] = Responsible for generating all the quadruples based on input from
            the parser.
+         _pass_manager [PassManager] = Responsible for running the optimization passes over the quads
+           of every method.
          errors [List[str]]: Responsible for keeping track of all errors in Otter.
     """
     _global_scope: MethodScope = MethodScope("Global Scope", "private")
@@ -35,6 +39,7 @@ class Compiler:
     _current_class: ClassScope = None
     _class_directory: SymbolTable = SymbolTable("Global Scope")
     _interpreter = Interpreter()
+    _pass_manager: PassManager = PassManager.default()
 
     errors: List[str] = []
 
@@ -123,8 +128,43 @@ class Compiler:
         """Ends the scope of _current_method. Sets it back to the global scope."""
         logger.debug(f"Ended method {Compiler._current_method.name} scope.")
         Compiler._interpreter.add_end_function_quad(Compiler._current_method)
+        Compiler.optimize_method(Compiler._current_method, Compiler._current_method.instruction_pointer)
         Compiler._current_method = Compiler._global_scope
 
+    @staticmethod
+    def optimize_method(method_scope: MethodScope, start: int) -> None:
+        """Optimizes the quads of a method once they were all generated and records the memory it needs.
+        The passes of the optimization level run first, see PassManager, so the TempAllocator sees the
+        temporals that are still needed.
+
+        Arguments:
+            - method_scope [MethodScope]: The method.
+            - start [int]: The first quad of the method.
+        """
+        quads = Compiler.get_quads()
+        try:
+            Compiler._pass_manager.run(method_scope, quads, start, Compiler._class_directory)
+            temp_memory_needed = TempAllocator(quads, start, len(quads)).allocate()
+        except Exception as error:
+            Compiler.errors.append(error)
+            temp_memory_needed = CompilationMemory.get_temp_memory().actual_memory_needed()
+        method_scope.record_memory_needed(temp_memory_needed)
+
+    @staticmethod
+    def set_optimization_level(level: int, explain: bool = False) -> None:
+        """Selects the optimization passes run over the quads of every method. Must be called before
+        the program is parsed.
+
+        Arguments:
+            - level [int]: The optimization level, from 0 to 2.
+            - explain [bool]: Whether the changes of every pass are recorded for the report.
+        """
+        Compiler._pass_manager = PassManager.default(level, explain)
+
+    @staticmethod
+    def optimization_report() -> List[str]:
+        return Compiler._pass_manager.report()
+
     @staticmethod
     def add_constructor(name: str, access_modifier: str) -> None:
         """Adds a constructor to _current_class. 
@@ -169,7 +209,10 @@ class Compiler:
         Arguments:
             - return_type [str]: The return type.
         """
-        Compiler._current_method.add_return_type(return_type)
+        try:
+            Compiler._current_method.add_return_type(return_type)
+        except Exception as error:
+            Compiler.errors.append(error)
         Compiler._current_method.instruction_pointer = Compiler._interpreter.getNextInstructionAddr()
         logger.debug(
             f"Added return type: {return_type}, in method {Compiler._current_method.name}")
@@ -392,8 +435,35 @@ class Compiler:
     
     @staticmethod
     def gen_goto_main():
+        Compiler.optimize_method(Compiler._global_scope, 0)
         Compiler._interpreter.gen_goto_main()
 
+    @staticmethod
+    def end_program() -> None:
+        """ Compiler handler to analyze the program once every quad is generated. Runs the program
+            passes of the optimization level, which mark the pure methods at -O2, and gives the
+            methods that override each other frames of the same size, so a call dispatched on the
+            class of the instance can run any of them.
+        """
+        try:
+            Compiler._pass_manager.run_program(Compiler.get_quads(), Compiler._class_directory)
+        except Exception as error:
+            Compiler.errors.append(error)
+
+        families = {}
+        for class_scope in Compiler._class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                root = method_scope
+                while root.overrides is not None:
+                    root = root.overrides
+                families.setdefault(root, []).append(method_scope)
+        for family in families.values():
+            if len(family) > 1:
+                local_memory_needed = tuple(map(max, *(method.local_memory_needed for method in family)))
+                temp_memory_needed = tuple(map(max, *(method.temp_memory_needed for method in family)))
+                for method_scope in family:
+                    method_scope.share_memory_needed(local_memory_needed, temp_memory_needed)
+
     @staticmethod
     def debug_quads():
         """ Compiler handler to debug quads.
@@ -444,6 +514,39 @@ class Compiler:
         except Exception as error:
             Compiler.errors.append(error)
 
+    @staticmethod
+    def start_array_operation(name: str):
+        """ Compiler handler to start a call to a built-in operation on dimensional variables.
+
+            Arguments:
+                - name [str]: The name of the operation.
+        """
+        try:
+            Compiler._interpreter.start_array_operation(name)
+        except Exception as error:
+            Compiler.errors.append(error)
+
+    @staticmethod
+    def add_array_argument():
+        """ Compiler handler to add an argument to a call to a built-in operation.
+        """
+        try:
+            Compiler._interpreter.add_array_argument()
+        except Exception as error:
+            Compiler.errors.append(error)
+
+    @staticmethod
+    def complete_array_operation(returns_value: bool):
+        """ Compiler handler to complete a call to a built-in operation.
+
+            Arguments:
+                - returns_value [bool]: Whether the operation is used in an expression.
+        """
+        try:
+            Compiler._interpreter.complete_array_operation(returns_value)
+        except Exception as error:
+            Compiler.errors.append(error)
+
     @staticmethod
     def check_access_modifier(instance, method):
         try:
@@ -482,4 +585,4 @@ class Compiler:
             # Case for regular methods
             class_name = Compiler._current_method.variables_directory.search(instance).var_type
             method_name = method
-        return Compiler._class_directory.search(class_name).method_directory.search(method_name)
+        return Compiler._class_directory.search(class_name).method_table.get(method_name)
@@ -0,0 +1,222 @@
+from helpers.operations import Operations
+from helpers.operations_cube import OperationsCube
+from helpers.quads import BINARY_OPERATIONS
+from helpers.types import Types
+from memory.compilation_memory import CompilationMemory
+from memory.ranges import ScopeRanges
+from scope.variable import Variable
+from typing import Any, Dict, List, Optional, Set, Tuple
+import operator
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The Python operation of each binary operation, the same ones the virtual machines run.
+FOLDING_OPERATIONS = {
+    Operations.ADD: operator.add,
+    Operations.SUBS: operator.sub,
+    Operations.PROD: operator.mul,
+    Operations.DIV: operator.truediv,
+    Operations.GREATER: operator.gt,
+    Operations.GREATER_EQUAL_THAN: operator.ge,
+    Operations.LESS: operator.lt,
+    Operations.LESS_EQUAL_THAN: operator.le,
+    Operations.EQUAL: operator.eq,
+    Operations.NOT_EQUAL: operator.ne,
+    Operations.AND: lambda l, r: l and r,
+    Operations.OR: lambda l, r: l or r,
+}
+
+JUMP_OPERATIONS = (Operations.GOTO, Operations.GOTOF, Operations.GOTOT)
+
+
+class ConstantFolder:
+    """ The ConstantFolder evaluates during compilation the quads of a method whose operands are
+        known, and registers their results in the ConstMemory.
+
+        The folder walks every basic block of the method remembering the local and temporal variables
+        that hold a constant. Their reads are replaced with the constant, so the quads whose operands
+        are all constants are folded:
+            - An expression, NOT or PROD_LIT becomes an ASSIGN of its result.
+            - A GOTOF or GOTOT that always jumps becomes a GOTO.
+        The amount of quads does not change, so no jump has to be renumbered. A division by zero is
+        never folded, so it still fails when the program runs.
+
+        The main parts of the ConstantFolder are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __end [int]: The quad after the last one of the method.
+            __folded [int]: The amount of quads folded.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, end: int):
+        self.__quads = quads
+        self.__start = start
+        self.__end = end
+        self.__folded = 0
+
+    @property
+    def folded(self) -> int:
+        return self.__folded
+
+    def fold(self) -> int:
+        """ Propagates the constants of every basic block of the method and folds its quads.
+
+            Returns:
+                - [int]: The amount of quads folded.
+        """
+        leaders = self.leaders()
+        known: Dict[int, Variable] = {}
+        for ip in range(self.__start, self.__end):
+            if ip in leaders:
+                known.clear()
+            quad = self.propagate(self.__quads[ip], known)
+            folded = self.fold_quad(quad)
+            if folded is not None:
+                quad = folded
+                self.__folded += 1
+            self.__quads[ip] = quad
+            self.track(quad, known)
+
+        logger.debug(f"Folded {self.__folded} quads.")
+        return self.__folded
+
+    def leaders(self) -> Set[int]:
+        """ Finds the first quad of every basic block of the method, that is the start of the method,
+            the targets of its jumps and the quads after a jump or a RETURN.
+
+            Returns:
+                - [Set[int]]: The addresses of the leaders.
+        """
+        leaders = {self.__start}
+        for ip in range(self.__start, self.__end):
+            quad = self.__quads[ip]
+            if quad[0] in JUMP_OPERATIONS:
+                if quad[2] is not None:
+                    leaders.add(quad[2])
+                leaders.add(ip + 1)
+            elif quad[0] in (Operations.RETURN, Operations.END_FUNC):
+                leaders.add(ip + 1)
+        return leaders
+
+    @staticmethod
+    def propagate(quad: Tuple, known: Dict[int, Variable]) -> Tuple:
+        """ Replaces the operands read by a quad with the constants they are known to hold.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+                - known [Dict[int, Variable]]: The constant held by each variable.
+
+            Returns:
+                - [Tuple]: The quad with its known operands replaced.
+        """
+        op = quad[0]
+        if op in BINARY_OPERATIONS:
+            positions = (1, 2)
+        elif op == Operations.ASSIGN:
+            positions = (2,)
+        elif op in (Operations.NOT, Operations.WRITE, Operations.GOTOF, Operations.GOTOT, Operations.PARAM,
+                    Operations.VER_ACCS, Operations.PROD_LIT, Operations.ADD_LIT, Operations.FILL):
+            positions = (1,)
+        else:
+            return quad
+
+        replaced = list(quad)
+        for position in positions:
+            operand = quad[position]
+            if isinstance(operand, Variable) and operand.memory_space in known:
+                replaced[position] = known[operand.memory_space]
+        return tuple(replaced)
+
+    @staticmethod
+    def fold_quad(quad: Tuple) -> Optional[Tuple]:
+        """ Evaluates a quad whose operands are all constants.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+
+            Returns:
+                - [Optional[Tuple]]: The folded quad, or None when the quad cannot be folded.
+        """
+        op = quad[0]
+        if op in BINARY_OPERATIONS and ConstantFolder.is_constant(quad[1]) and ConstantFolder.is_constant(quad[2]):
+            left, right = ConstantFolder.value(quad[1]), ConstantFolder.value(quad[2])
+            if op == Operations.DIV and right == 0:
+                return None
+            result_type = OperationsCube.verify(quad[2].var_type, quad[1].var_type, op)
+            return ConstantFolder.assign_constant(quad[3], result_type, FOLDING_OPERATIONS[op](left, right))
+        if op == Operations.NOT and ConstantFolder.is_constant(quad[1]):
+            return ConstantFolder.assign_constant(quad[2], quad[1].var_type, not ConstantFolder.value(quad[1]))
+        if op == Operations.PROD_LIT and ConstantFolder.is_constant(quad[1]):
+            target = quad[3]
+            constant = ConstantFolder.constant(ConstantFolder.value(quad[1]) * quad[2], Types.INT)
+            return (Operations.ASSIGN, target, constant)
+        if op in (Operations.GOTOF, Operations.GOTOT) and ConstantFolder.is_constant(quad[1]):
+            if ConstantFolder.value(quad[1]) == (op == Operations.GOTOT):
+                return (Operations.GOTO, None, quad[2])
+        return None
+
+    @staticmethod
+    def track(quad: Tuple, known: Dict[int, Variable]):
+        """ Updates the constants held by the variables after a quad runs. Only the local and temporal
+            variables are tracked, the rest can change in other methods.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+                - known [Dict[int, Variable]]: The constant held by each variable.
+        """
+        op = quad[0]
+        if op == Operations.ASSIGN and not quad[1].is_array_pointer():
+            target = quad[1].memory_space
+            if ConstantFolder.is_constant(quad[2]) and ConstantFolder.is_tracked(target):
+                known[target] = quad[2]
+            else:
+                known.pop(target, None)
+        elif op in BINARY_OPERATIONS:
+            known.pop(quad[3], None)
+        elif op == Operations.NOT:
+            known.pop(quad[2], None)
+        elif op in (Operations.PROD_LIT, Operations.ADD_LIT):
+            known.pop(quad[3].memory_space, None)
+        elif op in (Operations.READ, Operations.RES_POINTER, Operations.SUM, Operations.DOT):
+            known.pop(quad[-1].memory_space, None)
+
+    @staticmethod
+    def is_tracked(address: int) -> bool:
+        return ScopeRanges.is_local(address) or ScopeRanges.is_temp(address) or ScopeRanges.is_virtual_temp(address)
+
+    @staticmethod
+    def is_constant(operand: Any) -> bool:
+        return isinstance(operand, Variable) and operand.is_constant()
+
+    @staticmethod
+    def value(constant: Variable) -> Any:
+        return CompilationMemory.get_const_memory().get_value(constant)
+
+    @staticmethod
+    def constant(value: Any, var_type: str) -> Variable:
+        """ Gets the constant of a value, registering it in the ConstMemory.
+
+            Arguments:
+                - value [Any]: The native value.
+                - var_type [str]: The type of the value.
+
+            Returns:
+                - [Variable]: The constant.
+        """
+        memory_space = CompilationMemory.get_const_memory().value_memory_space(value, var_type)
+        return Variable(memory_space, var_type, memory_space)
+
+    @staticmethod
+    def assign_constant(address: int, var_type: str, value: Any) -> Tuple:
+        """ Builds the ASSIGN of a folded result to the raw address of the result of a quad.
+
+            Arguments:
+                - address [int]: The address of the result.
+                - var_type [str]: The type of the result.
+                - value [Any]: The native value of the result.
+
+            Returns:
+                - [Tuple]: The ASSIGN quad.
+        """
+        return (Operations.ASSIGN, Variable(address, var_type, address), ConstantFolder.constant(value, var_type))
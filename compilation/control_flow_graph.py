@@ -0,0 +1,242 @@
+from compilation.constant_folder import JUMP_OPERATIONS
+from helpers.operations import Operations
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The label of the end of the method, the target of the jumps that leave it.
+EXIT = -1
+
+
+class NaturalLoop(NamedTuple):
+    """ The blocks of a loop, the header dominates them all and they all reach a latch.
+    """
+    # The label of the block every iteration starts at.
+    header: int
+    # The labels of the blocks that jump back to the header.
+    latches: Tuple[int, ...]
+    # The labels of the blocks of the loop, the header included.
+    blocks: Set[int]
+
+
+class BasicBlock:
+    """ A sequence of quads that always runs from its first quad to its last one.
+
+        The targets of the jumps of a block are the labels of the blocks they jump to, or EXIT.
+
+        The main parts of the BasicBlock are:
+            __label [int]: The position of the block in the graph.
+            __address [int]: The address of the first quad of the block when the graph was built.
+            __quads [List[Tuple]]: The quads of the block.
+            __fallthrough [Optional[int]]: The block that runs after the last quad when it does not
+                jump, or None when it always jumps or ends the method.
+            __successors [List[int]]: The blocks that can run after this one.
+            __predecessors [List[int]]: The blocks that can run before this one.
+    """
+
+    def __init__(self, label: int, address: int, quads: List[Tuple]):
+        self.__label = label
+        self.__address = address
+        self.__quads = quads
+        self.__fallthrough: Optional[int] = None
+        self.__successors: List[int] = []
+        self.__predecessors: List[int] = []
+
+    @property
+    def label(self) -> int:
+        return self.__label
+
+    @property
+    def address(self) -> int:
+        return self.__address
+
+    @property
+    def quads(self) -> List[Tuple]:
+        return self.__quads
+
+    @property
+    def fallthrough(self) -> Optional[int]:
+        return self.__fallthrough
+
+    @fallthrough.setter
+    def fallthrough(self, fallthrough: Optional[int]):
+        self.__fallthrough = fallthrough
+
+    @property
+    def successors(self) -> List[int]:
+        return self.__successors
+
+    @property
+    def predecessors(self) -> List[int]:
+        return self.__predecessors
+
+    def jump_target(self) -> Optional[int]:
+        """ Gets the block the last quad of the block jumps to.
+
+            Returns:
+                - [Optional[int]]: The label of the target, or None when the block does not end in a jump.
+        """
+        last = self.__quads[-1] if self.__quads else None
+        if last is None or last[0] not in JUMP_OPERATIONS or last[2] is None:
+            return None
+        return last[2]
+
+
+class ControlFlowGraph:
+    """ The ControlFlowGraph splits the quads of a method in basic blocks connected by the jumps
+        between them, so the analyses work on the structure of the method instead of on the absolute
+        addresses of its quads.
+
+        A block starts at the start of the method, at the target of a jump or after a jump, RETURN
+        or END_FUNC. The graph computes on demand:
+            - The blocks reachable from the start of the method, see DeadCodeEliminator.
+            - The dominators of every block, the blocks every path from the entry goes through.
+            - The natural loops, one for every header a back edge jumps to, see LoopInvariantMover.
+        The graph only reads the quads, the passes rewrite the flat quads themselves.
+
+        The main parts of the ControlFlowGraph are:
+            __start [int]: The first quad of the method.
+            __blocks [List[BasicBlock]]: The blocks of the method, in the order of their quads.
+            __dominators [Optional[Dict[int, Set[int]]]]: The dominators of every block, once computed.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, end: int):
+        self.__start = start
+        self.__blocks: List[BasicBlock] = []
+        self.__dominators: Optional[Dict[int, Set[int]]] = None
+
+        leaders = sorted(ControlFlowGraph.leaders(quads, start, end))
+        labels = {leader: label for label, leader in enumerate(leaders)}
+        labels[end] = EXIT
+        bounds = leaders + [end]
+        for label in range(len(leaders)):
+            block_quads = []
+            for ip in range(bounds[label], bounds[label + 1]):
+                quad = quads[ip]
+                if quad[0] in JUMP_OPERATIONS and quad[2] is not None:
+                    if quad[2] not in labels:
+                        raise Exception(f"The jump {ip} lands on {quad[2]}, outside of the method.")
+                    quad = quad[:2] + (labels[quad[2]],) + quad[3:]
+                block_quads.append(quad)
+            self.__blocks.append(BasicBlock(label, bounds[label], block_quads))
+
+        for block in self.__blocks:
+            last = block.quads[-1]
+            if last[0] not in (Operations.GOTO, Operations.END_FUNC):
+                block.fallthrough = block.label + 1 if block.label + 1 < len(self.__blocks) else EXIT
+            # The RETURN of the Main constructor has no caller and continues with the next quad, it is
+            # not followed by the analyses, like any other RETURN.
+            following = None if last[0] == Operations.RETURN else block.fallthrough
+            for successor in (block.jump_target(), following):
+                if successor is not None and successor != EXIT and successor not in block.successors:
+                    block.successors.append(successor)
+                    self.__blocks[successor].predecessors.append(block.label)
+
+        logger.debug(f"Built {len(self.__blocks)} blocks from quad {start}.")
+
+    @property
+    def start(self) -> int:
+        return self.__start
+
+    @property
+    def blocks(self) -> List[BasicBlock]:
+        return self.__blocks
+
+    @staticmethod
+    def leaders(quads: List[Tuple], start: int, end: int) -> Set[int]:
+        """ Finds the first quad of every basic block of the method.
+
+            Arguments:
+                - quads [List[Tuple]]: The quads of the program.
+                - start [int]: The first quad of the method.
+                - end [int]: The quad after the last one of the method.
+
+            Returns:
+                - [Set[int]]: The addresses of the leaders, inside of the method.
+        """
+        leaders = {start}
+        for ip in range(start, end):
+            quad = quads[ip]
+            if quad[0] in JUMP_OPERATIONS:
+                if quad[2] is not None:
+                    leaders.add(quad[2])
+                leaders.add(ip + 1)
+            elif quad[0] in (Operations.RETURN, Operations.END_FUNC):
+                leaders.add(ip + 1)
+        return {leader for leader in leaders if start <= leader < end}
+
+    def reachable(self) -> List[int]:
+        """ Finds the blocks that can run, following the edges from the entry.
+
+            Returns:
+                - [List[int]]: The labels of the reachable blocks, in reverse postorder.
+        """
+        if not self.__blocks:
+            return []
+        visited = set()
+        postorder = []
+        pending = [(0, iter(self.__blocks[0].successors))]
+        visited.add(0)
+        while pending:
+            label, successors = pending[-1]
+            successor = next(successors, None)
+            if successor is None:
+                postorder.append(label)
+                pending.pop()
+            elif successor not in visited:
+                visited.add(successor)
+                pending.append((successor, iter(self.__blocks[successor].successors)))
+        return postorder[::-1]
+
+    def dominators(self) -> Dict[int, Set[int]]:
+        """ Computes the dominators of every reachable block with the iterative data flow algorithm.
+
+            Returns:
+                - [Dict[int, Set[int]]]: The labels of the blocks that dominate each block, itself included.
+        """
+        if self.__dominators is not None:
+            return self.__dominators
+        order = self.reachable()
+        every_block = set(order)
+        dominators = {label: set(every_block) for label in order}
+        if order:
+            dominators[order[0]] = {order[0]}
+        changed = True
+        while changed:
+            changed = False
+            for label in order[1:]:
+                incoming = [dominators[predecessor] for predecessor in self.__blocks[label].predecessors
+                            if predecessor in dominators]
+                dominated = set.intersection(*incoming) | {label} if incoming else {label}
+                if dominated != dominators[label]:
+                    dominators[label] = dominated
+                    changed = True
+        self.__dominators = dominators
+        return dominators
+
+    def natural_loops(self) -> List[NaturalLoop]:
+        """ Finds the natural loops of the method from its back edges, the edges to a block that
+            dominates their source.
+
+            Returns:
+                - [List[NaturalLoop]]: The loops, from the smallest one to the largest one.
+        """
+        dominators = self.dominators()
+        latches: Dict[int, List[int]] = {}
+        for label in dominators:
+            for successor in self.__blocks[label].successors:
+                if successor in dominators[label]:
+                    latches.setdefault(successor, []).append(label)
+
+        loops = []
+        for header, sources in latches.items():
+            blocks = {header}
+            pending = [source for source in sources if source != header]
+            while pending:
+                label = pending.pop()
+                if label not in blocks:
+                    blocks.add(label)
+                    pending.extend(self.__blocks[label].predecessors)
+            loops.append(NaturalLoop(header, tuple(sources), blocks))
+        return sorted(loops, key=lambda loop: len(loop.blocks))
@@ -0,0 +1,235 @@
+from bisect import bisect_left
+from compilation.constant_folder import ConstantFolder, JUMP_OPERATIONS
+from compilation.control_flow_graph import ControlFlowGraph
+from compilation.temp_allocator import TempAllocator
+from helpers.operations import Operations
+from helpers.quads import BINARY_OPERATIONS
+from memory.ranges import ScopeRanges
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The operations that only write their result, so they can be removed when nobody reads it.
+STORE_OPERATIONS = BINARY_OPERATIONS + (Operations.ASSIGN, Operations.NOT, Operations.PROD_LIT,
+                                        Operations.ADD_LIT, Operations.RES_POINTER, Operations.SUM, Operations.DOT)
+
+
+class DeadCodeEliminator:
+    """ The DeadCodeEliminator removes the quads of a method that can never change the result of the
+        program, once the ConstantFolder has simplified them.
+
+        The eliminator first threads the jumps of the method, so a jump to a GOTO goes straight to the
+        target of the GOTO. Then, until nothing changes, it removes:
+            - The quads that cannot be reached from the start of the method.
+            - The jumps to the next quad and the conditional jumps whose constant condition never jumps.
+            - The stores to temporals and local variables whose value is never read.
+        A division whose divisor is not a nonzero constant is never removed, so it still fails when the
+        program runs. READ, WRITE and the stores to global and instance memory are always kept.
+
+        The method must be the last one of the quads, so removing its quads only moves the quads of
+        the method itself. The jump targets and the instruction pointers of the methods are renumbered
+        after every removal.
+
+        The main parts of the DeadCodeEliminator are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __class_directory [SymbolTable]: The classes, whose methods are renumbered.
+            __removed [int]: The amount of quads removed.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        self.__quads = quads
+        self.__start = start
+        self.__class_directory = class_directory
+        self.__removed = 0
+
+    @property
+    def removed(self) -> int:
+        return self.__removed
+
+    def eliminate(self) -> int:
+        """ Threads the jumps of the method and removes its dead quads.
+
+            Returns:
+                - [int]: The amount of quads removed.
+        """
+        self.thread_jumps()
+        while True:
+            reachable = self.reachable()
+            removed = {ip for ip in range(self.__start, len(self.__quads))
+                       if (ip not in reachable and self.__quads[ip][0] != Operations.END_FUNC)
+                       or self.is_fallthrough_jump(ip)}
+            removed |= self.dead_stores()
+            if not removed:
+                break
+            self.remove(removed)
+
+        logger.debug(f"Removed {self.__removed} quads.")
+        return self.__removed
+
+    def thread_jumps(self):
+        """ Replaces the target of every jump of the method that lands on a GOTO with the end of the
+            chain of GOTOs.
+        """
+        quads = self.__quads
+        for ip in range(self.__start, len(quads)):
+            quad = quads[ip]
+            if quad[0] not in JUMP_OPERATIONS or quad[2] is None:
+                continue
+            target = quad[2]
+            visited = {ip}
+            while (target < len(quads) and target not in visited and quads[target][0] == Operations.GOTO
+                   and quads[target][2] is not None):
+                visited.add(target)
+                target = quads[target][2]
+            if target != quad[2]:
+                quads[ip] = quad[:2] + (target,) + quad[3:]
+
+    def successors(self, ip: int) -> List[int]:
+        """ The quads of the method that can run after a quad.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+
+            Returns:
+                - [List[int]]: The addresses of the next quads.
+        """
+        quad = self.__quads[ip]
+        op = quad[0]
+        if op in (Operations.RETURN, Operations.END_FUNC):
+            following = []
+        elif op == Operations.GOTO:
+            following = [quad[2]]
+        elif op in (Operations.GOTOF, Operations.GOTOT):
+            following = [quad[2], ip + 1]
+        else:
+            following = [ip + 1]
+        return [next_ip for next_ip in following
+                if next_ip is not None and self.__start <= next_ip < len(self.__quads)]
+
+    def reachable(self) -> Set[int]:
+        """ Finds the quads of the method that can run, the ones of the blocks reached from its start.
+
+            Returns:
+                - [Set[int]]: The addresses of the reachable quads.
+        """
+        graph = ControlFlowGraph(self.__quads, self.__start, len(self.__quads))
+        reachable = set()
+        for label in graph.reachable():
+            block = graph.blocks[label]
+            reachable.update(range(block.address, block.address + len(block.quads)))
+        return reachable
+
+    def is_fallthrough_jump(self, ip: int) -> bool:
+        """ Whether a quad is a jump that always continues with the next quad.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+
+            Returns:
+                - [bool]: True if the jump can be removed.
+        """
+        quad = self.__quads[ip]
+        if quad[0] not in JUMP_OPERATIONS:
+            return False
+        if quad[2] == ip + 1:
+            return True
+        return (quad[0] != Operations.GOTO and ConstantFolder.is_constant(quad[1])
+                and ConstantFolder.value(quad[1]) != (quad[0] == Operations.GOTOT))
+
+    def dead_stores(self) -> Set[int]:
+        """ Finds the stores of the method whose value is never read, with a liveness analysis of its
+            temporals and scalar local variables.
+
+            Returns:
+                - [Set[int]]: The addresses of the dead stores.
+        """
+        quads = self.__quads
+        end = len(quads)
+        # The local arrays are read through pointers, so only the scalar locals are tracked.
+        arrays = {variable.memory_space for quad in quads[self.__start:end] for variable in quad[1:]
+                  if isinstance(variable, Variable) and variable.has_multiple_dimensions()}
+        uses: Dict[int, Set[int]] = {}
+        definitions: Dict[int, Set[int]] = {}
+        for ip in range(self.__start, end):
+            used, defined = TempAllocator.uses_and_definitions(quads[ip])
+            uses[ip] = set(used)
+            definitions[ip] = {address for address in defined
+                               if DeadCodeEliminator.is_tracked(address) and address not in arrays}
+
+        live_in = {ip: set() for ip in range(self.__start, end)}
+        changed = True
+        while changed:
+            changed = False
+            for ip in reversed(range(self.__start, end)):
+                out = set()
+                for next_ip in self.successors(ip):
+                    out |= live_in[next_ip]
+                alive = uses[ip] | (out - definitions[ip])
+                if alive != live_in[ip]:
+                    live_in[ip] = alive
+                    changed = True
+
+        dead = set()
+        for ip in range(self.__start, end):
+            if not definitions[ip] or not self.is_removable(quads[ip]):
+                continue
+            out = set()
+            for next_ip in self.successors(ip):
+                out |= live_in[next_ip]
+            if not definitions[ip] & out:
+                dead.add(ip)
+        return dead
+
+    @staticmethod
+    def is_tracked(address) -> bool:
+        return isinstance(address, int) and (TempAllocator.is_temp(address) or ScopeRanges.is_local(address))
+
+    @staticmethod
+    def is_removable(quad: Tuple) -> bool:
+        """ Whether a quad has no effect other than writing its result.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+
+            Returns:
+                - [bool]: True if the quad can be removed when its result is not read.
+        """
+        op = quad[0]
+        if op not in STORE_OPERATIONS:
+            return False
+        if op == Operations.ASSIGN and (quad[1].is_array_pointer() or quad[1].has_multiple_dimensions()):
+            return False
+        if op == Operations.DIV:
+            return ConstantFolder.is_constant(quad[2]) and ConstantFolder.value(quad[2]) != 0
+        return True
+
+    def remove(self, removed: Set[int]):
+        """ Removes quads of the method and renumbers the jump targets and the instruction pointers
+            of the methods after them.
+
+            Arguments:
+                - removed [Set[int]]: The addresses of the quads to remove.
+        """
+        quads = self.__quads
+        kept = [ip for ip in range(self.__start, len(quads)) if ip not in removed]
+
+        def renumber(address):
+            # A removed quad continues with the next kept one.
+            if address is None or address <= self.__start:
+                return address
+            return self.__start + bisect_left(kept, address)
+
+        quads[self.__start:] = [quads[ip] for ip in kept]
+        for ip, quad in enumerate(quads):
+            if quad[0] in JUMP_OPERATIONS or quad[0] == Operations.GOSUB:
+                target = renumber(quad[2] if len(quad) > 2 else None)
+                if len(quad) > 2 and target != quad[2]:
+                    quads[ip] = quad[:2] + (target,) + quad[3:]
+        for class_scope in self.__class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                method_scope.instruction_pointer = renumber(method_scope.instruction_pointer)
+        self.__removed += len(removed)
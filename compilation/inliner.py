@@ -0,0 +1,333 @@
+from compilation.constant_folder import JUMP_OPERATIONS
+from compilation.temp_allocator import TempAllocator, TEMP_TYPES
+from helpers.operations import Operations
+from helpers.quads import RAW_ADDRESS_OPERANDS, quad_addresses
+from helpers.types import Types
+from memory.ranges import ScopeRanges, VIRTUAL_TYPE_RANGE_SIZE
+from scope.method_scope import MethodScope
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The most quads the body of a method can have to be inlined, without its END_FUNC.
+INLINE_BUDGET = 16
+
+# The most quads the inlined bodies can add to a method.
+GROWTH_BUDGET = 256
+
+# The operations a method cannot have to be inlined: the calls, since only the methods that call no
+# other method are inlined, and the accesses to dimensional variables, whose memory is a chunk.
+NOT_INLINABLE_OPERATIONS = (Operations.ERA, Operations.PARAM, Operations.GOSUB, Operations.VER_ACCS,
+                            Operations.PROD_LIT, Operations.ADD_LIT, Operations.RES_POINTER)
+
+
+class CallSite(NamedTuple):
+    """ A call of a method, from its ERA to the ASSIGN that takes its return value.
+    """
+    # The ERA of the call.
+    era: int
+    # The PARAM quads of the call, in order.
+    params: List[int]
+    # The GOSUB of the call.
+    gosub: int
+    # The ASSIGN of the return value to a temporal, if the method returns one.
+    result: Optional[int]
+    # The method called.
+    method_scope: MethodScope
+
+
+class Inliner:
+    """ The Inliner replaces the calls to small methods with the quads of the methods called, so they
+        do not pay for the ERA, the PARAM quads, the GOSUB, the frame of the method and the ASSIGN of
+        its return value through the global memory.
+
+        It runs once the whole program is generated, since a class declared later can still override
+        the methods called while a method is generated. A call is inlined when the method called:
+            - Is not overridden, so the method run does not depend on the class of the instance.
+            - Calls no other method, so it is never recursive, and has no dimensional variables.
+            - Has at most INLINE_BUDGET quads.
+            - Does not read or write instance variables, unless it is called on self, whose
+              instance is the one of the caller.
+        The inlined bodies can add at most GROWTH_BUDGET quads to a method.
+
+        The body of the method is copied in place of its GOSUB:
+            - Its local variables and temporals are renamed to new temporals of the caller.
+            - The PARAM quads become ASSIGN quads to its renamed arguments.
+            - The ASSIGN quads to its return address write the temporal the call assigned instead.
+            - Its RETURN quads jump to the quad after the body.
+        The quads after the method and the instruction pointers of the methods after it are
+        renumbered, and the temporals of the method are allocated again, see TempAllocator.
+
+        The main parts of the Inliner are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __class_directory [SymbolTable]: The classes, whose methods are renumbered.
+            __inlined [int]: The amount of calls inlined.
+            __counters [List[int]]: The renamed temporals of each type of the method being inlined.
+    """
+
+    def __init__(self, quads: List[Tuple], class_directory: SymbolTable):
+        self.__quads = quads
+        self.__class_directory = class_directory
+        self.__inlined = 0
+        self.__counters = [0] * len(TEMP_TYPES)
+
+    @property
+    def inlined(self) -> int:
+        return self.__inlined
+
+    def methods(self) -> List[MethodScope]:
+        """ The methods of the program, in the order of their quads.
+
+            Returns:
+                - [List[MethodScope]]: The methods.
+        """
+        methods = [method_scope for class_scope in self.__class_directory.symbols.values()
+                   for method_scope in class_scope.method_directory.symbols.values()
+                   if method_scope.instruction_pointer is not None]
+        return sorted(methods, key=lambda method_scope: method_scope.instruction_pointer)
+
+    def end(self, start: int) -> int:
+        """ Finds the end of a method.
+
+            Arguments:
+                - start [int]: The first quad of the method.
+
+            Returns:
+                - [int]: The quad after the END_FUNC of the method.
+        """
+        end = start
+        while end < len(self.__quads) and self.__quads[end][0] != Operations.END_FUNC:
+            end += 1
+        return end + 1
+
+    def inline(self) -> int:
+        """ Inlines the calls to small methods of every method, in the order of their quads, so a
+            method whose calls were inlined can then be inlined in the methods after it.
+
+            Returns:
+                - [int]: The amount of calls inlined.
+        """
+        for method_scope in self.methods():
+            start = method_scope.instruction_pointer
+            self.__inlined += self.inline_method(method_scope, start, self.end(start))
+
+        logger.debug(f"Inlined {self.__inlined} calls.")
+        return self.__inlined
+
+    def inline_method(self, method_scope: MethodScope, start: int, end: int) -> int:
+        """ Inlines the calls of a method.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+                - start [int]: The first quad of the method.
+                - end [int]: The quad after the last one of the method.
+
+            Returns:
+                - [int]: The amount of calls inlined.
+        """
+        quads = self.__quads
+        sites: Dict[int, CallSite] = {}
+        growth = 0
+        for site in self.call_sites(start, end):
+            body = self.body(site)
+            if body is None or growth + len(body) > GROWTH_BUDGET:
+                continue
+            sites[site.gosub] = site
+            growth += len(body)
+        if not sites:
+            return 0
+        self.__counters = [0] * len(TEMP_TYPES)
+
+        removed: Set[int] = set()
+        for site in sites.values():
+            removed.add(site.era)
+            removed.update(site.params)
+            if site.result is not None:
+                removed.add(site.result)
+
+        rewritten: List[Tuple] = []
+        # The jumps of the inlined bodies already land on their new addresses.
+        inlined: Set[int] = set()
+        positions: Dict[int, int] = {}
+        for ip in range(start, end):
+            positions[ip] = start + len(rewritten)
+            if ip in removed:
+                continue
+            if ip not in sites:
+                rewritten.append(quads[ip])
+                continue
+            body = self.rename(sites[ip], start + len(rewritten))
+            inlined.update(range(len(rewritten), len(rewritten) + len(body)))
+            rewritten.extend(body)
+        positions[end] = start + len(rewritten)
+
+        for index, quad in enumerate(rewritten):
+            if index not in inlined and quad[0] in JUMP_OPERATIONS and quad[2] is not None:
+                rewritten[index] = quad[:2] + (positions[quad[2]],) + quad[3:]
+        quads[start:end] = rewritten
+        self.renumber(start, end, len(rewritten) - (end - start))
+
+        method_scope.record_memory_needed(TempAllocator(quads, start, start + len(rewritten)).allocate())
+        return len(sites)
+
+    def renumber(self, start: int, end: int, moved: int):
+        """ Renumbers the jumps and the calls of the other methods to the quads after a method, and the
+            instruction pointers of the methods after it.
+
+            Arguments:
+                - start [int]: The first quad of the method.
+                - end [int]: The first quad after the method, before it changed.
+                - moved [int]: The amount of quads the method grew.
+        """
+        if moved == 0:
+            return
+        quads = self.__quads
+        for ip, quad in enumerate(quads):
+            if start <= ip < end + moved:
+                continue
+            if (quad[0] in JUMP_OPERATIONS or quad[0] == Operations.GOSUB) and quad[2] is not None and quad[2] >= end:
+                quads[ip] = quad[:2] + (quad[2] + moved,) + quad[3:]
+        for method_scope in self.methods():
+            if method_scope.instruction_pointer >= end:
+                method_scope.instruction_pointer += moved
+
+    def call_sites(self, start: int, end: int) -> List[CallSite]:
+        """ Finds the calls of a method, matching every GOSUB with its ERA and its PARAM quads. The
+            calls in the arguments of a call are nested in it.
+
+            Arguments:
+                - start [int]: The first quad of the method.
+                - end [int]: The quad after the last one of the method.
+
+            Returns:
+                - [List[CallSite]]: The calls, in the order of their GOSUB.
+        """
+        quads = self.__quads
+        sites = []
+        pending: List[Tuple[int, List[int]]] = []
+        for ip in range(start, end):
+            quad = quads[ip]
+            if quad[0] == Operations.ERA:
+                pending.append((ip, []))
+            elif quad[0] == Operations.PARAM and pending:
+                pending[-1][1].append(ip)
+            elif quad[0] == Operations.GOSUB and pending:
+                era, params = pending.pop()
+                method_scope = quads[era][3]
+                return_address = method_scope.return_memory_address
+                following = quads[ip + 1]
+                result = None
+                if (following[0] == Operations.ASSIGN and isinstance(return_address, Variable)
+                        and following[2].memory_space == return_address.memory_space):
+                    result = ip + 1
+                sites.append(CallSite(era, params, ip, result, method_scope))
+        return sites
+
+    def body(self, site: CallSite) -> Optional[List[Tuple]]:
+        """ Gets the quads of the method of a call, if the call can be inlined.
+
+            Arguments:
+                - site [CallSite]: The call.
+
+            Returns:
+                - [Optional[List[Tuple]]]: The quads of the method without its END_FUNC, or None if
+                    the call is not inlined.
+        """
+        quads = self.__quads
+        method_scope = site.method_scope
+        era = quads[site.era]
+        entry = method_scope.instruction_pointer
+        if era[1] == "constructor" or method_scope.overridden or quads[site.gosub][2] != entry:
+            return None
+        if method_scope.return_type != "void" and site.result is None:
+            return None
+
+        end = self.end(entry) - 1
+        if end - entry > INLINE_BUDGET:
+            return None
+        body = quads[entry:end]
+        for quad in body:
+            if quad[0] in NOT_INLINABLE_OPERATIONS or (quad[0] == Operations.RETURN and len(quad) > 1):
+                return None
+            for operand in quad[1:]:
+                if isinstance(operand, Variable) and (operand.has_multiple_dimensions() or operand.is_array_pointer()):
+                    return None
+            # The instance variables are the ones of the instance the method is called on.
+            if era[1] != "self" and any(ScopeRanges.is_instance(address) for address in quad_addresses(quad)):
+                return None
+        for param in site.params:
+            if quads[param][1].has_multiple_dimensions() or quads[param][2].has_multiple_dimensions():
+                return None
+        return body
+
+    def rename(self, site: CallSite, base: int) -> List[Tuple]:
+        """ Builds the quads that replace the GOSUB of a call: the arguments assigned to the renamed
+            arguments of the method and its renamed body.
+
+            Arguments:
+                - site [CallSite]: The call.
+                - base [int]: The address the first quad will have.
+
+            Returns:
+                - [List[Tuple]]: The quads.
+        """
+        quads = self.__quads
+        method_scope = site.method_scope
+        entry = method_scope.instruction_pointer
+        body = self.body(site)
+        result = quads[site.result][1] if site.result is not None else None
+        return_address = method_scope.return_memory_address
+        renamed: Dict[int, Variable] = {}
+        counters = self.__counters
+
+        def is_renamed(address) -> bool:
+            return isinstance(address, int) and (ScopeRanges.is_local(address) or TempAllocator.is_temp(address))
+
+        def rename_address(address: int, var_type: str) -> int:
+            # The renamed temporals are virtual, so they do not take the address of a temporal of the caller.
+            if address not in renamed:
+                type_index = TEMP_TYPES.index(var_type if var_type in TEMP_TYPES else Types.OBJECT)
+                memory_space = ScopeRanges.VIRTUAL_TEMP.inf + type_index * VIRTUAL_TYPE_RANGE_SIZE + counters[type_index]
+                counters[type_index] += 1
+                renamed[address] = Variable(memory_space, var_type, memory_space)
+            return renamed[address].memory_space
+
+        def replace(operand):
+            if not isinstance(operand, Variable):
+                return operand
+            if result is not None and operand.memory_space == return_address.memory_space:
+                return result
+            if is_renamed(operand.memory_space):
+                rename_address(operand.memory_space, operand.var_type)
+                return renamed[operand.memory_space]
+            return operand
+
+        rewritten = [(Operations.ASSIGN, replace(quads[param][2]), quads[param][1]) for param in site.params]
+
+        # The last RETURN continues with the quad after the body without a jump.
+        last = len(body) - 1 if body and body[-1][0] == Operations.RETURN else len(body)
+        positions = []
+        for offset in range(len(body) + 1):
+            positions.append(base + len(rewritten) + offset - (offset > last))
+
+        for offset, quad in enumerate(body):
+            if quad[0] == Operations.RETURN:
+                if offset != last:
+                    rewritten.append((Operations.GOTO, None, positions[len(body)]))
+                continue
+            if quad[0] in JUMP_OPERATIONS:
+                rewritten.append((quad[0], replace(quad[1]), positions[quad[2] - entry]))
+                continue
+            new_quad = [quad[0]] + [replace(operand) for operand in quad[1:]]
+            position = RAW_ADDRESS_OPERANDS.get(quad[0])
+            if position is not None and position < len(quad) and is_renamed(quad[position]):
+                if quad[0] == Operations.ASSIGN:
+                    new_quad[position] = new_quad[1].memory_space
+                else:
+                    var_type = TEMP_TYPES[TempAllocator.type_index(quad[position])]
+                    new_quad[position] = rename_address(quad[position], var_type)
+            rewritten.append(tuple(new_quad))
+        return rewritten
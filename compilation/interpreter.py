@@ -2,6 +2,7 @@ from helpers.operations import Operations
 from helpers.types import Types
 from helpers.operations_cube import OperationsCube
 from helpers.custom_stack import Stack
+from helpers.quads import ELEMENTWISE_OPERATIONS
 from scope.variable import Variable
 from memory.compilation_memory import CompilationMemory
 from scope.method_scope import MethodScope
@@ -12,6 +13,24 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# The built-in operations on dimensional variables by name, with their operation and whether each of
+# their arguments is a dimensional variable. The first argument of the ones that return no value is
+# the variable they write.
+ARRAY_OPERATIONS = {
+    "fill": (Operations.FILL, (True, False)),
+    "copy": (Operations.COPY, (True, True)),
+    "add": (Operations.ARRAY_ADD, (True, True, True)),
+    "subtract": (Operations.ARRAY_SUBS, (True, True, True)),
+    "multiply": (Operations.ARRAY_PROD, (True, True, True)),
+    "divide": (Operations.ARRAY_DIV, (True, True, True)),
+    "matmul": (Operations.MATMUL, (True, True, True)),
+    "sum": (Operations.SUM, (True,)),
+    "dot": (Operations.DOT, (True, True)),
+}
+
+# The built-in operations that return a value.
+VALUE_OPERATIONS = (Operations.SUM, Operations.DOT)
+
 
 class Interpreter:
     """ The Interpretes is a class responsible for taking action based on the instructions
@@ -31,6 +50,11 @@ class Interpreter:
             the quads for the program.
         __current_param_index [int]: Keeps track of the parameter index that is being
             supplied in a function call.
+        __pending_calls [Stack]: Keeps track of the address of the ERA quad of every method call
+            whose GOSUB has not been generated yet, so the ERA gets the scope of the method called.
+        __array_operations [Stack]: Keeps track of the calls to built-in operations whose
+            arguments are being supplied, with the form (name, arguments, operands size,
+            dimensional operands size).
     """
     def __init__(self):
         self.__operands = Stack()
@@ -40,6 +64,8 @@ class Interpreter:
         self.__goto_main = None
         self.__quads = []
         self.__current_param_index = 0
+        self.__pending_calls = Stack()
+        self.__array_operations = Stack()
 
     @property
     def quads(self):
@@ -240,11 +266,14 @@ class Interpreter:
         return len(self.__quads) - 1
 
     def read_quad(self):
-        """ Generates a quad for the read operation.
-        """
-        memory_address = CompilationMemory.next_temp_memory_space(
-            Types.STRING)
-        temp = Variable(memory_address, Types.STRING, memory_address)
+        """ Generates a quad for the read operation. When the read is assigned to a variable the
+            input is read with the type of the variable, otherwise it is read as a string.
+        """
+        read_type = Types.STRING
+        if not self.__operands.isEmpty() and Types.is_primitive(self.__operands.top().var_type):
+            read_type = self.__operands.top().var_type
+        memory_address = CompilationMemory.next_temp_memory_space(read_type)
+        temp = Variable(memory_address, read_type, memory_address)
         self.__quads.append((Operations.READ, temp))
         self.__operands.push(temp)
 
@@ -365,6 +394,7 @@ class Interpreter:
             operand = instance
 
         self.__quads.append((Operations.ERA, operand, method))
+        self.__pending_calls.push(self.getCurrentInstructionAddr())
 
     def add_method_parameter(self, method_scope: MethodScope):
         """ Creates a quad to assing the variable from the current memory, to the
@@ -402,6 +432,10 @@ class Interpreter:
         # Handle weird case when the instance is detected as an operand.
         if instance != None and instance != "self":
             self.__operands.pop()
+
+        # The ERA quad of the call gets the scope of the method, so the virtual machine can size its memory.
+        era_address = self.__pending_calls.pop()
+        self.__quads[era_address] = self.__quads[era_address][:3] + (method_scope,)
         self.__quads.append((Operations.GOSUB, method_scope.name, method_scope.instruction_pointer))
 
         if method_scope.return_type != "void":
@@ -414,6 +448,167 @@ class Interpreter:
             raise Exception(f"Number of parameters do not match on {method_scope.name}")
         self.__current_param_index = 0
 
+    def start_array_operation(self, name: str):
+        """ Starts a call to a built-in operation on dimensional variables, see ARRAY_OPERATIONS.
+
+            Arguments:
+                - name [str]: The name of the operation.
+
+            Raises:
+                - ValueError: If there is no built-in operation with that name.
+        """
+        self.__array_operations.push((name, [], self.__operands.size(), self.__dim_operands.size()))
+        if name not in ARRAY_OPERATIONS:
+            raise ValueError(f"{name} is not a built-in operation.")
+
+    def add_array_argument(self):
+        """ Takes the argument just parsed for the current built-in operation, from the
+            dimensional operands stack when it is a dimensional variable.
+        """
+        _, arguments, _, dim_operands_size = self.__array_operations.top()
+        if self.__dim_operands.size() > dim_operands_size:
+            argument, _ = self.__dim_operands.pop()
+        else:
+            argument = self.__operands.pop()
+        arguments.append(argument)
+
+    def complete_array_operation(self, returns_value: bool):
+        """ Checks the arguments of the current built-in operation against the dimensions of its
+            variables and creates its quad. The operations that return a value push a temporal
+            with it to the operands stack.
+
+            When the operation is used in an expression and it is not valid, a temporal of the type
+            it was expected to return is pushed instead, so the rest of the expression can still be
+            parsed and only the error of the operation is reported.
+
+            Arguments:
+                - returns_value [bool]: Whether the operation is used in an expression.
+
+            Raises:
+                - ValueError: If the arguments, their types or their dimensions do not match the operation.
+        """
+        name, arguments, operands_size, _ = self.__array_operations.pop()
+        try:
+            if name in ARRAY_OPERATIONS:
+                self.gen_array_operation(name, arguments, returns_value)
+        finally:
+            if returns_value and self.__operands.size() == operands_size:
+                result_type = Types.FLOAT if any(argument.var_type == Types.FLOAT for argument in arguments) else Types.INT
+                memory_address = CompilationMemory.next_temp_memory_space(result_type)
+                self.__operands.push(Variable(memory_address, result_type, memory_address))
+
+    def gen_array_operation(self, name: str, arguments: List[Variable], returns_value: bool):
+        """ Checks the arguments of a built-in operation and creates its quad.
+
+            Arguments:
+                - name [str]: The name of the operation.
+                - arguments [List[Variable]]: Its arguments.
+                - returns_value [bool]: Whether the operation is used in an expression.
+
+            Raises:
+                - ValueError: If the arguments, their types or their dimensions do not match the operation.
+        """
+        operation, dimensional = ARRAY_OPERATIONS[name]
+        if len(arguments) != len(dimensional):
+            raise ValueError(f"Number of arguments of {name} must be {len(dimensional)}.")
+        for position, argument in enumerate(arguments):
+            if argument.has_multiple_dimensions() != dimensional[position]:
+                kind = "a dimensional variable" if dimensional[position] else "a single value"
+                raise ValueError(f"Argument {position + 1} of {name} must be {kind}.")
+        if returns_value != (operation in VALUE_OPERATIONS):
+            raise ValueError(f"{name} {'does not return' if returns_value else 'returns'} a value.")
+
+        if operation == Operations.FILL:
+            array, value = arguments
+            Interpreter.check_assignable(name, value.var_type, array)
+            self.__quads.append((Operations.FILL, value, array))
+        elif operation == Operations.COPY:
+            array, source = arguments
+            Interpreter.check_same_dimensions(name, array, source)
+            Interpreter.check_assignable(name, source.var_type, array)
+            self.__quads.append((Operations.COPY, source, array))
+        elif operation == Operations.SUM:
+            array, = arguments
+            Interpreter.check_numeric(name, array)
+            self.push_array_result((Operations.SUM, array), array.var_type)
+        elif operation == Operations.DOT:
+            left, right = arguments
+            Interpreter.check_numeric(name, left, right)
+            Interpreter.check_same_dimensions(name, left, right)
+            self.push_array_result((Operations.DOT, left, right),
+                                   OperationsCube.verify(left.var_type, right.var_type, Operations.PROD))
+        elif operation == Operations.MATMUL:
+            array, left, right = arguments
+            Interpreter.check_numeric(name, left, right)
+            if any(len(variable.dimensions) != 2 for variable in arguments):
+                raise ValueError(f"{name} only multiplies variables of two dimensions.")
+            (rows, inner), (right_rows, columns) = left.dimensions, right.dimensions
+            if inner != right_rows or array.dimensions != (rows, columns):
+                raise ValueError(f"Cannot multiply {Interpreter.describe(left)} by {Interpreter.describe(right)} "
+                                 f"into {Interpreter.describe(array)}.")
+            result_type = OperationsCube.verify(left.var_type, right.var_type, Operations.PROD)
+            Interpreter.check_assignable(name, result_type, array)
+            self.__quads.append((Operations.MATMUL, left, right, array))
+        else:
+            array, left, right = arguments
+            Interpreter.check_numeric(name, left, right)
+            Interpreter.check_same_dimensions(name, array, left, right)
+            result_type = OperationsCube.verify(left.var_type, right.var_type, ELEMENTWISE_OPERATIONS[operation])
+            Interpreter.check_assignable(name, result_type, array)
+            self.__quads.append((operation, left, right, array))
+
+    def push_array_result(self, quad: Tuple, result_type: str):
+        """ Creates the quad of a built-in operation that returns a value, storing it in a new temporal
+            that is pushed to the operands stack.
+
+            Arguments:
+                - quad [Tuple]: The quad without its result.
+                - result_type [str]: The type of the value.
+        """
+        memory_address = CompilationMemory.next_temp_memory_space(result_type)
+        temp = Variable(memory_address, result_type, memory_address)
+        self.__quads.append(quad + (temp,))
+        self.__operands.push(temp)
+
+    @staticmethod
+    def describe(variable: Variable) -> str:
+        """ The name of a dimensional variable followed by its dimensions, e.g. a[3][4].
+        """
+        return variable.name + "".join(f"[{size}]" for size in variable.dimensions)
+
+    @staticmethod
+    def check_numeric(name: str, *variables: Variable):
+        """ Checks that the elements of dimensional variables are int or float.
+
+            Raises:
+                - ValueError: If a variable is of another type.
+        """
+        for variable in variables:
+            if variable.var_type not in (Types.INT, Types.FLOAT):
+                raise ValueError(f"{name} only operates on int and float variables, {variable.name} is {variable.var_type}.")
+
+    @staticmethod
+    def check_same_dimensions(name: str, *variables: Variable):
+        """ Checks that dimensional variables have the same dimensions.
+
+            Raises:
+                - ValueError: If the dimensions of a variable are not the ones of the first one.
+        """
+        for variable in variables[1:]:
+            if variable.dimensions != variables[0].dimensions:
+                raise ValueError(f"The dimensions of {Interpreter.describe(variable)} do not match "
+                                 f"{Interpreter.describe(variables[0])} in {name}.")
+
+    @staticmethod
+    def check_assignable(name: str, value_type: str, array: Variable):
+        """ Checks that a value can be assigned to the elements of a dimensional variable.
+
+            Raises:
+                - ValueError: If the types are not compatible.
+        """
+        if value_type != array.var_type and OperationsCube.verify(value_type, array.var_type, Operations.ASSIGN) == Types.ERROR:
+            raise ValueError(f"Cannot assign {value_type} values to the {array.var_type} elements of {array.name} in {name}.")
+
     def add_end_function_quad(self, method_scope: MethodScope):
         """ Creates a quad to indicate the end of a function.
         """
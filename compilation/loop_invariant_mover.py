@@ -0,0 +1,241 @@
+from bisect import bisect_left
+from compilation.constant_folder import ConstantFolder, JUMP_OPERATIONS
+from compilation.control_flow_graph import ControlFlowGraph
+from compilation.temp_allocator import TempAllocator
+from helpers.operations import Operations
+from helpers.quads import BINARY_OPERATIONS
+from memory.ranges import ScopeRanges
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The operations that only compute their result from their operands, so they can be moved.
+INVARIANT_OPERATIONS = BINARY_OPERATIONS + (Operations.ASSIGN, Operations.NOT, Operations.PROD_LIT,
+                                            Operations.ADD_LIT)
+
+
+class LoopInvariantMover:
+    """ The LoopInvariantMover hoists the quads of a loop whose result is the same on every iteration
+        to a preheader, so they run once every time the loop is entered.
+
+        The loops are the natural loops of the ControlFlowGraph of the method, found from their back
+        edges, the GOTO at the end of a while or a for loop that jumps back to the condition of the
+        loop, its header. A loop spans from its header to its last back edge and is only entered
+        through its header. The innermost loops are processed first, so the
+        quads hoisted from a loop can be hoisted again from the loops around it.
+
+        A quad is hoisted when:
+            - It is an expression, NOT, PROD_LIT, ADD_LIT or an ASSIGN to a temporal.
+            - It writes a temporal that is written by no other quad of the method.
+            - Its operands are constants, local variables or temporals not written in the loop, or
+              temporals written by hoisted quads. Global and instance variables can be changed by
+              the methods called in the loop, and arrays through their pointers, so they never are.
+            - It runs on every iteration, that is no jump of the loop skips it.
+            - It cannot fail, so a division is only hoisted when its divisor is a nonzero constant.
+        The hoisted quads keep their order. The jumps into the loop from outside of it are renumbered
+        to the preheader and the jumps inside of the loop to its header.
+
+        The method must be the last one of the quads, so moving its quads only renumbers the quads of
+        the method itself. This pass runs before the TempAllocator, while every temporal is written
+        by a single quad.
+
+        The main parts of the LoopInvariantMover are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __class_directory [SymbolTable]: The classes, whose methods are renumbered.
+            __hoisted [int]: The amount of quads hoisted.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        self.__quads = quads
+        self.__start = start
+        self.__class_directory = class_directory
+        self.__hoisted = 0
+
+    @property
+    def hoisted(self) -> int:
+        return self.__hoisted
+
+    def hoist(self) -> int:
+        """ Hoists the invariant quads of every loop of the method, from the innermost loops out.
+
+            Returns:
+                - [int]: The amount of quads hoisted, counting every loop they leave.
+        """
+        moved = True
+        while moved:
+            moved = False
+            for header, latch in self.loops():
+                invariants = self.invariants(header, latch)
+                if invariants:
+                    self.move(header, latch, invariants)
+                    self.__hoisted += len(invariants)
+                    # The loops are found again, the quads after the preheader moved.
+                    moved = True
+                    break
+
+        logger.debug(f"Hoisted {self.__hoisted} quads.")
+        return self.__hoisted
+
+    def loops(self) -> List[Tuple[int, int]]:
+        """ Finds the loops of the method that are only entered through their header.
+
+            Returns:
+                - [List[Tuple[int, int]]]: The header and the last back edge of every loop, from the
+                    smallest loop to the largest one.
+        """
+        quads = self.__quads
+        graph = ControlFlowGraph(quads, self.__start, len(quads))
+        loops = []
+        for loop in graph.natural_loops():
+            blocks = [graph.blocks[label] for label in loop.blocks]
+            header = graph.blocks[loop.header].address
+            latch = max(block.address + len(block.quads) - 1 for block in blocks if block.label in loop.latches)
+            # The loop is moved as the quads from its header to its back edge.
+            if any(block.address < header or block.address > latch for block in blocks):
+                continue
+            entered_inside = any(self.__start <= ip < header or ip > latch
+                                 for ip in range(self.__start, len(quads))
+                                 if quads[ip][0] in JUMP_OPERATIONS and quads[ip][2] is not None
+                                 and header < quads[ip][2] <= latch)
+            if not entered_inside:
+                loops.append((header, latch))
+        return sorted(loops, key=lambda loop: loop[1] - loop[0])
+
+    def invariants(self, header: int, latch: int) -> List[int]:
+        """ Finds the quads of a loop that can be hoisted to its preheader.
+
+            Arguments:
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+
+            Returns:
+                - [List[int]]: The addresses of the invariant quads, in order.
+        """
+        quads = self.__quads
+        definitions: Dict[int, int] = {}
+        for ip in range(self.__start, len(quads)):
+            for address in TempAllocator.uses_and_definitions(quads[ip])[1]:
+                definitions[address] = definitions.get(address, 0) + 1
+        written = set()
+        for ip in range(header, latch + 1):
+            written.update(TempAllocator.uses_and_definitions(quads[ip])[1])
+
+        # The quads skipped by a jump of the loop do not run on every iteration.
+        skipped = set()
+        for ip in range(header, latch + 1):
+            quad = quads[ip]
+            if quad[0] in JUMP_OPERATIONS and quad[2] is not None and ip < quad[2] <= latch:
+                skipped.update(range(ip + 1, quad[2]))
+
+        invariants = []
+        hoisted: Set[int] = set()
+        for ip in range(header, latch + 1):
+            if ip in skipped:
+                continue
+            result = self.result(quads[ip])
+            if (result is None or definitions.get(result) != 1 or not self.is_safe(quads[ip])
+                    or not all(self.is_invariant(operand, written, hoisted) for operand in self.operands(quads[ip]))):
+                continue
+            invariants.append(ip)
+            hoisted.add(result)
+        return invariants
+
+    @staticmethod
+    def result(quad: Tuple) -> Optional[int]:
+        """ Gets the temporal written by a quad that can be hoisted.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+
+            Returns:
+                - [Optional[int]]: The address of the temporal, or None when the quad cannot be hoisted.
+        """
+        if quad[0] not in INVARIANT_OPERATIONS:
+            return None
+        if quad[0] == Operations.ASSIGN and (quad[1].is_array_pointer() or quad[1].has_multiple_dimensions()):
+            return None
+        defined = TempAllocator.uses_and_definitions(quad)[1]
+        if len(defined) != 1 or not TempAllocator.is_temp(defined[0]):
+            return None
+        return defined[0]
+
+    @staticmethod
+    def operands(quad: Tuple) -> List:
+        """ The operands read by a quad that can be hoisted.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+
+            Returns:
+                - [List]: The Variables read. The base of an ADD_LIT is an address, so it is always invariant.
+        """
+        if quad[0] in BINARY_OPERATIONS:
+            return [quad[1], quad[2]]
+        if quad[0] == Operations.ASSIGN:
+            return [quad[2]]
+        return [quad[1]]
+
+    @staticmethod
+    def is_safe(quad: Tuple) -> bool:
+        if quad[0] == Operations.DIV:
+            return ConstantFolder.is_constant(quad[2]) and ConstantFolder.value(quad[2]) != 0
+        return True
+
+    @staticmethod
+    def is_invariant(operand, written: Set[int], hoisted: Set[int]) -> bool:
+        """ Whether an operand holds the same value on every iteration of a loop.
+
+            Arguments:
+                - operand [Variable]: The operand.
+                - written [Set[int]]: The addresses written in the loop.
+                - hoisted [Set[int]]: The temporals written by the quads hoisted from the loop.
+
+            Returns:
+                - [bool]: True if the operand is invariant.
+        """
+        if not isinstance(operand, Variable) or operand.is_array_pointer() or operand.has_multiple_dimensions():
+            return False
+        if operand.is_constant():
+            return True
+        address = operand.memory_space
+        if address in hoisted:
+            return True
+        return (ScopeRanges.is_local(address) or TempAllocator.is_temp(address)) and address not in written
+
+    def move(self, header: int, latch: int, invariants: List[int]):
+        """ Moves the invariant quads of a loop to its preheader, right before its header, and
+            renumbers the jump targets and the instruction pointers of the methods.
+
+            Arguments:
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+                - invariants [List[int]]: The addresses of the quads to move.
+        """
+        quads = self.__quads
+        moved = set(invariants)
+        kept = [ip for ip in range(self.__start, len(quads)) if ip not in moved]
+
+        def renumber(address, inside: bool):
+            if address is None or address < header or (address == header and not inside):
+                return address
+            # A moved quad continues with the next quad kept in the loop.
+            return self.__start + len(invariants) + bisect_left(kept, address)
+
+        for ip in range(len(quads)):
+            quad = quads[ip]
+            if quad[0] in JUMP_OPERATIONS or quad[0] == Operations.GOSUB:
+                if len(quad) > 2:
+                    target = renumber(quad[2], header <= ip <= latch)
+                    if target != quad[2]:
+                        quads[ip] = quad[:2] + (target,) + quad[3:]
+        for class_scope in self.__class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                method_scope.instruction_pointer = renumber(method_scope.instruction_pointer, False)
+
+        before = [quads[ip] for ip in range(self.__start, header)]
+        after = [quads[ip] for ip in kept if ip >= header]
+        quads[self.__start:] = before + [quads[ip] for ip in invariants] + after
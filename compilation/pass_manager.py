@@ -0,0 +1,306 @@
+from compilation.bounds_check_eliminator import BoundsCheckEliminator
+from compilation.constant_folder import ConstantFolder, JUMP_OPERATIONS
+from compilation.dead_code_eliminator import DeadCodeEliminator
+from compilation.inliner import Inliner
+from compilation.loop_invariant_mover import LoopInvariantMover
+from compilation.purity import PurityAnalyzer
+from compilation.strength_reducer import StrengthReducer
+from helpers.operations import Operations
+from scope.method_scope import MethodScope
+from scope.symbol_table import SymbolTable
+from typing import Any, Callable, Dict, List, Tuple
+import difflib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class OptimizationPass:
+    """ An optimization that rewrites the quads of a method.
+
+        The main parts of the OptimizationPass are:
+            name [str]: The name of the pass, used to declare the dependencies and in the reports.
+            run [Callable[[List[Tuple], int, SymbolTable], Any]]: Optimizes the quads of the method that
+                starts at the given quad, the last method of the quads.
+            requires [Tuple[str, ...]]: The passes that must run before this one.
+            program [bool]: Whether the pass optimizes the whole program once every method is
+                generated instead of every method, in which case it is run with the first quad.
+    """
+
+    def __init__(self, name: str, run: Callable[[List[Tuple], int, SymbolTable], Any], requires: Tuple[str, ...] = (),
+                 program: bool = False):
+        self.name = name
+        self.run = run
+        self.requires = requires
+        self.program = program
+
+
+# The passes every level runs, the dependencies missing from a level are added before the passes
+# that require them.
+OPTIMIZATION_LEVELS = {
+    0: (),
+    1: ("constant_folding", "dead_code"),
+    2: ("constant_folding", "dead_code", "loop_invariant", "bounds_check", "strength_reduction", "inlining",
+        "memoization"),
+}
+
+DEFAULT_OPTIMIZATION_LEVEL = 2
+
+
+class PassManager:
+    """ The PassManager runs the optimization passes of a level over the quads of every method,
+        once the method is generated and before its temporals are allocated.
+
+        The passes are registered with their dependencies and the pipeline of a level is ordered so
+        every pass runs after the passes it requires. After each pass the manager verifies that the
+        quads of the method are still well formed:
+            - Every jump of the method lands inside of the method, or right after it.
+            - Every GOSUB of the method lands on the first quad of a method.
+            - A method that ended with an END_FUNC still ends with it, and the method still starts
+              at its instruction pointer.
+        A broken invariant raises an Exception naming the pass, so the Compiler reports it.
+
+        The program passes run once the whole program is generated, after the passes of the last
+        method, see run_program.
+
+        Every pass is timed. In explain mode the manager also keeps, for every method and pass, the
+        differences between the quads of the method before and after the pass.
+
+        The main parts of the PassManager are:
+            __passes [Dict[str, OptimizationPass]]: The registered passes by name.
+            __level [int]: The optimization level, a key of OPTIMIZATION_LEVELS.
+            __explain [bool]: Whether the changes of every pass are recorded.
+            __timings [Dict[str, float]]: The seconds spent in each pass, over every method.
+            __explanations [List[str]]: The lines of the report of the changes.
+    """
+
+    def __init__(self, level: int = DEFAULT_OPTIMIZATION_LEVEL, explain: bool = False):
+        if level not in OPTIMIZATION_LEVELS:
+            raise Exception(f"Invalid optimization level {level}.")
+        self.__passes: Dict[str, OptimizationPass] = {}
+        self.__level = level
+        self.__explain = explain
+        self.__timings: Dict[str, float] = {}
+        self.__explanations: List[str] = []
+
+    @property
+    def level(self) -> int:
+        return self.__level
+
+    @property
+    def explain(self) -> bool:
+        return self.__explain
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return self.__timings
+
+    @property
+    def explanations(self) -> List[str]:
+        return self.__explanations
+
+    def register(self, optimization_pass: OptimizationPass):
+        """ Adds a pass to the ones a level can run.
+
+            Arguments:
+                - optimization_pass [OptimizationPass]: The pass.
+
+            Raises:
+                - Exception: If a pass with the same name is already registered.
+        """
+        if optimization_pass.name in self.__passes:
+            raise Exception(f"Optimization pass {optimization_pass.name} is already registered.")
+        self.__passes[optimization_pass.name] = optimization_pass
+
+    def pipeline(self) -> List[OptimizationPass]:
+        """ Orders the passes of the level after the passes they require.
+
+            Returns:
+                - [List[OptimizationPass]]: The passes to run, in order.
+
+            Raises:
+                - Exception: If a pass is not registered or the dependencies form a cycle.
+        """
+        ordered: List[OptimizationPass] = []
+        visiting = set()
+
+        def add(name: str):
+            if any(optimization_pass.name == name for optimization_pass in ordered):
+                return
+            if name not in self.__passes:
+                raise Exception(f"Unknown optimization pass {name}.")
+            if name in visiting:
+                raise Exception(f"The optimization pass {name} depends on itself.")
+            visiting.add(name)
+            for required in self.__passes[name].requires:
+                add(required)
+            visiting.discard(name)
+            ordered.append(self.__passes[name])
+
+        for name in OPTIMIZATION_LEVELS[self.__level]:
+            add(name)
+        return ordered
+
+    def run(self, method_scope: MethodScope, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        """ Runs the pipeline of the level over the quads of a method.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+                - quads [List[Tuple]]: The quads of the program, the method is the last one.
+                - start [int]: The first quad of the method.
+                - class_directory [SymbolTable]: The classes, whose methods are renumbered.
+
+            Raises:
+                - Exception: If a pass breaks the quads of the method.
+        """
+        for optimization_pass in self.pipeline():
+            if optimization_pass.program:
+                continue
+            before = quads[start:] if self.__explain else None
+            ends_method = len(quads) > start and quads[-1][0] == Operations.END_FUNC
+
+            self.time(optimization_pass, quads, start, class_directory)
+            self.verify(optimization_pass.name, method_scope, quads, start, class_directory, ends_method)
+            if before is not None:
+                self.record_changes(optimization_pass.name, method_scope.name, start, before, quads[start:])
+
+    def run_program(self, quads: List[Tuple], class_directory: SymbolTable):
+        """ Runs the program passes of the level over the quads of the program.
+
+            Arguments:
+                - quads [List[Tuple]]: The quads of the program.
+                - class_directory [SymbolTable]: The classes, whose methods are renumbered.
+
+            Raises:
+                - Exception: If a pass breaks the quads of the program.
+        """
+        for optimization_pass in self.pipeline():
+            if not optimization_pass.program:
+                continue
+            before = list(quads) if self.__explain else None
+
+            self.time(optimization_pass, quads, 0, class_directory)
+            entries = {method.instruction_pointer for class_scope in class_directory.symbols.values()
+                       for method in class_scope.method_directory.symbols.values()}
+            for ip, quad in enumerate(quads):
+                if ((quad[0] in JUMP_OPERATIONS and (quad[2] is None or not 0 <= quad[2] <= len(quads)))
+                        or (quad[0] == Operations.GOSUB and quad[2] not in entries)):
+                    raise Exception(f"Optimization pass {optimization_pass.name} broke the program: "
+                                    f"the quad {ip} lands on {quad[2]}.")
+            if before is not None:
+                self.record_changes(optimization_pass.name, "program", 0, before, quads)
+
+    def time(self, optimization_pass: OptimizationPass, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        """ Runs a pass and adds the time it took to its timings.
+
+            Arguments:
+                - optimization_pass [OptimizationPass]: The pass.
+                - quads [List[Tuple]]: The quads of the program.
+                - start [int]: The first quad of the method, or 0 for a program pass.
+                - class_directory [SymbolTable]: The classes.
+        """
+        begin = time.perf_counter()
+        optimization_pass.run(quads, start, class_directory)
+        elapsed = time.perf_counter() - begin
+        self.__timings[optimization_pass.name] = self.__timings.get(optimization_pass.name, 0) + elapsed
+
+    def verify(self, name: str, method_scope: MethodScope, quads: List[Tuple], start: int,
+               class_directory: SymbolTable, ends_method: bool):
+        """ Checks that the quads of a method are still well formed after a pass.
+
+            Arguments:
+                - name [str]: The name of the pass.
+                - method_scope [MethodScope]: The method.
+                - quads [List[Tuple]]: The quads of the program.
+                - start [int]: The first quad of the method.
+                - class_directory [SymbolTable]: The classes, whose methods can be called.
+                - ends_method [bool]: Whether the method ended with an END_FUNC before the pass.
+
+            Raises:
+                - Exception: If an invariant does not hold.
+        """
+        def fail(reason: str):
+            raise Exception(f"Optimization pass {name} broke {method_scope.name}: {reason}.")
+
+        if method_scope.instruction_pointer is not None and method_scope.instruction_pointer != start:
+            fail(f"the method moved from {start} to {method_scope.instruction_pointer}")
+        entries = {method.instruction_pointer for class_scope in class_directory.symbols.values()
+                   for method in class_scope.method_directory.symbols.values()}
+        for ip in range(start, len(quads)):
+            quad = quads[ip]
+            if quad[0] in JUMP_OPERATIONS and (quad[2] is None or not start <= quad[2] <= len(quads)):
+                fail(f"the jump {ip} lands on {quad[2]}")
+            if quad[0] == Operations.GOSUB and quad[2] not in entries:
+                fail(f"the call {ip} lands on {quad[2]}, not on a method")
+            if quad[0] == Operations.END_FUNC and ip != len(quads) - 1:
+                fail(f"the END_FUNC {ip} is not the last quad")
+        if ends_method and quads[-1][0] != Operations.END_FUNC:
+            fail("the END_FUNC was removed")
+
+    def record_changes(self, name: str, method_name: str, start: int, before: List[Tuple], after: List[Tuple]):
+        """ Adds the differences between the quads of a method before and after a pass to the report.
+
+            Arguments:
+                - name [str]: The name of the pass.
+                - method_name [str]: The name of the method, or program for a program pass.
+                - start [int]: The first quad of the method, the lines of the differences count from it.
+                - before [List[Tuple]]: The quads of the method before the pass.
+                - after [List[Tuple]]: The quads of the method after the pass.
+        """
+        differences = list(difflib.unified_diff([repr(quad) for quad in before], [repr(quad) for quad in after],
+                                                lineterm="", n=0))
+        if not differences:
+            return
+        self.__explanations.append(f"{method_name} from quad {start}, {name}:")
+        # The first two lines are the headers of the files.
+        self.__explanations.extend(f"  {line}" for line in differences[2:])
+
+    def report(self) -> List[str]:
+        """ Builds the report of the compilation, the changes of every pass in explain mode and the time
+            spent in each pass.
+
+            Returns:
+                - [List[str]]: The lines of the report.
+        """
+        lines = list(self.__explanations)
+        lines.append(f"Optimization level {self.__level}:")
+        for optimization_pass in self.pipeline():
+            lines.append(f"  {optimization_pass.name}: {self.__timings.get(optimization_pass.name, 0) * 1000:.3f} ms")
+        return lines
+
+    @staticmethod
+    def default(level: int = DEFAULT_OPTIMIZATION_LEVEL, explain: bool = False) -> "PassManager":
+        """ Creates a PassManager with the passes of the Compiler registered.
+
+            Arguments:
+                - level [int]: The optimization level.
+                - explain [bool]: Whether the changes of every pass are recorded.
+
+            Returns:
+                - [PassManager]: The manager.
+        """
+        manager = PassManager(level, explain)
+        manager.register(OptimizationPass(
+            "inlining", lambda quads, start, classes: Inliner(quads, classes).inline(), program=True))
+        # Marks the pure methods, whose calls the virtual machines memoize. It classifies the quads the
+        # inlining left, the calls that were inlined are not memoized.
+        manager.register(OptimizationPass(
+            "memoization", lambda quads, start, classes: PurityAnalyzer(quads, classes).classify(), ("inlining",),
+            program=True))
+        manager.register(OptimizationPass(
+            "constant_folding", lambda quads, start, classes: ConstantFolder(quads, start, len(quads)).fold()))
+        manager.register(OptimizationPass(
+            "dead_code", lambda quads, start, classes: DeadCodeEliminator(quads, start, classes).eliminate(),
+            ("constant_folding",)))
+        manager.register(OptimizationPass(
+            "loop_invariant", lambda quads, start, classes: LoopInvariantMover(quads, start, classes).hoist(),
+            ("dead_code",)))
+        manager.register(OptimizationPass(
+            "bounds_check", lambda quads, start, classes: BoundsCheckEliminator(quads, start, classes).eliminate(),
+            ("loop_invariant",)))
+        # The strength reduction rewrites the index products the range analysis of the bounds checks reads.
+        manager.register(OptimizationPass(
+            "strength_reduction", lambda quads, start, classes: StrengthReducer(quads, start, classes).reduce(),
+            ("bounds_check",)))
+        return manager
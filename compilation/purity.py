@@ -0,0 +1,148 @@
+from helpers.operations import Operations
+from helpers.quads import ELEMENTWISE_OPERATIONS, quad_addresses
+from memory.ranges import ScopeRanges
+from scope.method_scope import MethodScope
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The built-in operations on dimensional variables that write the variable in their last operand.
+ARRAY_STORE_OPERATIONS = (Operations.FILL, Operations.COPY, Operations.MATMUL) + tuple(ELEMENTWISE_OPERATIONS)
+
+
+class PurityAnalyzer:
+    """ The PurityAnalyzer classifies the methods of a program as pure when their result only
+        depends on their arguments, so their calls can be memoized.
+
+        A method is pure when:
+            - It does not READ nor WRITE.
+            - It does not read nor write global or instance memory, other than the return variables
+              of the methods.
+            - It does not write the elements of its dimensional arguments, which are the variables of
+              the caller.
+            - It only calls pure methods. A call to an overridden method can run any of its overrides.
+        Constructors are never pure.
+
+        The main parts of the PurityAnalyzer are:
+            __quads [List[Tuple]]: The quads of the program.
+            __methods [Dict[MethodScope, Tuple[int, int]]]: The first quad and the END_FUNC quad of every method.
+            __return_addresses [Set[int]]: The addresses of the return variables of every method.
+            __overrides [Dict[MethodScope, Set[MethodScope]]]: The methods that override each method.
+    """
+
+    def __init__(self, quads: List[Tuple], class_directory: SymbolTable):
+        self.__quads = quads
+        self.__methods: Dict[MethodScope, Tuple[int, int]] = {}
+        self.__return_addresses: Set[int] = set()
+        self.__overrides: Dict[MethodScope, Set[MethodScope]] = {}
+        for class_scope in class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                inherited = method_scope.overrides
+                while inherited is not None:
+                    self.__overrides.setdefault(inherited, set()).add(method_scope)
+                    inherited = inherited.overrides
+                if method_scope.instruction_pointer is None:
+                    continue
+                end = method_scope.instruction_pointer
+                while quads[end][0] != Operations.END_FUNC:
+                    end += 1
+                self.__methods[method_scope] = (method_scope.instruction_pointer, end)
+                if isinstance(method_scope.return_memory_address, Variable):
+                    self.__return_addresses.add(method_scope.return_memory_address.memory_space)
+
+    def classify(self) -> Set[MethodScope]:
+        """ Classifies every method of the program and marks the pure ones.
+
+            Returns:
+                - [Set[MethodScope]]: The pure methods.
+        """
+        calls = {}
+        pure = set()
+        for method_scope, (start, end) in self.__methods.items():
+            method_scope.pure = False
+            callees = self.callees(start, end)
+            if callees is not None and not self.writes_arguments(method_scope, start, end):
+                calls[method_scope] = callees
+                pure.add(method_scope)
+
+        # A method stops being pure when one of its callees is not, until nothing changes.
+        changed = True
+        while changed:
+            changed = False
+            for method_scope in list(pure):
+                if not calls[method_scope] <= pure:
+                    pure.discard(method_scope)
+                    changed = True
+
+        for method_scope in pure:
+            method_scope.pure = True
+            logger.debug(f"Method {method_scope.name} is pure.")
+        return pure
+
+    def callees(self, start: int, end: int) -> Optional[Set[MethodScope]]:
+        """ Collects the methods called by a method, checking that its own quads are pure.
+
+            Arguments:
+                - start [int]: The first quad of the method.
+                - end [int]: The END_FUNC quad of the method.
+
+            Returns:
+                - [Optional[Set[MethodScope]]]: The methods called, or None if the quads of the method are not pure.
+        """
+        callees = set()
+        for quad in self.__quads[start:end]:
+            if quad[0] in (Operations.READ, Operations.WRITE):
+                return None
+            # Only constructors return a value with their RETURN quad.
+            if quad[0] == Operations.RETURN and len(quad) > 1:
+                return None
+            if not all(self.is_private_address(address) for address in quad_addresses(quad)):
+                return None
+            if quad[0] == Operations.ERA:
+                callees.add(quad[3])
+                callees |= self.__overrides.get(quad[3], set())
+        return callees
+
+    def writes_arguments(self, method_scope: MethodScope, start: int, end: int) -> bool:
+        """ Whether a method writes the elements of one of its dimensional arguments, either through
+            an array pointer or as the result of a built-in operation on dimensional variables.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+                - start [int]: The first quad of the method.
+                - end [int]: The END_FUNC quad of the method.
+
+            Returns:
+                - [bool] True if the method writes the elements of an argument.
+        """
+        arguments = set(argument.memory_space for argument in method_scope.ordered_arguments
+                        if argument.has_multiple_dimensions())
+        if not arguments:
+            return False
+        quads = self.__quads[start:end]
+        # A pointer temporal can be reused for several variables, any of them may be the one written.
+        pointers = set(quad[3].memory_space for quad in quads
+                       if quad[0] == Operations.ADD_LIT and quad[2] in arguments)
+        for quad in quads:
+            if quad[0] == Operations.ASSIGN and quad[1].memory_space in pointers:
+                return True
+            if quad[0] in ARRAY_STORE_OPERATIONS and quad[-1].memory_space in arguments:
+                return True
+        return False
+
+    def is_private_address(self, address: int) -> bool:
+        """ Whether an address belongs to the call, that is a local, temporal or constant address,
+            or the return variable of a method.
+
+            Arguments:
+                - address [int]: The address.
+
+            Returns:
+                - [bool] True if the address does not depend on the state of the program.
+        """
+        if ScopeRanges.is_global(address):
+            return address in self.__return_addresses
+        return not ScopeRanges.is_instance(address)
@@ -0,0 +1,376 @@
+from compilation.bounds_check_eliminator import BoundsCheckEliminator
+from compilation.constant_folder import ConstantFolder, JUMP_OPERATIONS
+from compilation.dead_code_eliminator import DeadCodeEliminator
+from compilation.loop_invariant_mover import LoopInvariantMover
+from compilation.temp_allocator import TempAllocator
+from helpers.operations import Operations
+from helpers.types import Types
+from memory.compilation_memory import CompilationMemory
+from memory.ranges import ScopeRanges
+from scope.symbol_table import SymbolTable
+from scope.variable import Variable
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DerivedVariable(NamedTuple):
+    """ A temporal whose value is a linear function of an induction variable of a loop.
+    """
+    # The address of the induction variable.
+    induction_variable: int
+    # The amount the temporal changes when the induction variable increases by one.
+    factor: int
+    # The temporal that keeps the value across the iterations of the loop.
+    reduced: Variable
+
+
+class StrengthReducer:
+    """ The StrengthReducer replaces the multiplications of the index computations of a method with
+        cheaper quads.
+
+        A PROD_LIT by 1, the one of the last dimension of every access, is a copy, so the quads that
+        read its result read its operand instead and it is removed.
+
+        In a loop, the products of an induction variable, a local integer only increased by constants,
+        are replaced with a temporal that is updated by the stride every time the variable increases.
+        The temporals computed from such a product with an invariant, like the offset of an access
+        m[i][j] in a loop over i, are replaced the same way:
+            - The preheader of the loop computes every reduced temporal from the first value of the
+              induction variable.
+            - After every increase of the induction variable, an ADD updates the reduced temporals the
+              quads outside of the chain read.
+            - The quads of the chain are removed and their readers read the reduced temporals.
+        A chain is only reduced when its results are read before the induction variable increases,
+        and when it removes more quads from the loop than the updates it adds.
+
+        This pass runs before the TempAllocator, while every temporal is written by a single quad.
+
+        The main parts of the StrengthReducer are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __class_directory [SymbolTable]: The classes, whose methods are renumbered.
+            __reduced [int]: The amount of quads removed.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, class_directory: SymbolTable):
+        self.__quads = quads
+        self.__start = start
+        self.__class_directory = class_directory
+        self.__reduced = 0
+
+    @property
+    def reduced(self) -> int:
+        return self.__reduced
+
+    def reduce(self) -> int:
+        """ Removes the products by 1 of the method, then reduces the products of its loops from the
+            innermost loops out.
+
+            Returns:
+                - [int]: The amount of quads removed, without counting the updates added.
+        """
+        self.remove_unit_products()
+        reduced = True
+        while reduced:
+            reduced = False
+            for header, latch in LoopInvariantMover(self.__quads, self.__start, self.__class_directory).loops():
+                if self.reduce_loop(header, latch):
+                    # The loops are found again, the quads after the preheader moved.
+                    reduced = True
+                    break
+
+        logger.debug(f"Reduced {self.__reduced} quads.")
+        return self.__reduced
+
+    def uses_and_definitions(self) -> Tuple[Dict[int, List[int]], Dict[int, List[int]]]:
+        """ Finds the quads of the method that read and write each address.
+
+            Returns:
+                - [Tuple[Dict[int, List[int]], Dict[int, List[int]]]]: The readers and the writers of each address.
+        """
+        uses: Dict[int, List[int]] = {}
+        definitions: Dict[int, List[int]] = {}
+        for ip in range(self.__start, len(self.__quads)):
+            used, defined = TempAllocator.uses_and_definitions(self.__quads[ip])
+            for address in used:
+                uses.setdefault(address, []).append(ip)
+            for address in defined:
+                definitions.setdefault(address, []).append(ip)
+        return uses, definitions
+
+    def remove_unit_products(self):
+        """ Removes the PROD_LIT quads by 1 whose result is read in the same basic block, replacing
+            their result with their operand.
+        """
+        quads = self.__quads
+        uses, definitions = self.uses_and_definitions()
+        leaders = ConstantFolder(quads, self.__start, len(quads)).leaders()
+        removed = set()
+        for ip in range(self.__start, len(quads)):
+            quad = quads[ip]
+            if quad[0] != Operations.PROD_LIT or quad[2] != 1:
+                continue
+            operand, result = quad[1], quad[3].memory_space
+            readers = uses.get(result, [])
+            if (not StrengthReducer.is_scalar(operand) or not readers or definitions.get(result) != [ip]
+                    or min(readers) <= ip):
+                continue
+            last = max(readers)
+            if (any(leader in leaders for leader in range(ip + 1, last + 1))
+                    or any(ip < definition < last for definition in definitions.get(operand.memory_space, []))):
+                continue
+            for reader in readers:
+                quads[reader] = StrengthReducer.replace(quads[reader], {result: operand})
+            removed.add(ip)
+
+        if removed:
+            DeadCodeEliminator(quads, self.__start, self.__class_directory).remove(removed)
+            self.__reduced += len(removed)
+
+    def reduce_loop(self, header: int, latch: int) -> bool:
+        """ Reduces the products of the induction variables of a loop.
+
+            Arguments:
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+
+            Returns:
+                - [bool]: True if the loop changed.
+        """
+        quads = self.__quads
+        uses, definitions = self.uses_and_definitions()
+        written = set()
+        for ip in range(header, latch + 1):
+            written.update(TempAllocator.uses_and_definitions(quads[ip])[1])
+
+        steps: Dict[int, Optional[Dict[int, int]]] = {}
+        derived: Dict[int, DerivedVariable] = {}
+        chain: Dict[int, int] = {}
+        for ip in range(header, latch + 1):
+            candidate = self.derive(quads[ip], header, latch, written, derived, steps, definitions)
+            if candidate is None:
+                continue
+            address, induction_variable, factor = candidate
+            first_increment = min(steps[induction_variable])
+            readers = uses.get(address, [])
+            if (definitions.get(address) != [ip] or not readers or ip >= first_increment
+                    or not all(ip < reader < first_increment for reader in readers)
+                    or self.jumps_back(max(readers), first_increment, header, latch)):
+                continue
+            memory_space = CompilationMemory.next_temp_memory_space(Types.INT)
+            reduced = Variable(memory_space, Types.INT, memory_space)
+            derived[address] = DerivedVariable(induction_variable, factor, reduced)
+            chain[ip] = address
+
+        # The reduced temporals read outside of the chain have to be updated.
+        read = {address for address in derived
+                if any(reader not in chain for reader in uses.get(address, []))}
+        updates: Dict[int, List[Tuple]] = {}
+        for address in sorted(read, key=lambda address: derived[address].reduced.memory_space):
+            variable = derived[address]
+            for increment, step in sorted(steps[variable.induction_variable].items()):
+                if variable.factor * step != 0:
+                    stride = ConstantFolder.constant(variable.factor * step, Types.INT)
+                    updates.setdefault(increment, []).append(
+                        (Operations.ADD, variable.reduced, stride, variable.reduced.memory_space))
+        if not read or sum(map(len, updates.values())) >= len(chain):
+            return False
+
+        renamed = {address: variable.reduced for address, variable in derived.items()}
+        preheader = []
+        for ip, address in chain.items():
+            quad = StrengthReducer.replace(quads[ip], renamed)
+            reduced = derived[address].reduced
+            if quad[0] == Operations.PROD_LIT:
+                preheader.append(quad[:3] + (reduced,))
+            else:
+                preheader.append(quad[:3] + (reduced.memory_space,))
+        for ip in range(header, latch + 1):
+            if ip not in chain:
+                quads[ip] = StrengthReducer.replace(quads[ip], {address: renamed[address] for address in read})
+
+        self.rewrite(header, latch, preheader, updates, set(chain))
+        self.__reduced += len(chain)
+        return True
+
+    def derive(self, quad: Tuple, header: int, latch: int, written: Set[int], derived: Dict[int, DerivedVariable],
+               steps: Dict[int, Optional[Dict[int, int]]],
+               definitions: Dict[int, List[int]]) -> Optional[Tuple[int, int, int]]:
+        """ Whether the result of a quad is a linear function of an induction variable of a loop with a
+            product on its chain.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+                - written [Set[int]]: The addresses written in the loop.
+                - derived [Dict[int, DerivedVariable]]: The temporals already reduced.
+                - steps [Dict[int, Optional[Dict[int, int]]]]: The increments of each induction variable,
+                    filled as the variables are found.
+                - definitions [Dict[int, List[int]]]: The quads that write each address.
+
+            Returns:
+                - [Optional[Tuple[int, int, int]]]: The address of the result, the induction variable and
+                    the factor of the result, or None if the quad cannot be reduced.
+        """
+        op = quad[0]
+        if op == Operations.PROD_LIT:
+            factor = self.factor(quad[1], header, latch, steps, derived, definitions, True)
+            if factor is None:
+                return None
+            return quad[3].memory_space, factor[0], factor[1] * quad[2]
+        if op not in (Operations.PROD, Operations.ADD, Operations.SUBS) or not TempAllocator.is_temp(quad[3]):
+            return None
+
+        for position, other in ((1, 2), (2, 1)):
+            operand, invariant = quad[position], quad[other]
+            if (not StrengthReducer.is_scalar(invariant) or invariant.var_type != Types.INT
+                    or not LoopInvariantMover.is_invariant(invariant, written, set())):
+                continue
+            if op == Operations.PROD:
+                factor = self.factor(operand, header, latch, steps, derived, definitions, True)
+                if factor is not None and ConstantFolder.is_constant(invariant):
+                    return quad[3], factor[0], factor[1] * ConstantFolder.value(invariant)
+            elif operand.memory_space in derived:
+                variable = derived[operand.memory_space]
+                sign = -1 if op == Operations.SUBS and position == 2 else 1
+                return quad[3], variable.induction_variable, sign * variable.factor
+        return None
+
+    def factor(self, operand, header: int, latch: int, steps: Dict[int, Optional[Dict[int, int]]],
+               derived: Dict[int, DerivedVariable], definitions: Dict[int, List[int]],
+               induction: bool) -> Optional[Tuple[int, int]]:
+        """ Gets the induction variable an operand depends on and its factor.
+
+            Arguments:
+                - operand [Variable]: The operand.
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+                - steps [Dict[int, Optional[Dict[int, int]]]]: The increments of each induction variable.
+                - derived [Dict[int, DerivedVariable]]: The temporals already reduced.
+                - definitions [Dict[int, List[int]]]: The quads that write each address.
+                - induction [bool]: Whether the operand may be the induction variable itself.
+
+            Returns:
+                - [Optional[Tuple[int, int]]]: The address of the induction variable and the factor, or
+                    None if the operand does not depend linearly on one.
+        """
+        if not StrengthReducer.is_scalar(operand) or operand.var_type != Types.INT:
+            return None
+        address = operand.memory_space
+        if address in derived:
+            return derived[address].induction_variable, derived[address].factor
+        if not induction or not ScopeRanges.is_local(address):
+            return None
+        if address not in steps:
+            increments = [ip for ip in definitions.get(address, []) if header <= ip <= latch]
+            found = {ip: BoundsCheckEliminator.increment_step(self.__quads, definitions, ip, address)
+                     for ip in increments}
+            steps[address] = found if found and None not in found.values() else None
+        return None if steps[address] is None else (address, 1)
+
+    def jumps_back(self, last_reader: int, first_increment: int, header: int, latch: int) -> bool:
+        """ Whether a jump of a loop goes back over a reader of a reduced temporal from an increment of
+            its induction variable, reaching it without running the quad of the chain again.
+
+            Arguments:
+                - last_reader [int]: The address of the last reader.
+                - first_increment [int]: The address of the first increment of the induction variable.
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+
+            Returns:
+                - [bool]: True if such a jump exists.
+        """
+        for source in range(first_increment, latch + 1):
+            quad = self.__quads[source]
+            if quad[0] in JUMP_OPERATIONS and quad[2] is not None and header < quad[2] <= last_reader:
+                return True
+        return False
+
+    @staticmethod
+    def is_scalar(operand) -> bool:
+        """ Whether an operand is a constant, local or temporal that is not an array nor a pointer.
+
+            Arguments:
+                - operand [Any]: The operand.
+
+            Returns:
+                - [bool] True if the operand holds a single value of the frame.
+        """
+        return (isinstance(operand, Variable) and not operand.is_array_pointer()
+                and not operand.has_multiple_dimensions()
+                and (operand.is_constant() or ScopeRanges.is_local(operand.memory_space)
+                     or TempAllocator.is_temp(operand.memory_space)))
+
+    @staticmethod
+    def replace(quad: Tuple, renamed: Dict[int, Variable]) -> Tuple:
+        """ Replaces the Variables a quad reads.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+                - renamed [Dict[int, Variable]]: The Variable that replaces each address.
+
+            Returns:
+                - [Tuple]: The quad with its operands replaced.
+        """
+        used = set(TempAllocator.uses_and_definitions(quad)[0])
+        replaced = [quad[0]]
+        for operand in quad[1:]:
+            if isinstance(operand, Variable) and operand.memory_space in renamed and operand.memory_space in used:
+                operand = renamed[operand.memory_space]
+            replaced.append(operand)
+        return tuple(replaced)
+
+    def rewrite(self, header: int, latch: int, preheader: List[Tuple], updates: Dict[int, List[Tuple]],
+                removed: Set[int]):
+        """ Inserts the preheader of a loop and the updates after the increments of its induction
+            variables, removes the quads of the chains and renumbers the jump targets and the
+            instruction pointers of the methods.
+
+            Arguments:
+                - header [int]: The first quad of the loop.
+                - latch [int]: The last back edge of the loop.
+                - preheader [List[Tuple]]: The quads to insert before the header.
+                - updates [Dict[int, List[Tuple]]]: The quads to insert after each increment.
+                - removed [Set[int]]: The addresses of the quads to remove.
+        """
+        quads = self.__quads
+        # The new address of every quad, a removed quad continues with the next quad kept or inserted.
+        positions = {}
+        entry = address = self.__start
+        for ip in range(self.__start, len(quads)):
+            if ip == header:
+                entry = address
+                address += len(preheader)
+            positions[ip] = address
+            address += (ip not in removed) + len(updates.get(ip, []))
+        positions[len(quads)] = address
+
+        def renumber(target, inside: bool):
+            if target is None or target < self.__start:
+                return target
+            if target == header and not inside:
+                return entry
+            return positions[target]
+
+        for ip in range(len(quads)):
+            quad = quads[ip]
+            if (quad[0] in JUMP_OPERATIONS or quad[0] == Operations.GOSUB) and len(quad) > 2:
+                target = renumber(quad[2], header <= ip <= latch)
+                if target != quad[2]:
+                    quads[ip] = quad[:2] + (target,) + quad[3:]
+        for class_scope in self.__class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                method_scope.instruction_pointer = renumber(method_scope.instruction_pointer, False)
+
+        rewritten = []
+        for ip in range(self.__start, len(quads)):
+            if ip == header:
+                rewritten.extend(preheader)
+            if ip not in removed:
+                rewritten.append(quads[ip])
+            rewritten.extend(updates.get(ip, []))
+        quads[self.__start:] = rewritten
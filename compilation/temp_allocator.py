@@ -0,0 +1,247 @@
+from helpers.operations import Operations
+from helpers.quads import BINARY_OPERATIONS, RAW_ADDRESS_OPERANDS, quad_variables
+from helpers.types import Types
+from memory.ranges import ScopeRanges, TYPE_RANGE_SIZE, VIRTUAL_TYPE_RANGE_SIZE
+from scope.scopes import Scopes
+from scope.variable import Variable
+from typing import Dict, List, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The types of the temporals, in the order of their address ranges.
+TEMP_TYPES = (Types.INT, Types.FLOAT, Types.BOOL, Types.STRING, Types.OBJECT, Types.ARRAY_POINTER)
+
+
+class TempAllocator:
+    """ The TempAllocator reassigns the temporals of a method to a minimal set of reused slots, the
+        same way a register allocator assigns registers.
+
+        The temporals are handed out by the CompilationMemory without ever being freed, the ones that
+        do not fit in the range of their type get virtual addresses. Once the method ends, a liveness
+        analysis over its quads finds which temporals hold a value at the same time, and each one is
+        given the lowest slot of its type that is not taken by a temporal it interferes with. The quads
+        of the method are rewritten with the new addresses.
+
+        The main parts of the TempAllocator are:
+            __quads [List[Tuple]]: The quads of the program, rewritten in place.
+            __start [int]: The first quad of the method.
+            __end [int]: The quad after the last one of the method.
+            __uses [Dict[int, Set[int]]]: The temporals read by each quad.
+            __definitions [Dict[int, Set[int]]]: The temporals written by each quad.
+    """
+
+    def __init__(self, quads: List[Tuple], start: int, end: int):
+        self.__quads = quads
+        self.__start = start
+        self.__end = end
+        self.__uses: Dict[int, Set[int]] = {}
+        self.__definitions: Dict[int, Set[int]] = {}
+        for ip in range(start, end):
+            used, defined = TempAllocator.uses_and_definitions(quads[ip])
+            self.__uses[ip] = {address for address in used if TempAllocator.is_temp(address)}
+            self.__definitions[ip] = {address for address in defined if TempAllocator.is_temp(address)}
+
+    def allocate(self) -> Tuple[int, int, int, int, int, int]:
+        """ Reassigns the temporals of the method and rewrites its quads.
+
+            Returns:
+                - [(int, int, int, int, int, int)]: The amount of temporals of each type the method needs.
+
+            Raises:
+                - Exception: If the temporals alive at the same time do not fit in the range of their type.
+        """
+        slots = TempAllocator.assign_slots(self.interference(*self.liveness()))
+
+        memory_needed = [0] * len(TEMP_TYPES)
+        addresses = {}
+        for address, slot in slots.items():
+            type_index = TempAllocator.type_index(address)
+            if slot >= TYPE_RANGE_SIZE:
+                raise Exception(f"Too many variables for {Scopes.TEMP} {TEMP_TYPES[type_index]} memory.")
+            memory_needed[type_index] = max(memory_needed[type_index], slot + 1)
+            addresses[address] = ScopeRanges.TEMP.inf + type_index * TYPE_RANGE_SIZE + slot
+
+        self.rewrite(addresses)
+        logger.debug(f"Allocated {len(slots)} temporals in {sum(memory_needed)} slots.")
+        return tuple(memory_needed)
+
+    @staticmethod
+    def is_temp(address) -> bool:
+        """ Whether an operand is the address of a temporal, virtual or not.
+
+            Arguments:
+                - address [Any]: The operand.
+
+            Returns:
+                - [bool] True if it is the address of a temporal.
+        """
+        return isinstance(address, int) and (ScopeRanges.is_temp(address) or ScopeRanges.is_virtual_temp(address))
+
+    @staticmethod
+    def type_index(address: int) -> int:
+        """ Gets the index of the type of a temporal in TEMP_TYPES.
+
+            Arguments:
+                - address [int]: The address of the temporal.
+
+            Returns:
+                - [int] The index of its type.
+        """
+        if ScopeRanges.is_temp(address):
+            return (address - ScopeRanges.TEMP.inf) // TYPE_RANGE_SIZE
+        return (address - ScopeRanges.VIRTUAL_TEMP.inf) // VIRTUAL_TYPE_RANGE_SIZE
+
+    @staticmethod
+    def uses_and_definitions(quad: Tuple) -> Tuple[List, List]:
+        """ Splits the addresses of a quad in the ones it reads and the ones it writes.
+
+            Arguments:
+                - quad [Tuple]: The quad.
+
+            Returns:
+                - [Tuple[List[int], List[int]]]: The addresses used and the addresses defined.
+        """
+        op = quad[0]
+        if op in BINARY_OPERATIONS:
+            return [quad[1].memory_space, quad[2].memory_space], [quad[3]]
+        if op == Operations.NOT:
+            return [quad[1].memory_space], [quad[2]]
+        if op == Operations.PROD_LIT:
+            return [quad[1].memory_space], [quad[3].memory_space]
+        if op == Operations.ADD_LIT:
+            return [quad[1].memory_space, quad[2]], [quad[3].memory_space]
+        if op == Operations.RES_POINTER:
+            return [quad[1].memory_space], [quad[2].memory_space]
+        if op == Operations.READ:
+            return [], [quad[1].memory_space]
+        if op in (Operations.SUM, Operations.DOT):
+            return [variable.memory_space for variable in quad[1:-1]], [quad[-1].memory_space]
+        # A PARAM writes an argument in the frame of the method called.
+        if op == Operations.PARAM:
+            return [quad[1].memory_space], []
+        # An ASSIGN to an array pointer writes the element it points to, so it reads the pointer.
+        if op == Operations.ASSIGN and not quad[1].is_array_pointer():
+            return [quad[2].memory_space], [quad[1].memory_space]
+        return [variable.memory_space for variable in quad_variables(quad)], []
+
+    def successors(self, ip: int) -> List[int]:
+        """ The quads of the method that can run after a quad.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+
+            Returns:
+                - [List[int]]: The addresses of the next quads.
+        """
+        quad = self.__quads[ip]
+        op = quad[0]
+        if op in (Operations.RETURN, Operations.END_FUNC):
+            following = []
+        elif op == Operations.GOTO:
+            following = [quad[2]]
+        elif op in (Operations.GOTOF, Operations.GOTOT):
+            following = [quad[2], ip + 1]
+        else:
+            following = [ip + 1]
+        return [next_ip for next_ip in following if next_ip is not None and self.__start <= next_ip < self.__end]
+
+    def liveness(self) -> Tuple[Dict[int, Set[int]], Dict[int, Set[int]]]:
+        """ Computes the temporals that are alive before and after every quad of the method, that is
+            the ones whose value can still be read.
+
+            Returns:
+                - [Tuple[Dict[int, Set[int]], Dict[int, Set[int]]]]: The temporals alive before and after each quad.
+        """
+        live_in = {ip: set() for ip in range(self.__start, self.__end)}
+        live_out = {ip: set() for ip in range(self.__start, self.__end)}
+        changed = True
+        while changed:
+            changed = False
+            for ip in reversed(range(self.__start, self.__end)):
+                out = set()
+                for next_ip in self.successors(ip):
+                    out |= live_in[next_ip]
+                alive = self.__uses[ip] | (out - self.__definitions[ip])
+                if out != live_out[ip] or alive != live_in[ip]:
+                    live_out[ip], live_in[ip] = out, alive
+                    changed = True
+        return live_in, live_out
+
+    def interference(self, live_in: Dict[int, Set[int]], live_out: Dict[int, Set[int]]) -> Dict[int, Set[int]]:
+        """ Builds the interference graph of the temporals, two temporals interfere when one of them is
+            written while the other one is alive, so they cannot share a slot.
+
+            Arguments:
+                - live_in [Dict[int, Set[int]]]: The temporals alive before each quad.
+                - live_out [Dict[int, Set[int]]]: The temporals alive after each quad.
+
+            Returns:
+                - [Dict[int, Set[int]]]: The temporals each temporal interferes with, in order of appearance.
+        """
+        graph: Dict[int, Set[int]] = {}
+        for ip in range(self.__start, self.__end):
+            for address in sorted(self.__uses[ip]) + sorted(self.__definitions[ip]):
+                graph.setdefault(address, set())
+
+        for ip, defined in self.__definitions.items():
+            for address in defined:
+                for alive in live_out[ip]:
+                    if alive != address:
+                        graph[address].add(alive)
+                        graph[alive].add(address)
+        # The temporals read before being written hold their values from the start of the method.
+        live_at_start = live_in.get(self.__start, set())
+        for address in live_at_start:
+            graph[address] |= live_at_start - {address}
+        return graph
+
+    @staticmethod
+    def assign_slots(graph: Dict[int, Set[int]]) -> Dict[int, int]:
+        """ Gives each temporal the lowest slot of its type not taken by the temporals it interferes with.
+
+            Arguments:
+                - graph [Dict[int, Set[int]]]: The interference graph.
+
+            Returns:
+                - [Dict[int, int]]: The slot of every temporal.
+        """
+        slots = {}
+        for address, neighbours in graph.items():
+            type_index = TempAllocator.type_index(address)
+            taken = {slots[neighbour] for neighbour in neighbours
+                     if neighbour in slots and TempAllocator.type_index(neighbour) == type_index}
+            slot = 0
+            while slot in taken:
+                slot += 1
+            slots[address] = slot
+        return slots
+
+    def rewrite(self, addresses: Dict[int, int]):
+        """ Replaces the temporals of the quads of the method with their new addresses.
+
+            Arguments:
+                - addresses [Dict[int, int]]: The new address of every temporal.
+        """
+        variables: Dict[int, Variable] = {}
+
+        def replace(operand):
+            if isinstance(operand, Variable) and operand.memory_space in addresses:
+                if operand.memory_space not in variables:
+                    address = addresses[operand.memory_space]
+                    if operand.is_array_pointer():
+                        variable = Variable(address, Types.ARRAY_POINTER, address)
+                        variable.pointer_type = operand.pointer_type
+                    else:
+                        variable = Variable(address, operand.var_type, address)
+                    variables[operand.memory_space] = variable
+                return variables[operand.memory_space]
+            return operand
+
+        for ip in range(self.__start, self.__end):
+            quad = self.__quads[ip]
+            rewritten = [quad[0]] + [replace(operand) for operand in quad[1:]]
+            position = RAW_ADDRESS_OPERANDS.get(quad[0])
+            if position is not None and position < len(quad) and quad[position] in addresses:
+                rewritten[position] = addresses[quad[position]]
+            self.__quads[ip] = tuple(rewritten)
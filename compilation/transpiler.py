@@ -0,0 +1,665 @@
+from helpers import array_operations
+from helpers.operations import Operations
+from helpers.types import Types
+from memory.compilation_memory import CompilationMemory
+from memory.ranges import ScopeRanges
+from scope.method_scope import MethodScope
+from scope.variable import Variable
+from .compiler import Compiler
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import logging
+import sys
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+# The deepest recursion the generated functions can reach, the virtual machines keep their frames
+# in the RegisterFile instead of the Python stack.
+RECURSION_LIMIT = 200000
+
+# The stack size of the thread that runs the program, so RECURSION_LIMIT nested calls fit in it.
+STACK_SIZE = 512 * 1024 * 1024
+
+
+class UnstructuredFlow(Exception):
+    """ Raised when the jumps of a method cannot be rebuilt into while/if statements. """
+
+
+class Transpiler:
+    """ The Transpiler is an ahead of time backend that translates a whole compiled Otter program
+        into Python source, compiles it with compile() and runs it.
+
+        Every MethodScope becomes a Python function that receives the instance it is called on and
+        its arguments, keeps its locals and temporals in Python local variables and has its
+        GOTO/GOTOF/GOTOT structure rebuilt into native while/if statements. Methods whose jumps do not
+        follow the shapes generated by the Interpreter are emitted as a dispatch loop over their basic
+        blocks instead. Globals are module level variables, instances are dictionaries keyed by the
+        address of their attributes and arrays are Python lists, the built-in operations on them are
+        list comprehensions or calls to helpers.array_operations. Every instance also keeps the method
+        table of its class under the "vtable" key, the calls to overridden methods look the function
+        up there. The recursive methods are native recursive functions, so the program runs with a
+        raised recursion limit, see run_deep.
+
+        The main parts of the Transpiler are:
+            __quads [List[Tuple]]: The quads of the program.
+            __methods [Dict[int, Tuple[str, MethodScope, str]]]: Maps the instruction pointer of every
+                method to its function name, its MethodScope and the name of its class.
+            __source [str]: The generated Python source.
+    """
+
+    ENTRY_POINT = "otter_main"
+
+    def __init__(self, quads: List):
+        self.__quads = quads
+        self.__methods = Transpiler.collect_methods()
+        self.__source = self.translate()
+
+    @property
+    def source(self) -> str:
+        """ The Python source generated for the program.
+
+            Returns:
+                - [str]: The source.
+        """
+        return self.__source
+
+    @staticmethod
+    def collect_methods() -> Dict[int, Tuple[str, MethodScope, str]]:
+        """ Collects every method declared in the program.
+
+            Returns:
+                - [Dict[int, Tuple[str, MethodScope, str]]]: The function name, MethodScope and class
+                    name of each method, keyed by the instruction pointer of the method.
+        """
+        methods = {}
+        for class_name, class_scope in Compiler._class_directory.symbols.items():
+            for method_name, method_scope in class_scope.method_directory.symbols.items():
+                methods[method_scope.instruction_pointer] = (f"{class_name}__{method_name}", method_scope, class_name)
+        return methods
+
+    @staticmethod
+    def instance_fields(class_name: str) -> Tuple[int, ...]:
+        """ Collects the addresses of the attributes of a class, including the inherited ones.
+
+            Arguments:
+                - class_name [str]: The name of the class.
+
+            Returns:
+                - [Tuple[int, ...]]: The addresses of the attributes.
+        """
+        fields = set()
+        directory = Compiler._class_directory.search(class_name).attribute_directory
+        while directory is not None:
+            fields.update(variable.memory_space for variable in directory.symbols.values()
+                          if ScopeRanges.is_instance(variable.memory_space))
+            directory = directory.parent
+        return tuple(sorted(fields))
+
+    def method_table(self, class_name: str) -> str:
+        """ Builds the table of the overridden methods an instance of a class runs.
+
+            Arguments:
+                - class_name [str]: The name of the class.
+
+            Returns:
+                - [str]: The Python dictionary from the name of every overridden method to its function.
+        """
+        entries = []
+        for method_name, method_scope in Compiler._class_directory.search(class_name).method_table.items():
+            if method_scope.overridden or method_scope.overrides is not None:
+                entries.append(f"{method_name!r}: {self.__methods[method_scope.instruction_pointer][0]}")
+        return f"{{{', '.join(entries)}}}"
+
+    def translate(self) -> str:
+        """ Translates the whole program.
+
+            Returns:
+                - [str]: The Python source of the program.
+        """
+        quads = self.__quads
+        functions = []
+        global_names = set()
+
+        entries = sorted(self.__methods)
+        for entry in entries:
+            name, method_scope, _ = self.__methods[entry]
+            end = entry
+            while quads[end][0] != Operations.END_FUNC:
+                end += 1
+            translator = FunctionTranslator(quads, entry, end, method_scope, self.__methods, global_names)
+            functions.extend(translator.translate(name))
+
+        # The code before the GOTO to Main initializes the globals, then Main is constructed.
+        global_end = entries[0] - 1 if entries else len(quads)
+        main_entry = quads[global_end][2] if global_end < len(quads) else None
+        translator = FunctionTranslator(quads, 0, global_end, Compiler._global_scope, self.__methods, global_names)
+        functions.extend(translator.translate(Transpiler.ENTRY_POINT, main_entry))
+
+        lines = ["# Generated from the quads of an Otter program."]
+        arrays = set()
+        for variable in Compiler._global_scope.variables_directory.symbols.values():
+            if variable.has_multiple_dimensions():
+                arrays.add(f"g{variable.memory_space}")
+                lines.append(f"g{variable.memory_space} = [None] * {variable.size}")
+        for name in sorted(global_names - arrays):
+            lines.append(f"{name} = None")
+        for class_name in Compiler._class_directory.symbols:
+            lines.append(f"FIELDS_{class_name} = {Transpiler.instance_fields(class_name)!r}")
+        lines.extend(functions)
+
+        # The instances are copies of the instance of their class, created once the functions exist.
+        lines.append("")
+        for class_name in Compiler._class_directory.symbols:
+            lines.append(f"INSTANCE_{class_name} = {{**dict.fromkeys(FIELDS_{class_name}), "
+                         f"'vtable': {self.method_table(class_name)}}}")
+
+        source = "\n".join(lines) + "\n"
+        logger.debug(source)
+        return source
+
+    def run(self):
+        """ Compiles the generated source and runs the program.
+        """
+        code = compile(self.__source, "<otter>", "exec")
+        namespace = {"segmentation_fault": segmentation_fault, "parse": Types.parse,
+                     "matmul": array_operations.matmul, "dot": array_operations.dot}
+        exec(code, namespace)
+        run_deep(namespace[Transpiler.ENTRY_POINT])
+
+
+def run_deep(function: Callable[[], Any]):
+    """ Calls a function with room for RECURSION_LIMIT nested calls. The function runs in a thread
+        with a stack of STACK_SIZE, the recursion limit and the stack size are restored afterwards.
+
+        Arguments:
+            - function [Callable[[], Any]]: The function.
+
+        Raises:
+            - Exception: The error raised by the function, if any.
+    """
+    errors = []
+
+    def target():
+        try:
+            function()
+        except BaseException as error:
+            errors.append(error)
+
+    recursion_limit = sys.getrecursionlimit()
+    stack_size = threading.stack_size(STACK_SIZE)
+    sys.setrecursionlimit(max(recursion_limit, RECURSION_LIMIT))
+    try:
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+        threading.stack_size(stack_size)
+    if errors:
+        raise errors[0]
+
+
+def segmentation_fault(index, lower_bound, upper_bound):
+    """ Raises the error of an out of bounds access to a dimensional variable. """
+    raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+
+
+class FunctionTranslator:
+    """ The FunctionTranslator translates the quads of a single method into a Python function.
+
+        The main parts of the FunctionTranslator are:
+            __quads [List[Tuple]]: The quads of the program.
+            __start [int]: The first quad of the method.
+            __end [int]: The END_FUNC quad of the method (exclusive).
+            __scope [MethodScope]: The scope of the method.
+            __methods [Dict]: Every method of the program keyed by its instruction pointer.
+            __arrays [Dict[int, str]]: The name of the list of each dimensional variable by base address.
+            __pointers [Dict[int, Optional[str]]]: The array each array pointer points to, None when
+                the pointer is used for more than one array.
+            __globals [Set[str]]: The globals assigned by the function.
+            __global_names [Set[str]]: The globals used by any function of the program.
+            __calls [List[int]]: The ERA quads whose GOSUB has not been translated yet.
+            __parameters [Dict[int, Set[int]]]: The addresses of the arguments set by each pending call.
+            __tail_calls [Set[int]]: The GOSUB quads that call the method itself in tail position.
+    """
+
+    INDENT = "    "
+
+    def __init__(self, quads: List, start: int, end: int, scope: MethodScope, methods: Dict, global_names: Set[str]):
+        self.__quads = quads
+        self.__global_names = global_names
+        self.__start = start
+        self.__end = end
+        self.__scope = scope
+        self.__methods = methods
+        self.__globals = set()
+        self.__calls = []
+        self.__parameters = {}
+        self.__const_memory = CompilationMemory.get_const_memory()
+
+        self.__arrays = {}
+        for variable in Compiler._global_scope.variables_directory.symbols.values():
+            if variable.has_multiple_dimensions():
+                self.__arrays[variable.memory_space] = f"g{variable.memory_space}"
+        for variable in self.local_variables():
+            if variable.has_multiple_dimensions():
+                self.__arrays[variable.memory_space] = f"l{variable.memory_space}"
+
+        self.__pointers = {}
+        for quad in quads[start:end]:
+            if quad[0] == Operations.ADD_LIT:
+                array = self.__arrays[quad[2]]
+                pointer = quad[3].memory_space
+                if self.__pointers.get(pointer, array) != array:
+                    array = None
+                self.__pointers[pointer] = array
+
+        self.__tail_calls = set(i for i in range(start, end) if self.is_tail_call(i))
+
+    def is_tail_call(self, i: int) -> bool:
+        """ Whether a quad is a GOSUB to the method itself whose result is directly returned.
+
+            Arguments:
+                - i [int]: The index of the quad.
+
+            Returns:
+                - [bool]: True if the quad is a tail recursive call. False otherwise.
+        """
+        quads = self.__quads
+        # A call to an overridden method can run the method of a subclass.
+        if quads[i][0] != Operations.GOSUB or quads[i][2] != self.__start or self.__scope.overridden:
+            return False
+        if quads[i + 1] == (Operations.RETURN,):
+            return True
+        if [quad[0] for quad in quads[i + 1:i + 4]] != [Operations.ASSIGN, Operations.ASSIGN, Operations.RETURN]:
+            return False
+        load, store, ret = quads[i + 1:i + 4]
+        return (len(ret) == 1 and load[1].memory_space == store[2].memory_space
+                and load[2].memory_space == store[1].memory_space and not load[1].is_array_pointer())
+
+    def local_variables(self) -> List[Variable]:
+        """ The arguments and local variables of the method.
+
+            Returns:
+                - [List[Variable]]: The variables that live in the memory of the method.
+        """
+        if self.__scope is Compiler._global_scope:
+            return []
+        variables = list(self.__scope.ordered_arguments)
+        variables.extend(self.__scope.variables_directory.symbols.values())
+        return variables
+
+    def translate(self, name: str, main_entry: Optional[int] = None) -> List[str]:
+        """ Translates the method into a function definition.
+
+            Arguments:
+                - name [str]: The name of the function.
+                - main_entry [int]: Only for the global code. The instruction pointer of the Main constructor.
+
+            Returns:
+                - [List[str]]: The lines of the function.
+        """
+        body = None
+        if self.__tail_calls:
+            # A tail recursive call jumps back to the start of the dispatch loop.
+            logger.debug(f"Using a dispatch loop for {name}: tail recursive calls")
+        else:
+            try:
+                body = self.structure(self.__start, self.__end, None, 1)
+            except UnstructuredFlow as error:
+                logger.debug(f"Using a dispatch loop for {name}: {error}")
+                self.__globals = set()
+                self.__calls = []
+        if body is None:
+            body = self.dispatch(1)
+
+        if main_entry is not None:
+            main_name = self.__methods[main_entry][0]
+            body.append(f"{self.INDENT}{main_name}(dict(INSTANCE_Main))")
+
+        if self.__scope is Compiler._global_scope:
+            parameters = []
+        else:
+            parameters = ["this"] + [f"l{variable.memory_space}" for variable in self.__scope.ordered_arguments]
+        lines = ["", f"def {name}({', '.join(parameters)}):"]
+        if self.__globals:
+            lines.append(f"{self.INDENT}global {', '.join(sorted(self.__globals))}")
+
+        lines.extend(f"{self.INDENT}{declaration}" for declaration in self.local_declarations())
+        lines.extend(body)
+        lines.append(f"{self.INDENT}return")
+        return lines
+
+    def local_declarations(self) -> List[str]:
+        """ The statements that initialize the local variables of the method that are not arguments.
+
+            Returns:
+                - [List[str]]: The statements.
+        """
+        arguments = set(variable.memory_space for variable in self.__scope.ordered_arguments)
+        declarations = []
+        scalars = []
+        for variable in self.local_variables():
+            if variable.memory_space in arguments:
+                continue
+            if variable.has_multiple_dimensions():
+                declarations.append(f"l{variable.memory_space} = [None] * {variable.size}")
+            else:
+                scalars.append(f"l{variable.memory_space}")
+        if scalars:
+            declarations.append(f"{' = '.join(scalars)} = None")
+        return declarations
+
+    def structure(self, low: int, high: int, loop: Optional[Tuple[int, int]], depth: int) -> List[str]:
+        """ Rebuilds the quads in [low, high) into structured statements.
+
+            Arguments:
+                - low [int]: The first quad.
+                - high [int]: The quad after the last one.
+                - loop [Tuple[int, int]]: The header and the exit of the innermost loop, if any.
+                - depth [int]: The indentation level.
+
+            Returns:
+                - [List[str]]: The lines of the statements.
+
+            Raises:
+                - UnstructuredFlow: When a jump does not match a while/if shape.
+        """
+        quads = self.__quads
+        indent = self.INDENT * depth
+        lines = []
+        i = low
+        while i < high:
+            back_edges = [j for j in range(i + 1, high)
+                          if quads[j][0] == Operations.GOTO and len(quads[j]) > 2 and quads[j][2] == i]
+            if back_edges and (loop is None or loop[0] != i):
+                # Loop from i to the last GOTO back to it.
+                latch = back_edges[-1]
+                lines.append(f"{indent}while True:")
+                lines.extend(self.structure(i, latch, (i, latch + 1), depth + 1))
+                i = latch + 1
+                continue
+
+            quad = quads[i]
+            op = quad[0]
+            if op == Operations.GOTO:
+                target = quad[2] if len(quad) > 2 else None
+                if loop is not None and target == loop[1]:
+                    lines.append(f"{indent}break")
+                elif loop is not None and target == loop[0]:
+                    lines.append(f"{indent}continue")
+                elif target != high or i != high - 1:
+                    raise UnstructuredFlow(f"GOTO {target} at {i}")
+                i += 1
+            elif op in (Operations.GOTOF, Operations.GOTOT):
+                condition = self.rvalue(quad[1])
+                test = f"not {condition}" if op == Operations.GOTOF else condition
+                target = quad[2]
+                if loop is not None and target == loop[1]:
+                    lines.append(f"{indent}if {test}:")
+                    lines.append(f"{indent}{self.INDENT}break")
+                    i += 1
+                    continue
+                if target is None or not i < target <= high:
+                    raise UnstructuredFlow(f"{op.value} {target} at {i}")
+
+                inverse = condition if op == Operations.GOTOF else f"not {condition}"
+                jump = quads[target - 1]
+                if (target - 1 > i and jump[0] == Operations.GOTO and len(jump) > 2
+                        and target < jump[2] <= high):
+                    lines.append(f"{indent}if {inverse}:")
+                    lines.extend(self.structure(i + 1, target - 1, loop, depth + 1) or [f"{indent}{self.INDENT}pass"])
+                    lines.append(f"{indent}else:")
+                    lines.extend(self.structure(target, jump[2], loop, depth + 1) or [f"{indent}{self.INDENT}pass"])
+                    i = jump[2]
+                else:
+                    lines.append(f"{indent}if {inverse}:")
+                    lines.extend(self.structure(i + 1, target, loop, depth + 1) or [f"{indent}{self.INDENT}pass"])
+                    i = target
+            else:
+                lines.extend(f"{indent}{statement}" for statement in self.statement(i))
+                i += 1
+        return lines
+
+    def dispatch(self, depth: int) -> List[str]:
+        """ Translates the method into a loop that dispatches on the leader of each basic block.
+            Used when the jumps of the method cannot be rebuilt into while/if statements.
+
+            Arguments:
+                - depth [int]: The indentation level.
+
+            Returns:
+                - [List[str]]: The lines of the loop.
+        """
+        quads = self.__quads
+        leaders = {self.__start}
+        for i in range(self.__start, self.__end):
+            op = quads[i][0]
+            if op in (Operations.GOTO, Operations.GOTOF, Operations.GOTOT):
+                if len(quads[i]) > 2 and quads[i][2] is not None:
+                    leaders.add(quads[i][2])
+                leaders.add(i + 1)
+        leaders = sorted(leader for leader in leaders if self.__start <= leader <= self.__end)
+
+        indent = self.INDENT * depth
+        body = self.INDENT * (depth + 2)
+        lines = [f"{indent}pc = {self.__start}", f"{indent}while True:"]
+        for index, leader in enumerate(leaders):
+            if leader == self.__end:
+                lines.append(f"{indent}{self.INDENT}elif pc == {leader}:")
+                lines.append(f"{body}return")
+                continue
+            block_end = leaders[index + 1] if index + 1 < len(leaders) else self.__end
+            keyword = "if" if index == 0 else "elif"
+            lines.append(f"{indent}{self.INDENT}{keyword} pc == {leader}:")
+            for i in range(leader, block_end):
+                quad = quads[i]
+                op = quad[0]
+                target = quad[2] if len(quad) > 2 else None
+                if op == Operations.GOTO:
+                    lines.append(f"{body}pc = {target}")
+                    lines.append(f"{body}continue")
+                elif op in (Operations.GOTOF, Operations.GOTOT):
+                    condition = self.rvalue(quad[1])
+                    test = f"not {condition}" if op == Operations.GOTOF else condition
+                    lines.append(f"{body}if {test}:")
+                    lines.append(f"{body}{self.INDENT}pc = {target}")
+                    lines.append(f"{body}{self.INDENT}continue")
+                elif i in self.__tail_calls:
+                    lines.extend(f"{body}{statement}" for statement in self.tail_call(i))
+                else:
+                    lines.extend(f"{body}{statement}" for statement in self.statement(i))
+            lines.append(f"{body}pc = {block_end}")
+        lines.append(f"{indent}{self.INDENT}else:")
+        lines.append(f"{indent}{self.INDENT * 2}raise IndexError(f'Invalid instruction pointer {{pc}}.')")
+        return lines
+
+    def tail_call(self, i: int) -> List[str]:
+        """ Translates a tail recursive GOSUB into a jump to the start of the method, with the
+            arguments and the instance of the call. Only used by the dispatch loop.
+
+            Arguments:
+                - i [int]: The index of the GOSUB quad.
+
+            Returns:
+                - [List[str]]: The Python statements of the call.
+        """
+        call = self.__calls.pop()
+        statements = [f"this = c{call}"]
+        for variable in self.__scope.ordered_arguments:
+            if variable.memory_space in self.__parameters[call]:
+                statements.append(f"l{variable.memory_space} = p{call}_{variable.memory_space}")
+            else:
+                statements.append(f"l{variable.memory_space} = None")
+        statements.extend(self.local_declarations())
+        statements.extend([f"pc = {self.__start}", "continue"])
+        return statements
+
+    def name(self, address: int) -> str:
+        """ The Python expression that holds the value of an address.
+
+            Arguments:
+                - address [int]: The address.
+
+            Returns:
+                - [str]: The expression.
+        """
+        if ScopeRanges.is_const(address):
+            return repr(self.__const_memory.get_value_from_address(address))
+        if ScopeRanges.is_local(address):
+            return f"l{address}"
+        if ScopeRanges.is_temp(address):
+            return f"t{address}"
+        if ScopeRanges.is_instance(address):
+            return f"this[{address}]"
+        self.__global_names.add(f"g{address}")
+        return f"g{address}"
+
+    def target(self, address: int) -> str:
+        """ The Python expression to assign a value to an address.
+
+            Arguments:
+                - address [int]: The address.
+
+            Returns:
+                - [str]: The expression.
+        """
+        name = self.name(address)
+        if ScopeRanges.is_global(address):
+            self.__globals.add(name)
+        return name
+
+    def rvalue(self, variable: Variable) -> str:
+        """ The Python expression that reads a variable, dereferencing array pointers. """
+        if variable.is_array_pointer():
+            return self.dereference(variable.memory_space)
+        return self.name(variable.memory_space)
+
+    def lvalue(self, variable: Variable) -> str:
+        """ The Python expression that writes a variable, dereferencing array pointers. """
+        if variable.is_array_pointer():
+            return self.dereference(variable.memory_space)
+        return self.target(variable.memory_space)
+
+    def dereference(self, pointer: int) -> str:
+        """ The Python expression of the array element an array pointer points to. """
+        array = self.__pointers.get(pointer)
+        if array is None:
+            return f"t{pointer}[0][t{pointer}[1]]"
+        return f"{array}[t{pointer}]"
+
+    def statement(self, i: int) -> List[str]:
+        """ Translates a quad that does not jump.
+
+            Arguments:
+                - i [int]: The index of the quad.
+
+            Returns:
+                - [List[str]]: The Python statements of the quad.
+        """
+        quad = self.__quads[i]
+        op = quad[0]
+
+        if op == Operations.ASSIGN:
+            return [f"{self.lvalue(quad[1])} = {self.rvalue(quad[2])}"]
+        if op in BINARY_OPERATORS:
+            return [f"{self.target(quad[3])} = {self.rvalue(quad[1])} {BINARY_OPERATORS[op]} {self.rvalue(quad[2])}"]
+        if op == Operations.NOT:
+            return [f"{self.target(quad[2])} = not {self.rvalue(quad[1])}"]
+        if op == Operations.VER_ACCS:
+            index = self.rvalue(quad[1])
+            return [f"if not {quad[2]} <= {index} < {quad[3]}:",
+                    f"{self.INDENT}segmentation_fault({index}, {quad[2]}, {quad[3]})"]
+        if op == Operations.PROD_LIT:
+            return [f"{self.target(quad[3].memory_space)} = {self.rvalue(quad[1])} * {quad[2]}"]
+        if op == Operations.ADD_LIT:
+            pointer = quad[3].memory_space
+            if self.__pointers[pointer] is None:
+                return [f"t{pointer} = ({self.__arrays[quad[2]]}, {self.rvalue(quad[1])})"]
+            return [f"t{pointer} = {self.rvalue(quad[1])}"]
+        if op == Operations.RES_POINTER:
+            return [f"{self.target(quad[2].memory_space)} = {self.rvalue(quad[1])}"]
+        if op == Operations.FILL:
+            array = self.__arrays[quad[2].memory_space]
+            return [f"{array}[:] = [{self.rvalue(quad[1])}] * {quad[2].size}"]
+        if op == Operations.COPY:
+            return [f"{self.__arrays[quad[2].memory_space]}[:] = {self.__arrays[quad[1].memory_space]}"]
+        if op in ELEMENTWISE_OPERATORS:
+            left, right = self.__arrays[quad[1].memory_space], self.__arrays[quad[2].memory_space]
+            return [f"{self.__arrays[quad[3].memory_space]}[:] = "
+                    f"[x {ELEMENTWISE_OPERATORS[op]} y for x, y in zip({left}, {right})]"]
+        if op == Operations.MATMUL:
+            (rows, inner), columns = quad[1].dimensions, quad[2].dimensions[1]
+            left, right = self.__arrays[quad[1].memory_space], self.__arrays[quad[2].memory_space]
+            return [f"{self.__arrays[quad[3].memory_space]}[:] = matmul({left}, {right}, {rows}, {inner}, {columns})"]
+        if op == Operations.SUM:
+            return [f"{self.target(quad[2].memory_space)} = sum({self.__arrays[quad[1].memory_space]})"]
+        if op == Operations.DOT:
+            left, right = self.__arrays[quad[1].memory_space], self.__arrays[quad[2].memory_space]
+            return [f"{self.target(quad[3].memory_space)} = dot({left}, {right})"]
+        if op == Operations.WRITE:
+            return [f"print({self.rvalue(quad[1])})"]
+        if op == Operations.READ:
+            return [f"{self.target(quad[1].memory_space)} = parse(input(), {quad[1].var_type!r})"]
+        if op == Operations.ERA:
+            self.__calls.append(i)
+            self.__parameters[i] = set()
+            if quad[1] == "constructor":
+                instance = f"dict(INSTANCE_{quad[2]})"
+            elif quad[1] == "self":
+                instance = "this"
+            else:
+                instance = self.rvalue(quad[1])
+            return [f"c{i} = {instance}"]
+        if op == Operations.PARAM:
+            call = self.__calls[-1]
+            self.__parameters[call].add(quad[2].memory_space)
+            if quad[1].has_multiple_dimensions():
+                value = self.__arrays[quad[1].memory_space]
+            else:
+                value = self.rvalue(quad[1])
+            return [f"p{call}_{quad[2].memory_space} = {value}"]
+        if op == Operations.GOSUB:
+            call = self.__calls.pop()
+            name, method_scope, _ = self.__methods[quad[2]]
+            arguments = [f"c{call}"]
+            for variable in method_scope.ordered_arguments:
+                if variable.memory_space in self.__parameters[call]:
+                    arguments.append(f"p{call}_{variable.memory_space}")
+                else:
+                    arguments.append("None")
+            if method_scope.overridden:
+                return [f"c{call}['vtable'][{quad[1]!r}]({', '.join(arguments)})"]
+            return [f"{name}({', '.join(arguments)})"]
+        if op == Operations.RETURN:
+            if len(quad) > 1 and quad[1] == "constructor":
+                return [f"{self.target(quad[2].memory_space)} = this", "return"]
+            return ["return"]
+        if op == Operations.END_FUNC:
+            return ["return"]
+
+        raise NotImplementedError(f"Operation {op} cannot be transpiled.")
+
+
+BINARY_OPERATORS = {
+    Operations.ADD: "+",
+    Operations.SUBS: "-",
+    Operations.PROD: "*",
+    Operations.DIV: "/",
+    Operations.AND: "and",
+    Operations.OR: "or",
+    Operations.EQUAL: "==",
+    Operations.NOT_EQUAL: "!=",
+    Operations.GREATER: ">",
+    Operations.GREATER_EQUAL_THAN: ">=",
+    Operations.LESS: "<",
+    Operations.LESS_EQUAL_THAN: "<=",
+}
+
+ELEMENTWISE_OPERATORS = {
+    Operations.ARRAY_ADD: "+",
+    Operations.ARRAY_SUBS: "-",
+    Operations.ARRAY_PROD: "*",
+    Operations.ARRAY_DIV: "/",
+}
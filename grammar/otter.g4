@@ -124,7 +124,8 @@ statements:
     | returnStatement
     | readIO
     | writeIO
-    | methodCall;
+    | methodCall
+    | arrayStatement;
 
 conditional:
     IF OPEN_PAR expression CLOSE_PAR {Compiler.start_condition_quad()} block (
@@ -145,6 +146,11 @@ writeIO:
 
 readIO: READ OPEN_PAR CLOSE_PAR {Compiler.read_quad()} SEMICOLON?;
 
+arrayOperation:
+    {Compiler.open_par()} name=ID OPEN_PAR {Compiler.start_array_operation($name.text)} term {Compiler.add_array_argument()} (COMMA term {Compiler.add_array_argument()})* CLOSE_PAR {Compiler.close_par()};
+
+arrayStatement: arrayOperation {Compiler.complete_array_operation(False)} SEMICOLON;
+
 listAssigment:
     LET name=ID COLON var_type=otterType {Compiler.add_variable($name.text, $var_type.text)} (OPEN_SQUARE size=INT_PRIMITIVE CLOSE_SQUARE {Compiler.add_dimension($name.text, $size.text)})+ {Compiler.populate_dimension_attributes($name.text)} SEMICOLON;
 
@@ -160,7 +166,7 @@ expr: termino {Compiler.check_pending_sum_sub()} (op=(ADD | SUBS) {Compiler.push
 
 termino: factor {Compiler.check_pending_div_prod()} (op=(MULT | DIV) {Compiler.push_op($op.text)} termino {Compiler.check_pending_div_prod()})?;
 
-factor: (constant | reference | methodCall) | OPEN_PAR {Compiler.open_par()} relationalExpr CLOSE_PAR {Compiler.close_par()};
+factor: (constant | reference | methodCall | arrayOperation {Compiler.complete_array_operation(True)}) | OPEN_PAR {Compiler.open_par()} relationalExpr CLOSE_PAR {Compiler.close_par()};
 
 term: constant | reference | expression | methodCall | constructorCall;
 
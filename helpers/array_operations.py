@@ -0,0 +1,36 @@
+from typing import Any, List, Sequence
+import operator
+
+
+def dot(left: Sequence[Any], right: Sequence[Any]) -> Any:
+    """ Computes the sum of the products of the elements of two arrays of the same size.
+
+        Arguments:
+            - left [Sequence[Any]]: The elements of the left array.
+            - right [Sequence[Any]]: The elements of the right array.
+
+        Returns:
+            - [Any]: The dot product.
+    """
+    return sum(map(operator.mul, left, right))
+
+
+def matmul(left: Sequence[Any], right: Sequence[Any], rows: int, inner: int, columns: int) -> List[Any]:
+    """ Multiplies two matrices stored row by row.
+
+        Arguments:
+            - left [Sequence[Any]]: The elements of the left matrix, of rows x inner.
+            - right [Sequence[Any]]: The elements of the right matrix, of inner x columns.
+            - rows [int]: The rows of the left matrix.
+            - inner [int]: The columns of the left matrix and the rows of the right one.
+            - columns [int]: The columns of the right matrix.
+
+        Returns:
+            - [List[Any]]: The elements of the product, of rows x columns, row by row.
+    """
+    product = []
+    for row in range(rows):
+        left_row = left[row * inner:(row + 1) * inner]
+        for column in range(columns):
+            product.append(dot(left_row, right[column::columns]))
+    return product
@@ -40,6 +40,17 @@ class Operations(Enum):
     ADD_LIT = "ADD_LIT"
     RES_POINTER = "RES_POINTER"
 
+    # Built-in operations on dimensional variables
+    FILL = "FILL"
+    COPY = "COPY"
+    ARRAY_ADD = "ARRAY_ADD"
+    ARRAY_SUBS = "ARRAY_SUBS"
+    ARRAY_PROD = "ARRAY_PROD"
+    ARRAY_DIV = "ARRAY_DIV"
+    MATMUL = "MATMUL"
+    SUM = "SUM"
+    DOT = "DOT"
+
     @staticmethod
     def is_add_or_sub_op_(op: "Operations") -> bool:
         """ Checks if the operator is an addition or substraction.
@@ -0,0 +1,81 @@
+from helpers.operations import Operations
+from scope.variable import Variable
+from typing import Iterator, Optional, Tuple
+
+
+# The operations with a left and a right operand whose result is a raw address.
+BINARY_OPERATIONS = (
+    Operations.ADD, Operations.SUBS, Operations.PROD, Operations.DIV, Operations.AND, Operations.OR,
+    Operations.EQUAL, Operations.NOT_EQUAL, Operations.GREATER, Operations.GREATER_EQUAL_THAN,
+    Operations.LESS, Operations.LESS_EQUAL_THAN,
+)
+
+# The element-wise operations on dimensional variables, with the operation they apply to every element.
+ELEMENTWISE_OPERATIONS = {
+    Operations.ARRAY_ADD: Operations.ADD,
+    Operations.ARRAY_SUBS: Operations.SUBS,
+    Operations.ARRAY_PROD: Operations.PROD,
+    Operations.ARRAY_DIV: Operations.DIV,
+}
+
+# The operations with an operand that is a raw address instead of a Variable, and its position in the
+# quad. An ASSIGN may repeat the address of its target.
+RAW_ADDRESS_OPERANDS = {
+    Operations.ASSIGN: 3,
+    Operations.ADD: 3,
+    Operations.SUBS: 3,
+    Operations.PROD: 3,
+    Operations.DIV: 3,
+    Operations.AND: 3,
+    Operations.OR: 3,
+    Operations.EQUAL: 3,
+    Operations.NOT_EQUAL: 3,
+    Operations.GREATER: 3,
+    Operations.GREATER_EQUAL_THAN: 3,
+    Operations.LESS: 3,
+    Operations.LESS_EQUAL_THAN: 3,
+    Operations.NOT: 2,
+    Operations.ADD_LIT: 2,
+}
+
+
+def raw_address(quad: Tuple) -> Optional[int]:
+    """ Gets the operand of a quad that is a raw address, the result of an expression or the base
+        of a dimensional variable.
+
+        Arguments:
+            - quad [Tuple]: The quad.
+
+        Returns:
+            - [Optional[int]]: The address, or None when the quad has no raw address.
+    """
+    position = RAW_ADDRESS_OPERANDS.get(quad[0])
+    return None if position is None or position >= len(quad) else quad[position]
+
+
+def quad_variables(quad: Tuple) -> Iterator[Variable]:
+    """ The Variables used by a quad.
+
+        Arguments:
+            - quad [Tuple]: The quad.
+
+        Returns:
+            - [Iterator[Variable]]: The operands that are Variables.
+    """
+    return (operand for operand in quad[1:] if isinstance(operand, Variable))
+
+
+def quad_addresses(quad: Tuple) -> Iterator[int]:
+    """ The addresses used by a quad.
+
+        Arguments:
+            - quad [Tuple]: The quad.
+
+        Returns:
+            - [Iterator[int]]: The address of every Variable of the quad and its raw address, if any.
+    """
+    for variable in quad_variables(quad):
+        yield variable.memory_space
+    address = raw_address(quad)
+    if address is not None:
+        yield address
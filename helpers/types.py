@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Any
 
 
 class Types():
@@ -14,6 +15,9 @@ class Types():
 
     ERROR = "error"
 
+    # The spelling of the boolean primitives in Otter.
+    BOOL_PRIMITIVES = {"truthy": True, "falsy": False}
+
     @staticmethod
     def is_int(var_type: str) -> bool:
         return var_type == Types.INT
@@ -41,3 +45,36 @@ class Types():
                 Types.is_string(var_type) or
                 Types.is_bool(var_type) or
                 Types.is_array_pointer(var_type))
+
+    @staticmethod
+    def is_primitive(var_type: str) -> bool:
+        return (Types.is_int(var_type) or
+                Types.is_float(var_type) or
+                Types.is_string(var_type) or
+                Types.is_bool(var_type))
+
+    @staticmethod
+    def parse(text: str, var_type: str) -> Any:
+        """ Converts text to the native Python value of a primitive type.
+
+            Arguments:
+                - text [str]: The text to convert, without quotes for strings.
+                - var_type [str]: The primitive type of the value.
+
+            Returns:
+                - [Any]: The int, float, bool or str value.
+
+            Raises:
+                - ValueError: If the text is not a valid value of the type.
+        """
+        if Types.is_int(var_type):
+            return int(text)
+        if Types.is_float(var_type):
+            return float(text)
+        if Types.is_bool(var_type):
+            if isinstance(text, bool):
+                return text
+            if text not in Types.BOOL_PRIMITIVES:
+                raise ValueError(f"Invalid {var_type} value '{text}', expected truthy or falsy.")
+            return Types.BOOL_PRIMITIVES[text]
+        return str(text)
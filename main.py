@@ -1,30 +1,78 @@
 import sys
+import argparse
 from antlr4 import *
 from grammar.otterLexer import otterLexer
 from grammar.otterParser import otterParser
 from antlr4.tree.Trees import Trees
 from compilation.compiler import Compiler
+from compilation.pass_manager import DEFAULT_OPTIMIZATION_LEVEL, OPTIMIZATION_LEVELS
+from compilation.transpiler import Transpiler
 from virtual_machine.virtual_machine import VirtualMachine
+from virtual_machine.closure_virtual_machine import ClosureVirtualMachine
+from virtual_machine.hooks import CallTraceHook, DebugLoggingHook
+from virtual_machine.memoization import MemoCache
 import logging
 
 logger = logging.getLogger(__name__)
 
+# The VirtualMachine is the reference engine, the closure engine and the Python transpiler
+# are meant for production runs.
+ENGINES = {
+    "vm": VirtualMachine,
+    "closure": ClosureVirtualMachine,
+    "python": Transpiler,
+}
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Compiles and runs an Otter program.")
+    parser.add_argument("file", help="The Otter program to run.")
+    parser.add_argument("--engine", choices=ENGINES.keys(), default="vm",
+                        help="The engine used to execute the program (default: vm).")
+    parser.add_argument("-O", dest="optimization_level", type=int, choices=OPTIMIZATION_LEVELS.keys(),
+                        default=DEFAULT_OPTIMIZATION_LEVEL,
+                        help=f"The optimization passes run over the quads (default: {DEFAULT_OPTIMIZATION_LEVEL}).")
+    parser.add_argument("--explain", action="store_true",
+                        help="Reports the quads each optimization pass changed in every method and its time.")
+    parser.add_argument("--memo-capacity", type=int, default=MemoCache.DEFAULT_CAPACITY,
+                        help="The results kept for every memoized method, 0 turns memoization off "
+                             f"(default: {MemoCache.DEFAULT_CAPACITY}).")
+    parser.add_argument("--memo-policy", choices=MemoCache.POLICIES, default="lru",
+                        help="The result evicted when the cache of a memoized method is full (default: lru).")
+    parser.add_argument("--trace-calls", action="store_true",
+                        help="Prints every call and return of the program to stderr (vm engine only).")
+    return parser.parse_args(argv)
+
 
 def main(argv):
-    input_stream = FileStream(argv[1])
+    arguments = parse_arguments(argv[1:])
+    Compiler.set_optimization_level(arguments.optimization_level, arguments.explain)
+    input_stream = FileStream(arguments.file)
     lexer = otterLexer(input_stream)
     stream = CommonTokenStream(lexer)
     parser = otterParser(stream)
     tree = parser.program()
-    logger.debug(Trees.toStringTree(tree, None, parser))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(Trees.toStringTree(tree, None, parser))
 
     if parser.getNumberOfSyntaxErrors() == 0 and len(Compiler.errors) == 0:
         logger.debug("PROGRAMA CORRECTO")
         logger.debug(
             "===========================================STARTING VIRTUAL MACHINE EXECUTION===========================================")
+        Compiler.end_program()
         quads = Compiler.get_quads()
-        vm = VirtualMachine(quads)
+        if arguments.explain:
+            [print(line, file=sys.stderr) for line in Compiler.optimization_report()]
         try:
+            engine = ENGINES[arguments.engine]
+            if engine is Transpiler:
+                vm = engine(quads)
+            else:
+                vm = engine(quads, memo_capacity=arguments.memo_capacity, memo_policy=arguments.memo_policy)
+            if isinstance(vm, VirtualMachine) and logging.getLogger("virtual_machine").isEnabledFor(logging.DEBUG):
+                vm.add_hook(DebugLoggingHook())
+            if isinstance(vm, VirtualMachine) and arguments.trace_calls:
+                vm.add_hook(CallTraceHook())
             vm.run()
         except Exception as error:
             logger.error(error)
@@ -1,3 +1,4 @@
+from typing import Optional, Tuple
 import logging
 
 
@@ -5,18 +6,23 @@ logger = logging.getLogger(__name__)
 
 
 class BaseMemory:
-    def __init__(self, scope_name: str, type_name: str, limits: (int, int)):
+    def __init__(self, scope_name: str, type_name: str, limits: (int, int),
+                 overflow_limits: Optional[Tuple[int, int]] = None):
         """The BaseMemory is the class in charge of keeping the memory spaces during compilation.
         
         Arguments:
             - scope_name [str]: The name of the scope of this instance.
             - type_name [str]: The type of variables being kept in memory.
             - limits [(int, int)]: The limits of this memory. One of TypeRanges.
+            - overflow_limits [(int, int)]: Optional, the limits of the spaces given once the memory
+                is full instead of stopping the compilation.
         """
         self.__scope_name = scope_name
         self.__type_name = type_name
         self.__inf_limit, self.__max_limit = limits
+        self.__overflow_limits = overflow_limits
         self.__variable_counter = 0
+        self.__overflow_counter = 0
 
     @property
     def variable_counter(self):
@@ -68,6 +74,9 @@ class BaseMemory:
             Exception: If the amount of variable surpasses the available memory limits.
         """
         next_available_space = self.__inf_limit + self.__variable_counter
+        if self.__overflow_limits is not None and next_available_space + chunk_size > self.__max_limit:
+            return self._get_next_overflow_space(chunk_size)
+
         self.__variable_counter += chunk_size
 
         # Stop compilation if program has too many variables.
@@ -76,3 +85,25 @@ class BaseMemory:
                 f"Too many variables for {self.__scope_name} {self.__type_name} memory.")
 
         return next_available_space
+
+    def _get_next_overflow_space(self, chunk_size: int) -> int:
+        """Separates the memory space for the amount of chunk_size in the overflow limits.
+
+        Arguments:
+            - chunk_size [int]: The amount of memory spaces which should be saved.
+
+        Returns:
+            - [int] The single next available memory space from the reserved chunk.
+
+        Raises:
+            Exception: If the amount of variable surpasses the overflow limits.
+        """
+        inf_limit, max_limit = self.__overflow_limits
+        next_available_space = inf_limit + self.__overflow_counter
+        self.__overflow_counter += chunk_size
+
+        if inf_limit + self.__overflow_counter > max_limit:
+            raise Exception(
+                f"Too many variables for {self.__scope_name} {self.__type_name} memory.")
+
+        return next_available_space
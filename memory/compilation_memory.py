@@ -24,6 +24,15 @@ class CompilationMemory:
     def get_global_memory():
         return CompilationMemory.__global_memory
 
+    @staticmethod
+    def get_temp_memory():
+        """ Returns the temporal memory of the scope being compiled.
+
+            Returns:
+                - [Memory]: The temp memory.
+        """
+        return CompilationMemory.__temp_memory
+
     @staticmethod
     def next_const_memory_space(value: str, var_type: str) -> int:
         """Gets the next available memory address for constants.
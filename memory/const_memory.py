@@ -2,6 +2,7 @@ from .base_memory import BaseMemory
 from .ranges import TypeRanges
 from helpers.types import Types
 from scope.variable import Variable
+from typing import Any, Dict
 import logging
 
 
@@ -34,18 +35,59 @@ class ConstMemory:
     def get_value_from_address(self, address):
         return self.__const_dict.get(address)
 
+    def constants(self) -> Dict[int, Any]:
+        """The value of every constant, keyed by its address.
+
+        Returns:
+            - [Dict[int, Any]] The address and the native value of each constant.
+        """
+        return dict(self.__const_dict)
+
+    @staticmethod
+    def convert(value: str, var_type: str):
+        """Converts the source text of a constant to its native Python value.
+
+        Arguments:
+            - value [str]: The text of the constant as written in the program, strings keep their quotes.
+            - var_type [str]: The type of the constant.
+
+        Returns:
+            - The int, float, bool or str value. Strings are unquoted.
+        """
+        if Types.is_string(var_type):
+            return value[1:-1]
+        return Types.parse(value, var_type)
+
     def next_memory_space(self, value: str, var_type: str) -> int:
         """Retrieves the next available memory space if needed. If the value was already cached it returns
-        the memory address previously used.
+        the memory address previously used. The value is stored already converted to its Python type.
 
         Arguments:
-            - value [str]: The value to store.
+            - value [str]: The value to store, as written in the program.
             - var_type [str]: The type of the value.
 
         Returns:
             - [int] The next available memory address if it didn't already exist. Else it returns the memory address
             previously used for the same value.
 
+        Raises:
+            ValueError: If the type is not one of the primitive Data Types it raises a ValueError.
+        """
+        if Types.is_primitive(var_type):
+            value = ConstMemory.convert(value, var_type)
+        return self.value_memory_space(value, var_type)
+
+    def value_memory_space(self, value: Any, var_type: str) -> int:
+        """Same as next_memory_space, but the value is already converted to its Python type. Used for the
+        constants computed during compilation.
+
+        Arguments:
+            - value [Any]: The native value to store.
+            - var_type [str]: The type of the value.
+
+        Returns:
+            - [int] The memory address of the constant.
+
         Raises:
             ValueError: If the type is not one of the primitive Data Types it raises a ValueError.
         """
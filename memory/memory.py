@@ -1,5 +1,5 @@
 from .base_memory import BaseMemory
-from .ranges import TypeRanges, merge_ranges
+from .ranges import TypeRanges, merge_ranges, virtual_temp_range
 from helpers.types import Types
 from scope.variable import Variable
 from scope.scopes import Scopes
@@ -14,20 +14,22 @@ class Memory:
             - limits [(int, int)]: The limits of this type of scope. One of ScopeRanges.
         """
         self.__scope_name = scope_name
-        self.__int_memory = BaseMemory(scope_name, Types.INT, merge_ranges(scope_limits, TypeRanges.INT))
-        self.__float_memory = BaseMemory(
-            scope_name, Types.FLOAT, merge_ranges(scope_limits, TypeRanges.FLOAT))
-        self.__bool_memory = BaseMemory(
-            scope_name, Types.BOOL, merge_ranges(scope_limits, TypeRanges.BOOL))
-        self.__string_memory = BaseMemory(
-            scope_name, Types.STRING, merge_ranges(scope_limits, TypeRanges.STRING))
-        self.__object_memory = BaseMemory(
-            scope_name, Types.OBJECT, merge_ranges(scope_limits, TypeRanges.OBJECT))
+        is_temp = Scopes.is_temp_scope(scope_name)
+
+        def base_memory(var_type: str, type_range: (int, int)) -> BaseMemory:
+            # Temps past the range of their type get virtual addresses, see TempAllocator.
+            overflow_limits = virtual_temp_range(type_range) if is_temp else None
+            return BaseMemory(scope_name, var_type, merge_ranges(scope_limits, type_range), overflow_limits)
+
+        self.__int_memory = base_memory(Types.INT, TypeRanges.INT)
+        self.__float_memory = base_memory(Types.FLOAT, TypeRanges.FLOAT)
+        self.__bool_memory = base_memory(Types.BOOL, TypeRanges.BOOL)
+        self.__string_memory = base_memory(Types.STRING, TypeRanges.STRING)
+        self.__object_memory = base_memory(Types.OBJECT, TypeRanges.OBJECT)
 
         # If memory is temporary we need to store array pointer values as well.
-        if Scopes.is_temp_scope(scope_name):
-            self.__array_pointer_memory = BaseMemory(
-                scope_name, Types.ARRAY_POINTER, merge_ranges(scope_limits, TypeRanges.ARRAY_POINTER))
+        if is_temp:
+            self.__array_pointer_memory = base_memory(Types.ARRAY_POINTER, TypeRanges.ARRAY_POINTER)
         else:
             self.__array_pointer_memory = None
 
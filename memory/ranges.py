@@ -1,8 +1,18 @@
 from enum import Enum
 from collections import namedtuple
+from scope.scopes import Scopes
+from typing import Dict, Iterable
 
 range_tuple = namedtuple('range_tuple', 'inf max')
 
+# The segment of an address, the index of its type in TypeRanges and its offset within the type.
+decoded_address = namedtuple('decoded_address', 'segment type offset')
+
+# The size of the address range of each type.
+TYPE_RANGE_SIZE = 2000
+# The size of the virtual address range of each type, see ScopeRanges.VIRTUAL_TEMP.
+VIRTUAL_TYPE_RANGE_SIZE = 1000000
+
 
 def merge_ranges(scope_range: (int, int), type_range: (int, int)):
     """Merges a scope range and a type ranges.
@@ -22,6 +32,21 @@ def merge_ranges(scope_range: (int, int), type_range: (int, int)):
     return (inf_scope_range + inf_type_range, inf_scope_range + max_type_range)
 
 
+def virtual_temp_range(type_range: (int, int)) -> (int, int):
+    """Gets the virtual temp range of a type.
+
+    E.g. Bool: (4000, 5999) = (3000000, 3999999)
+
+    Arguments:
+        - type_range [(int, int)]: a valid TypeRange.
+
+    Returns:
+        The virtual range tuple.
+    """
+    inf_range = ScopeRanges.VIRTUAL_TEMP.inf + type_range[0] // TYPE_RANGE_SIZE * VIRTUAL_TYPE_RANGE_SIZE
+    return (inf_range, inf_range + VIRTUAL_TYPE_RANGE_SIZE - 1)
+
+
 def remove_base_prefix(address: int) -> int:
     """Removes the inferior range of the scope from the address.
 
@@ -56,6 +81,10 @@ class ScopeRanges():
     # Only temps have array pointers, so they have an extra 2,000 spaces.
     TEMP = range_tuple(40000, 51999)
 
+    # Temps that do not fit in the range of their type while a method is being parsed. The
+    # TempAllocator moves every temp back to TEMP once the method ends.
+    VIRTUAL_TEMP = range_tuple(1000000, 6999999)
+
     @staticmethod
     def is_global(value: int) -> bool:
         """Whether a value is global based on its address.
@@ -92,6 +121,18 @@ class ScopeRanges():
         """
         return ScopeRanges.TEMP.inf <= value <= ScopeRanges.TEMP.max
 
+    @staticmethod
+    def is_virtual_temp(value: int) -> bool:
+        """Whether a value is a virtual temp based on its address.
+
+        Arguments:
+            - value [int]: The memory address.
+
+        Returns:
+            - [bool] True if it is a virtual temp. False otherwise.
+        """
+        return ScopeRanges.VIRTUAL_TEMP.inf <= value <= ScopeRanges.VIRTUAL_TEMP.max
+
     @staticmethod
     def is_const(value: int) -> bool:
         """Whether a value is const based on its address.
@@ -221,3 +262,67 @@ class TypeRanges():
             - [bool] True if it is an array pointer. False otherwise.
         """
         return TypeRanges.ARRAY_POINTER.inf <= remove_base_prefix(value) <= TypeRanges.ARRAY_POINTER.max
+
+
+class AddressDecodeTable():
+    """The AddressDecodeTable is a static class that keeps the decoded form of every address used by
+    the program, so the runtime memories look an address up instead of classifying it on every access.
+
+    The table is built once per program with the addresses of its quads. Addresses that are not in
+    the table, such as the elements of an array accessed through a pointer, are decoded the first
+    time they are used and added to it.
+    """
+    __table: Dict[int, decoded_address] = dict()
+
+    @staticmethod
+    def build(addresses: Iterable[int]) -> None:
+        """Replaces the table with the decoded form of the provided addresses.
+
+        Arguments:
+            - addresses [Iterable[int]]: The addresses used by the program.
+        """
+        AddressDecodeTable.__table = {
+            address: AddressDecodeTable.decode_address(address) for address in addresses}
+
+    @staticmethod
+    def decode(address: int) -> decoded_address:
+        """Gets the decoded form of an address.
+
+        Arguments:
+            - address [int]: The address to decode.
+
+        Returns:
+            - [decoded_address] The segment, type index and offset of the address.
+        """
+        decoded = AddressDecodeTable.__table.get(address)
+        if decoded is None:
+            decoded = AddressDecodeTable.decode_address(address)
+            AddressDecodeTable.__table[address] = decoded
+        return decoded
+
+    @staticmethod
+    def decode_address(address: int) -> decoded_address:
+        """Decodes an address with the scope and type ranges.
+
+        E.g. address = 14003, LOCAL ranges is (10000, 19999) and BOOL is the third type = (LOCAL, 2, 3)
+
+        Arguments:
+            - address [int]: The address to decode.
+
+        Returns:
+            - [decoded_address] The segment, type index and offset of the address.
+
+        Raises:
+            - ValueError: If the address does not belong to any scope.
+        """
+        for segment, scope_range in (
+                (Scopes.GLOBAL, ScopeRanges.GLOBAL),
+                (Scopes.LOCAL, ScopeRanges.LOCAL),
+                (Scopes.CONSTANT, ScopeRanges.CONSTANTS),
+                (Scopes.INSTANCE, ScopeRanges.INSTANCE),
+                (Scopes.TEMP, ScopeRanges.TEMP)):
+            if scope_range.inf <= address <= scope_range.max:
+                type_index, offset = divmod(address - scope_range.inf, TYPE_RANGE_SIZE)
+                return decoded_address(segment, type_index, offset)
+
+        raise ValueError(f"Invalid memory address: {address}.")
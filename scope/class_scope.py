@@ -1,7 +1,7 @@
 from .symbol_table import SymbolTable
 from .method_scope import MethodScope
 from .variable import Variable
-from typing import Optional
+from typing import Dict, Optional
 from memory.memory import Memory
 from memory.ranges import ScopeRanges
 from scope.scopes import Scopes
@@ -17,6 +17,8 @@ class ClassScope:
             - inherits [ClassScope]: The class scope of the parent class if there is one.
         """
         self._name = name
+        self._inherits = inherits
+        self._method_table = None
         if inherits is None:
             self._method_directory = SymbolTable(name)
             self._attribute_directory = SymbolTable(name, global_scope)
@@ -47,6 +49,28 @@ class ClassScope:
         """
         return self._method_directory
 
+    @property
+    def inherits(self) -> Optional["ClassScope"]:
+        """The class scope of the parent class.
+
+        Returns:
+            - The ClassScope if the class inherits from another one. None otherwise.
+        """
+        return self._inherits
+
+    @property
+    def method_table(self) -> Dict[str, MethodScope]:
+        """The methods an instance of the class runs, its own ones and the inherited ones it does not
+        override, so a call is resolved with a single lookup.
+
+        Returns:
+            - [Dict[str, MethodScope]] The method of every name.
+        """
+        if self._method_table is None:
+            self._method_table = dict(self._inherits.method_table) if self._inherits is not None else {}
+            self._method_table.update(self._method_directory.symbols)
+        return self._method_table
+
     @property
     def attribute_directory(self) -> SymbolTable:
         """The SymbolTable which keeps track of the attributes in the class.
@@ -70,9 +94,11 @@ class ClassScope:
         Returns:
             - The MethodScope object created for this method.
         """
+        inherited = self._inherits.method_table.get(name) if self._inherits is not None else None
         method_scope = MethodScope(
-            name, access_modifier, self._attribute_directory)
-        self._method_directory.add_symbol(method_scope)
+            name, access_modifier, self._attribute_directory, inherited)
+        self._method_directory.add_symbol(method_scope, shadow=inherited is not None)
+        self._method_table = None
 
         return method_scope
 
@@ -11,7 +11,8 @@ logger = logging.getLogger(__name__)
 
 
 class MethodScope:
-    def __init__(self, name: str, access_modifier: str, parent: Optional[SymbolTable] = None):
+    def __init__(self, name: str, access_modifier: str, parent: Optional[SymbolTable] = None,
+                 overrides: Optional["MethodScope"] = None):
         """The MethodScope object is responsible for keeping track of the information of a method.
 
         Arguments:
@@ -19,12 +20,24 @@ class MethodScope:
             - access_modifier [str]: Whether the method is public of private.
             - parent [SymbolTable]: The method's parent class attribute_directory, only Optional for the Global Scope.
             - parent_memory [Memory]: The memory of the parent class, only Optional for the Global Scope.
+            - overrides [MethodScope]: The inherited method this method replaces, if there is one.
         """
         self._name = name
         self._access_modifier = access_modifier
         self._parent = parent
         self._local_memory = Memory(Scopes.LOCAL, ScopeRanges.LOCAL)
         self._instruction_pointer = None
+        self._local_memory_needed = None
+        self._temp_memory_needed = None
+        self._pure = False
+        self._overrides = overrides
+        self._overridden = False
+
+        # Every method this one replaces, directly or not, is now called through the method table.
+        inherited = overrides
+        while inherited is not None:
+            inherited._overridden = True
+            inherited = inherited.overrides
 
         if parent is not None:
             logger.debug(
@@ -40,6 +53,9 @@ class MethodScope:
 
         self._variables_directory = SymbolTable(name, self._arguments)
 
+    def __repr__(self):
+        return f"<MethodScope: {self._name}>"
+
     @property
     def access_modifier(self):
         return self._access_modifier
@@ -57,6 +73,65 @@ class MethodScope:
     def local_memory(self) -> Memory:
         return self._local_memory
 
+    @property
+    def local_memory_needed(self) -> (int, int, int, int, int, int):
+        """The amount of local variables of each type used by the method.
+
+        Returns:
+            - The counters [(int, int, int, int, int, int)] recorded when the method ended.
+        """
+        return self._local_memory_needed
+
+    @property
+    def temp_memory_needed(self) -> (int, int, int, int, int, int):
+        """The amount of temporals of each type used by the method.
+
+        Returns:
+            - The counters [(int, int, int, int, int, int)] recorded when the method ended.
+        """
+        return self._temp_memory_needed
+
+    def record_memory_needed(self, temp_memory_needed: (int, int, int, int, int, int)) -> None:
+        """Records the amount of local and temporal variables of each type used by the method, so its
+        runtime memory can be allocated with the exact size. Called once the method has been parsed.
+
+        Arguments:
+            - temp_memory_needed [(int, int, int, int, int, int)]: The temporal slots of each type
+                used by the method, see TempAllocator.
+        """
+        self._local_memory_needed = self._local_memory.actual_memory_needed()
+        self._temp_memory_needed = temp_memory_needed
+
+    def share_memory_needed(self, local_memory_needed: (int, int, int, int, int, int),
+                            temp_memory_needed: (int, int, int, int, int, int)) -> None:
+        """Widens the memory recorded for the method, so the methods that override each other have frames
+        of the same size and a call can run any of them.
+
+        Arguments:
+            - local_memory_needed [(int, int, int, int, int, int)]: The local slots of each type.
+            - temp_memory_needed [(int, int, int, int, int, int)]: The temporal slots of each type.
+        """
+        self._local_memory_needed = local_memory_needed
+        self._temp_memory_needed = temp_memory_needed
+
+    @property
+    def overrides(self) -> Optional["MethodScope"]:
+        """The inherited method this method replaces.
+
+        Returns:
+            - The MethodScope [MethodScope] of the inherited method, None if the method is not an override.
+        """
+        return self._overrides
+
+    @property
+    def overridden(self) -> bool:
+        """Whether a subclass replaces the method, so its calls must be dispatched on the class of the instance.
+
+        Returns:
+            - [bool] True if the method is overridden.
+        """
+        return self._overridden
+
     @property
     def variables_directory(self) -> SymbolTable:
         """The SymbolTable which keeps track of the variables in the method.
@@ -93,11 +168,22 @@ class MethodScope:
         
         Arguments:
             - return_type [str]: The return type of the method.
+
+        Raises:
+            - Exception: If the method overrides a method with different arguments or return type.
         """
         self._return_type = return_type
-        if return_type != "void":
+        compatible = self._overrides is not None and return_type == self._overrides.return_type and (
+            [(variable.var_type, variable.dimensions) for variable in self._ordered_arguments]
+            == [(variable.var_type, variable.dimensions) for variable in self._overrides.ordered_arguments])
+        if compatible:
+            # The callers of the inherited method pass the arguments and read the result for this one.
+            self._return_memory_address = self._overrides.return_memory_address
+        elif return_type != "void":
             address = CompilationMemory.next_global_memory_space(return_type)
             self._return_memory_address = Variable(address, return_type, address)
+        if self._overrides is not None and not compatible:
+            raise Exception(f"Method {self._name} must keep the arguments and return type of the method it overrides.")
 
     def add_argument(self, name: str, arg_type: str) -> None:
         """Adds an argument to the method.
@@ -133,6 +219,19 @@ class MethodScope:
         elif variable.is_local():
             self._local_memory.next_memory_chunk(variable.var_type, variable.size - 1)
 
+    @property
+    def pure(self) -> bool:
+        """Whether the method was classified as pure, see PurityAnalyzer.
+
+        Returns:
+            - [bool] True if the result of the method only depends on its arguments.
+        """
+        return self._pure
+
+    @pure.setter
+    def pure(self, pure: bool):
+        self._pure = pure
+
     @property
     def instruction_pointer(self):
         return self._instruction_pointer
@@ -68,16 +68,18 @@ class SymbolTable:
 
         return None
 
-    def add_symbol(self, symbol: Any) -> None:
+    def add_symbol(self, symbol: Any, shadow: bool = False) -> None:
         """Adds a symbol to the table.
 
         Arguments:
             - symbol [Any]: The symbol to add. MUST have name attribute to be added.
+            - shadow [bool]: Whether the symbol can hide a symbol of the parents.
 
         Raises:
             - Exception: if the symbol is already in the table it raises an Exception.
         """
-        if self.search(symbol.name) is not None:
+        existing = self._symbols.get(symbol.name) if shadow else self.search(symbol.name)
+        if existing is not None:
             raise Exception(
                 f'Symbol "{symbol.name}" already exists in {self._name}.')
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 from helpers.types import Types
 from memory.ranges import ScopeRanges
 from .dimension import Dimension
@@ -91,6 +91,20 @@ class Variable:
         """
         return self._dimension_count > 0
 
+    @property
+    def dimensions(self) -> Tuple[int, ...]:
+        """The size of every dimension of the variable.
+
+        Returns:
+            - [Tuple[int, ...]] The sizes, from the first dimension. Empty if the variable is not an array.
+        """
+        dimensions = []
+        current_dimension = self._dimension_info
+        while current_dimension is not None:
+            dimensions.append(current_dimension.size)
+            current_dimension = current_dimension.next_dimension
+        return tuple(dimensions)
+
     def add_new_dimension(self, size: int) -> None:
         """Adds a new dimension to the variable.
 
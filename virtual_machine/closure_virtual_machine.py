@@ -0,0 +1,737 @@
+from helpers.custom_stack import Stack
+from helpers.types import Types
+from memory.compilation_memory import CompilationMemory
+from .decoder import Addressing, Decoder, Instruction, Opcodes
+from .dispatch import Dispatcher, InlineCache
+from .fusion import Fuser
+from .memoization import MemoCache, Memoizer, call_key
+from .memory_layout import MemoryLayout
+from .runtime_memory.frame_pool import FramePool
+from .runtime_memory.method_memory import MethodMemory
+from .runtime_memory.register_file import RegisterFile
+from .runtime_memory.runtime_memory import RuntimeMemory
+from .virtual_machine import VirtualMachine
+from scope.method_scope import MethodScope
+from typing import Any, Callable, Dict, List
+from compilation.compiler import Compiler
+import operator
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# A compiled instruction takes the base pointer of the active frame and returns the next instruction pointer.
+CompiledInstruction = Callable[[int], int]
+Reader = Callable[[int], Any]
+Writer = Callable[[int, Any], None]
+
+
+class ClosureVirtualMachine:
+    """ The ClosureVirtualMachine runs the same programs as the VirtualMachine, but instead of
+        dispatching every instruction to a generic handler it compiles each decoded quad once
+        into a specialized closure. The closure captures read and write accessors for its
+        operands that were resolved at load time (constants are already converted to Python
+        values), so executing an instruction is a single call that returns the next
+        instruction pointer.
+
+        The accessors index the values of the RegisterFile directly, with the base pointer of the
+        active frame, an absolute index or a slot of the current instance.
+
+        The VirtualMachine remains the reference engine, this engine is meant for production runs.
+
+        The main parts of the ClosureVirtualMachine are:
+            __register_file [RegisterFile]: The value stack of the program.
+            __values [List[Any]]: The values of the RegisterFile.
+            __method_memory [MethodMemory]: Keeps track of the current active runtime memory.
+            __base_pointer [int]: The base pointer of the active frame.
+            __instance_slots [List[Any]]: The slots of the instance of the active frame.
+            __memory_stack [Stack]: Keeps track of the stack of memory.
+            __frame_pool [FramePool]: Reuses the memory of the methods that already returned.
+            __memoizer [Memoizer]: Keeps the results of the calls to the pure methods.
+            __jump_stack [Stack]: Keeps track of the jumps in the virtual machine.
+            __compilers [dict]: Dictionary mapping each opcode to the method that compiles it.
+            __code [List[CompiledInstruction]]: One closure per quad.
+    """
+
+    __expression_operations = {
+        Opcodes.ADD: operator.add,
+        Opcodes.SUBS: operator.sub,
+        Opcodes.DIV: operator.truediv,
+        Opcodes.PROD: operator.mul,
+        Opcodes.GREATER: operator.gt,
+        Opcodes.GREATER_EQUAL_THAN: operator.ge,
+        Opcodes.LESS: operator.lt,
+        Opcodes.LESS_EQUAL_THAN: operator.le,
+        Opcodes.EQUAL: operator.eq,
+        Opcodes.NOT_EQUAL: operator.ne,
+
+        Opcodes.AND: VirtualMachine.and_op,
+        Opcodes.OR: VirtualMachine.or_op,
+    }
+
+    def __init__(self, quads: List, frame_pool_capacity: int = FramePool.DEFAULT_CAPACITY,
+                 memo_capacity: int = MemoCache.DEFAULT_CAPACITY, memo_policy: str = "lru"):
+        self.__register_file = RegisterFile(CompilationMemory.get_global_memory().actual_memory_needed(),
+                                            CompilationMemory.get_const_memory(),
+                                            MemoryLayout.arrays(Compiler._global_scope))
+        self.__values = self.__register_file.values
+        layout = MemoryLayout(self.__register_file, quads)
+        self.__frame_layout_at = layout.frame_layout_at
+        self.__frame_pool = FramePool(self.__register_file, frame_pool_capacity)
+        main_instance = RuntimeMemory(Compiler._class_directory.search("Main").instance_memory.actual_memory_needed(), "Main")
+        self.switch_memory(MethodMemory(self.__register_file, main_instance, layout.entry_layout))
+        self.__memory_stack = Stack()
+        self.__jump_stack = Stack()
+
+        self.__compilers = {
+            Opcodes.GOTO: self.compile_goto,
+            Opcodes.GOTOF: self.compile_conditional_jump,
+            Opcodes.GOTOT: self.compile_conditional_jump,
+            Opcodes.ASSIGN: self.compile_assign,
+
+            Opcodes.ADD: self.compile_expression,
+            Opcodes.SUBS: self.compile_expression,
+            Opcodes.PROD: self.compile_expression,
+            Opcodes.DIV: self.compile_expression,
+            Opcodes.AND: self.compile_expression,
+            Opcodes.OR: self.compile_expression,
+            Opcodes.EQUAL: self.compile_expression,
+            Opcodes.NOT_EQUAL: self.compile_expression,
+            Opcodes.GREATER: self.compile_expression,
+            Opcodes.GREATER_EQUAL_THAN: self.compile_expression,
+            Opcodes.LESS: self.compile_expression,
+            Opcodes.LESS_EQUAL_THAN: self.compile_expression,
+            Opcodes.NOT: self.compile_not,
+
+            Opcodes.READ: self.compile_read,
+            Opcodes.WRITE: self.compile_write,
+            Opcodes.RETURN: self.compile_return,
+            Opcodes.VER_ACCS: self.compile_verify_access,
+            Opcodes.ERA: self.compile_era,
+            Opcodes.PARAM: self.compile_param,
+            Opcodes.GOSUB: self.compile_go_sub,
+            Opcodes.END_FUNC: self.compile_end_func,
+            Opcodes.PROD_LIT: self.compile_literal_product,
+            Opcodes.ADD_LIT: self.compile_literal_add,
+            Opcodes.RES_POINTER: self.compile_resolve_pointer,
+
+            Opcodes.INDEX_LOAD: self.compile_index_load,
+            Opcodes.INDEX_STORE: self.compile_index_store,
+            Opcodes.SCALED_INDEX: self.compile_scaled_index,
+            Opcodes.OFFSET_LOAD: self.compile_offset_load,
+            Opcodes.OFFSET_STORE: self.compile_offset_store,
+
+            Opcodes.FILL: self.compile_array_fill,
+            Opcodes.COPY: self.compile_array_copy,
+            Opcodes.ARRAY_ADD: self.compile_array_elementwise,
+            Opcodes.ARRAY_SUBS: self.compile_array_elementwise,
+            Opcodes.ARRAY_PROD: self.compile_array_elementwise,
+            Opcodes.ARRAY_DIV: self.compile_array_elementwise,
+            Opcodes.MATMUL: self.compile_array_matmul,
+            Opcodes.SUM: self.compile_array_sum,
+            Opcodes.DOT: self.compile_array_dot,
+            Opcodes.COMPARE_JUMP: self.compile_compare_jump,
+            Opcodes.TAIL_CALL: self.compile_tail_call,
+            Opcodes.MEMO_CALL: self.compile_memo_call,
+            Opcodes.MEMO_RETURN: self.compile_memo_return,
+            Opcodes.VIRTUAL_CALL: self.compile_virtual_call,
+        }
+
+        self.__dispatcher = Dispatcher()
+        program = Fuser().fuse(self.__dispatcher.dispatch(Decoder(layout).decode(quads)))
+        # A capacity of 0 turns memoization off.
+        self.__memoizer = Memoizer(layout, capacity=memo_capacity, policy=memo_policy)
+        if memo_capacity > 0:
+            program = self.__memoizer.memoize(program)
+        self.__code = [self.compile(instruction) for instruction in program]
+
+    @property
+    def frame_pool(self) -> FramePool:
+        """ The pool of method memories of the machine.
+
+            Returns:
+                - [FramePool]: The frame pool.
+        """
+        return self.__frame_pool
+
+    @property
+    def memo_caches(self) -> Dict[MethodScope, MemoCache]:
+        """ The caches of the memoized methods, see Memoizer.
+
+            Returns:
+                - [Dict[MethodScope, MemoCache]]: The cache of every memoized method.
+        """
+        return self.__memoizer.caches
+
+    @property
+    def inline_caches(self) -> Dict[int, InlineCache]:
+        """ The caches of the calls to overridden methods, see Dispatcher.
+
+            Returns:
+                - [Dict[int, InlineCache]]: The cache of every call, by the address of the call.
+        """
+        return self.__dispatcher.caches
+
+    @property
+    def register_file(self) -> RegisterFile:
+        """ The value stack of the machine.
+
+            Returns:
+                - [RegisterFile]: The register file.
+        """
+        return self.__register_file
+
+    def run(self):
+        """ Executes the compiled program until one of the closures halts the machine.
+        """
+        code = self.__code
+        ip = 0
+        while ip != VirtualMachine.HALT:
+            ip = code[ip](self.__base_pointer)
+
+    def compile(self, instruction: Instruction) -> CompiledInstruction:
+        """ Compiles a decoded instruction into its closure.
+
+            Arguments:
+                - instruction [Instruction]: The instruction to compile.
+
+            Returns:
+                - [CompiledInstruction]: The closure that executes the instruction.
+        """
+        return self.__compilers[instruction.opcode](instruction)
+
+    def switch_memory(self, method_memory: MethodMemory):
+        """ Makes a method memory the active one.
+
+            Arguments:
+                - method_memory [MethodMemory]: The memory to activate.
+        """
+        self.__method_memory = method_memory
+        self.__base_pointer = method_memory.base_pointer
+        instance_memory = method_memory.instance_memory
+        self.__instance_slots = None if instance_memory is None else instance_memory.slots
+
+    def reader(self, location: int, mode: int) -> Reader:
+        """ Builds the accessor that reads a decoded operand.
+
+            Arguments:
+                - location [int]: The location of the operand.
+                - mode [int]: The Addressing mode of the operand.
+
+            Returns:
+                - [Reader]: A function that takes the active base pointer and returns the value of the operand.
+        """
+        values = self.__values
+        if mode == Addressing.FRAME:
+            def read(bp):
+                return values[bp + location]
+        elif mode == Addressing.ABSOLUTE and self.__register_file.is_constant(location):
+            value = values[location]
+
+            def read(bp):
+                return value
+        elif mode == Addressing.ABSOLUTE:
+            def read(bp):
+                return values[location]
+        elif mode == Addressing.INDIRECT:
+            def read(bp):
+                storage, offset = values[bp + location]
+                return storage.load(offset)
+        else:
+            def read(bp):
+                return self.__instance_slots[location]
+        return read
+
+    def writer(self, location: int, mode: int = Addressing.FRAME) -> Writer:
+        """ Builds the accessor that writes a decoded operand.
+
+            Arguments:
+                - location [int]: The location of the operand.
+                - mode [int]: The Addressing mode of the operand.
+
+            Returns:
+                - [Writer]: A function that takes the active base pointer and the value to store.
+        """
+        values = self.__values
+        if mode == Addressing.FRAME:
+            def write(bp, value):
+                values[bp + location] = value
+        elif mode == Addressing.ABSOLUTE:
+            def write(bp, value):
+                values[location] = value
+        elif mode == Addressing.INDIRECT:
+            def write(bp, value):
+                storage, offset = values[bp + location]
+                storage.store(offset, value)
+        else:
+            def write(bp, value):
+                self.__instance_slots[location] = value
+        return write
+
+    def compile_goto(self, instruction: Instruction) -> CompiledInstruction:
+        target = instruction.args[0]
+
+        def goto(bp):
+            return target
+        return goto
+
+    def compile_conditional_jump(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, target = instruction.args
+        read = self.reader(location, mode)
+        next_ip = instruction.next_ip
+
+        if instruction.opcode == Opcodes.GOTOF:
+            def go_to_f(bp):
+                if read(bp) == False:
+                    return target
+                return next_ip
+            return go_to_f
+
+        def go_to_t(bp):
+            if read(bp) == True:
+                return target
+            return next_ip
+        return go_to_t
+
+    def compile_assign(self, instruction: Instruction) -> CompiledInstruction:
+        to_location, to_mode, from_location, from_mode = instruction.args
+        write = self.writer(to_location, to_mode)
+        read = self.reader(from_location, from_mode)
+        next_ip = instruction.next_ip
+
+        def assign(bp):
+            write(bp, read(bp))
+            return next_ip
+        return assign
+
+    def compile_expression(self, instruction: Instruction) -> CompiledInstruction:
+        l_location, l_mode, r_location, r_mode, result_location, result_mode = instruction.args
+        operation = ClosureVirtualMachine.__expression_operations[instruction.opcode]
+        read_l = self.reader(l_location, l_mode)
+        read_r = self.reader(r_location, r_mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def solve_expression(bp):
+            write(bp, operation(read_l(bp), read_r(bp)))
+            return next_ip
+        return solve_expression
+
+    def compile_not(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, result_location, result_mode = instruction.args
+        read = self.reader(location, mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def not_op(bp):
+            write(bp, not read(bp))
+            return next_ip
+        return not_op
+
+    def compile_read(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, read_type = instruction.args
+        write = self.writer(location, mode)
+        next_ip = instruction.next_ip
+
+        def read(bp):
+            write(bp, Types.parse(input(), read_type))
+            return next_ip
+        return read
+
+    def compile_write(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode = instruction.args
+        read = self.reader(location, mode)
+        next_ip = instruction.next_ip
+
+        def write(bp):
+            print(read(bp))
+            return next_ip
+        return write
+
+    def compile_verify_access(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, lower_bound, upper_bound = instruction.args
+        read = self.reader(location, mode)
+        next_ip = instruction.next_ip
+
+        def verify_access(bp):
+            index = read(bp)
+            if not (lower_bound <= index < upper_bound):
+                raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+            return next_ip
+        return verify_access
+
+    def compile_literal_product(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, m, result_location, result_mode = instruction.args
+        read = self.reader(location, mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def literal_product(bp):
+            write(bp, read(bp) * m)
+            return next_ip
+        return literal_product
+
+    def compile_literal_add(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, base, base_mode, result_location, result_mode = instruction.args
+        read = self.reader(location, mode)
+        read_base = self.reader(base, base_mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def literal_add(bp):
+            write(bp, (read_base(bp), read(bp)))
+            return next_ip
+        return literal_add
+
+    def compile_resolve_pointer(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, result_location, result_mode = instruction.args
+        read = self.reader(location, mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def resolve_pointer(bp):
+            write(bp, read(bp))
+            return next_ip
+        return resolve_pointer
+
+    def compile_scaled_index(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, lower_bound, upper_bound, m, result_offset = instruction.args
+        read = self.reader(location, mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def scaled_index(bp):
+            index = read(bp)
+            if not (lower_bound <= index < upper_bound):
+                raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+            values[bp + result_offset] = index * m
+            return next_ip
+        return scaled_index
+
+    def compile_offset_load(self, instruction: Instruction) -> CompiledInstruction:
+        offset_location, offset_mode, base, base_mode, pointer_offset, to_location, to_mode = instruction.args
+        read_offset = self.reader(offset_location, offset_mode)
+        read_base = self.reader(base, base_mode)
+        write = self.writer(to_location, to_mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def offset_load(bp):
+            storage = read_base(bp)
+            offset = read_offset(bp)
+            values[bp + pointer_offset] = (storage, offset)
+            write(bp, storage.load(offset))
+            return next_ip
+        return offset_load
+
+    def compile_offset_store(self, instruction: Instruction) -> CompiledInstruction:
+        offset_location, offset_mode, base, base_mode, pointer_offset, from_location, from_mode = instruction.args
+        read_offset = self.reader(offset_location, offset_mode)
+        read_base = self.reader(base, base_mode)
+        read = self.reader(from_location, from_mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def offset_store(bp):
+            storage = read_base(bp)
+            offset = read_offset(bp)
+            values[bp + pointer_offset] = (storage, offset)
+            storage.store(offset, read(bp))
+            return next_ip
+        return offset_store
+
+    def compile_index_load(self, instruction: Instruction) -> CompiledInstruction:
+        (location, mode, lower_bound, upper_bound, m, offset_offset,
+         base, base_mode, pointer_offset, to_location, to_mode) = instruction.args
+        read_index = self.reader(location, mode)
+        read_base = self.reader(base, base_mode)
+        write = self.writer(to_location, to_mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def index_load(bp):
+            index = read_index(bp)
+            if not (lower_bound <= index < upper_bound):
+                raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+            offset = index * m
+            storage = read_base(bp)
+            values[bp + offset_offset] = offset
+            values[bp + pointer_offset] = (storage, offset)
+            write(bp, storage.load(offset))
+            return next_ip
+        return index_load
+
+    def compile_index_store(self, instruction: Instruction) -> CompiledInstruction:
+        (location, mode, lower_bound, upper_bound, m, offset_offset,
+         base, base_mode, pointer_offset, from_location, from_mode) = instruction.args
+        read_index = self.reader(location, mode)
+        read_base = self.reader(base, base_mode)
+        read = self.reader(from_location, from_mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def index_store(bp):
+            index = read_index(bp)
+            if not (lower_bound <= index < upper_bound):
+                raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+            offset = index * m
+            storage = read_base(bp)
+            values[bp + offset_offset] = offset
+            values[bp + pointer_offset] = (storage, offset)
+            storage.store(offset, read(bp))
+            return next_ip
+        return index_store
+
+    def compile_array_fill(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, array_location, array_mode = instruction.args
+        read = self.reader(location, mode)
+        read_array = self.reader(array_location, array_mode)
+        next_ip = instruction.next_ip
+
+        def array_fill(bp):
+            read_array(bp).fill(read(bp))
+            return next_ip
+        return array_fill
+
+    def compile_array_copy(self, instruction: Instruction) -> CompiledInstruction:
+        location, mode, array_location, array_mode = instruction.args
+        read = self.reader(location, mode)
+        read_array = self.reader(array_location, array_mode)
+        next_ip = instruction.next_ip
+
+        def array_copy(bp):
+            read_array(bp).assign(read(bp))
+            return next_ip
+        return array_copy
+
+    def compile_array_elementwise(self, instruction: Instruction) -> CompiledInstruction:
+        opcode, l_location, l_mode, r_location, r_mode, array_location, array_mode = instruction.args
+        operation = ClosureVirtualMachine.__expression_operations[opcode]
+        read_l = self.reader(l_location, l_mode)
+        read_r = self.reader(r_location, r_mode)
+        read_array = self.reader(array_location, array_mode)
+        next_ip = instruction.next_ip
+
+        def array_elementwise(bp):
+            read_array(bp).elementwise(operation, read_l(bp), read_r(bp))
+            return next_ip
+        return array_elementwise
+
+    def compile_array_matmul(self, instruction: Instruction) -> CompiledInstruction:
+        l_location, l_mode, r_location, r_mode, array_location, array_mode = instruction.args
+        read_l = self.reader(l_location, l_mode)
+        read_r = self.reader(r_location, r_mode)
+        read_array = self.reader(array_location, array_mode)
+        next_ip = instruction.next_ip
+
+        def array_matmul(bp):
+            read_array(bp).matmul(read_l(bp), read_r(bp))
+            return next_ip
+        return array_matmul
+
+    def compile_array_sum(self, instruction: Instruction) -> CompiledInstruction:
+        array_location, array_mode, result_location, result_mode = instruction.args
+        read_array = self.reader(array_location, array_mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def array_sum(bp):
+            write(bp, read_array(bp).sum())
+            return next_ip
+        return array_sum
+
+    def compile_array_dot(self, instruction: Instruction) -> CompiledInstruction:
+        l_location, l_mode, r_location, r_mode, result_location, result_mode = instruction.args
+        read_l = self.reader(l_location, l_mode)
+        read_r = self.reader(r_location, r_mode)
+        write = self.writer(result_location, result_mode)
+        next_ip = instruction.next_ip
+
+        def array_dot(bp):
+            write(bp, read_l(bp).dot(read_r(bp)))
+            return next_ip
+        return array_dot
+
+    def compile_compare_jump(self, instruction: Instruction) -> CompiledInstruction:
+        opcode, l_location, l_mode, r_location, r_mode, result_offset, target = instruction.args
+        operation = ClosureVirtualMachine.__expression_operations[opcode]
+        read_l = self.reader(l_location, l_mode)
+        read_r = self.reader(r_location, r_mode)
+        values = self.__values
+        next_ip = instruction.next_ip
+
+        def compare_jump(bp):
+            result = operation(read_l(bp), read_r(bp))
+            values[bp + result_offset] = result
+            if result == False:
+                return target
+            return next_ip
+        return compare_jump
+
+    def compile_era(self, instruction: Instruction) -> CompiledInstruction:
+        args = instruction.args
+        next_ip = instruction.next_ip
+        acquire = self.__frame_pool.acquire
+        push = self.__memory_stack.push
+        frame_layout = args[-1]
+
+        if args[0] == "constructor":
+            class_name = args[1]
+            instance_size = Compiler._class_directory.search(class_name).instance_memory.actual_memory_needed()
+
+            def era_constructor(bp):
+                push(acquire(RuntimeMemory(instance_size, class_name), frame_layout))
+                return next_ip
+            return era_constructor
+
+        if args[0] == "self":
+            def era_self(bp):
+                push(acquire(self.__method_memory.instance_memory, frame_layout))
+                return next_ip
+            return era_self
+
+        read_instance = self.reader(args[0], args[1])
+
+        def era_instance(bp):
+            push(acquire(read_instance(bp), frame_layout))
+            return next_ip
+        return era_instance
+
+    def compile_param(self, instruction: Instruction) -> CompiledInstruction:
+        from_location, from_mode, to_offset = instruction.args
+        top = self.__memory_stack.top
+        values = self.__values
+        next_ip = instruction.next_ip
+        read = self.reader(from_location, from_mode)
+
+        def param(bp):
+            values[top().base_pointer + to_offset] = read(bp)
+            return next_ip
+        return param
+
+    def compile_go_sub(self, instruction: Instruction) -> CompiledInstruction:
+        target = instruction.args[1]
+        return_ip = instruction.next_ip
+        memory_stack = self.__memory_stack
+        push_jump = self.__jump_stack.push
+
+        def go_sub(bp):
+            push_jump(return_ip)
+            method_memory = memory_stack.pop()
+            memory_stack.push(self.__method_memory)
+            self.switch_memory(method_memory)
+            return target
+        return go_sub
+
+    def compile_virtual_call(self, instruction: Instruction) -> CompiledInstruction:
+        cache = instruction.args[2]
+        targets = cache.targets
+        miss = cache.miss
+        return_ip = instruction.next_ip
+        memory_stack = self.__memory_stack
+        push_jump = self.__jump_stack.push
+        frame_layout_at = self.__frame_layout_at
+
+        def virtual_call(bp):
+            method_memory = memory_stack.pop()
+            class_name = method_memory.instance_memory.class_name
+            target = targets.get(class_name)
+            if target is None:
+                target = miss(class_name)
+            frame_layout = frame_layout_at(target)
+            if method_memory.frame_layout is not frame_layout:
+                method_memory.relayout(frame_layout)
+            push_jump(return_ip)
+            memory_stack.push(self.__method_memory)
+            self.switch_memory(method_memory)
+            return target
+        return virtual_call
+
+    def compile_memo_call(self, instruction: Instruction) -> CompiledInstruction:
+        _, target, cache, argument_offsets, return_index, memo_return = instruction.args
+        next_ip = instruction.next_ip
+        values = self.__values
+        memory_stack = self.__memory_stack
+        push_jump = self.__jump_stack.push
+        release = self.__frame_pool.release
+        lookup = cache.lookup
+        missing = MemoCache.MISSING
+
+        def memo_call(bp):
+            base_pointer = memory_stack.top().base_pointer
+            key = call_key(values, base_pointer, argument_offsets)
+            result = lookup(key)
+            if result is not missing:
+                release(memory_stack.pop())
+                values[return_index] = result
+                return next_ip
+
+            cache.begin(key)
+            push_jump(memo_return)
+            method_memory = memory_stack.pop()
+            memory_stack.push(self.__method_memory)
+            self.switch_memory(method_memory)
+            return target
+        return memo_call
+
+    def compile_memo_return(self, instruction: Instruction) -> CompiledInstruction:
+        cache, return_index, next_ip = instruction.args
+        values = self.__values
+        complete = cache.complete
+
+        def memo_return(bp):
+            complete(values[return_index])
+            return next_ip
+        return memo_return
+
+    def compile_tail_call(self, instruction: Instruction) -> CompiledInstruction:
+        target = instruction.args[1]
+        pop = self.__memory_stack.pop
+        recycle = self.__frame_pool.recycle
+
+        def tail_call(bp):
+            method_memory = pop()
+            self.__method_memory.adopt(method_memory)
+            recycle(method_memory)
+            self.switch_memory(self.__method_memory)
+            return target
+        return tail_call
+
+    def compile_return(self, instruction: Instruction) -> CompiledInstruction:
+        next_ip = instruction.next_ip
+        memory_stack = self.__memory_stack
+        jump_stack = self.__jump_stack
+        release = self.__frame_pool.release
+
+        if instruction.args:
+            # The return variable of a constructor is global, so it is stored before the swap.
+            write_return = self.writer(*instruction.args)
+
+            def return_constructor(bp):
+                # The return from Main will not have a next memory.
+                if jump_stack.isEmpty():
+                    return next_ip
+                memory = self.__method_memory
+                write_return(bp, memory.instance_memory)
+                release(memory)
+                self.switch_memory(memory_stack.pop())
+                return jump_stack.pop()
+            return return_constructor
+
+        def return_op(bp):
+            if jump_stack.isEmpty():
+                return next_ip
+            release(self.__method_memory)
+            self.switch_memory(memory_stack.pop())
+            return jump_stack.pop()
+        return return_op
+
+    def compile_end_func(self, instruction: Instruction) -> CompiledInstruction:
+        jump_stack = self.__jump_stack
+
+        def end_func(bp):
+            if jump_stack.isEmpty():
+                # END PROGRAM
+                return VirtualMachine.HALT
+            return jump_stack.pop()
+        return end_func
@@ -0,0 +1,328 @@
+from enum import IntEnum
+from helpers.operations import Operations
+from helpers.quads import ELEMENTWISE_OPERATIONS
+from scope.variable import Variable
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .memory_layout import MemoryLayout
+
+
+class Opcodes(IntEnum):
+    """ Integer operation codes used by the decoded instruction stream. There is one
+        opcode for every Operations member that can appear in a quad, followed by the
+        superinstructions built by the Fuser, the instructions built by the Memoizer, the
+        calls built by the Dispatcher and the built-in operations on dimensional variables.
+    """
+    GOTO = 0
+    GOTOF = 1
+    GOTOT = 2
+    ASSIGN = 3
+    ADD = 4
+    SUBS = 5
+    PROD = 6
+    DIV = 7
+    AND = 8
+    OR = 9
+    EQUAL = 10
+    NOT_EQUAL = 11
+    GREATER = 12
+    GREATER_EQUAL_THAN = 13
+    LESS = 14
+    LESS_EQUAL_THAN = 15
+    NOT = 16
+    READ = 17
+    WRITE = 18
+    RETURN = 19
+    VER_ACCS = 20
+    ERA = 21
+    PARAM = 22
+    GOSUB = 23
+    END_FUNC = 24
+    PROD_LIT = 25
+    ADD_LIT = 26
+    RES_POINTER = 27
+
+    # Superinstructions.
+    INDEX_LOAD = 28
+    INDEX_STORE = 29
+    SCALED_INDEX = 30
+    OFFSET_LOAD = 31
+    OFFSET_STORE = 32
+    COMPARE_JUMP = 33
+    TAIL_CALL = 34
+
+    # Memoized calls, see Memoizer.
+    MEMO_CALL = 35
+    MEMO_RETURN = 36
+
+    # Calls dispatched on the class of the instance, see Dispatcher.
+    VIRTUAL_CALL = 37
+
+    # Built-in operations on dimensional variables.
+    FILL = 38
+    COPY = 39
+    ARRAY_ADD = 40
+    ARRAY_SUBS = 41
+    ARRAY_PROD = 42
+    ARRAY_DIV = 43
+    MATMUL = 44
+    SUM = 45
+    DOT = 46
+
+    @staticmethod
+    def from_operation(op: Operations) -> "Opcodes":
+        """ Maps an Operations member to its integer opcode.
+
+            Arguments:
+                - op [Operations]: The operation of a quad.
+
+            Returns:
+                - [Opcodes]: The opcode for the operation.
+        """
+        return Opcodes[op.name]
+
+
+class Addressing:
+    """ Addressing modes of a decoded operand, see MemoryLayout.
+
+        FRAME: The operand is an offset from the base pointer of the current frame.
+        INDIRECT: The operand is the frame offset of an array pointer, which holds the
+            ArrayStorage and the offset of the value.
+        ABSOLUTE: The operand is the absolute index of a global variable or a constant.
+        INSTANCE: The operand is a slot of the memory of the current instance.
+    """
+    FRAME = 0
+    INDIRECT = 1
+    ABSOLUTE = 2
+    INSTANCE = 3
+
+
+class Instruction:
+    """ A quad decoded at load time.
+
+        The main parts of the Instruction are:
+            opcode [Opcodes]: The integer opcode of the instruction.
+            handler [Callable[[Instruction], int]]: The handler that executes the instruction and
+                returns the next instruction pointer.
+            ip [int]: The address of the instruction.
+            next_ip [int]: The address of the instruction that follows this one.
+            args [Tuple]: The operands, already resolved to locations of the RegisterFile and literals.
+            quad [Tuple]: The quad this instruction was decoded from. For a superinstruction, the
+                quads of the fused chain.
+    """
+    __slots__ = ("opcode", "handler", "ip", "next_ip", "args", "quad")
+
+    def __init__(self, opcode: Opcodes, handler: Callable, ip: int, args: Tuple, quad: Tuple):
+        self.opcode = opcode
+        self.handler = handler
+        self.ip = ip
+        self.next_ip = ip + 1
+        self.args = args
+        self.quad = quad
+
+    def __repr__(self):
+        return f"<{self.ip}: {self.opcode.name} {self.args}>"
+
+
+class Decoder:
+    """ The Decoder is responsible for turning the quads generated by the compiler into a
+        list of Instructions, so the VirtualMachine does not need to inspect Operations or
+        Variables while it runs.
+
+        Every operand is resolved by the MemoryLayout to a location and an Addressing mode,
+        using the frame of the method the quad belongs to.
+
+        The main parts of the Decoder are:
+            __layout [MemoryLayout]: Resolves the addresses of the quads.
+            __handlers [Dict[Operations, Callable]]: The handler to bind to each operation. When
+                no handlers are provided the instructions are decoded without one.
+            __decoders [Dict[Operations, Callable]]: Maps each operation to the function that
+                resolves the operands of its quad.
+            __pending_calls [List[FrameLayout]]: The frame layouts of the ERAs whose GOSUB has
+                not been decoded yet, the arguments of a PARAM are resolved in the frame of the
+                innermost one.
+    """
+
+    def __init__(self, layout: "MemoryLayout", handlers: Optional[Dict[Operations, Callable]] = None):
+        self.__layout = layout
+        self.__handlers = handlers
+        self.__pending_calls = []
+        self.__decoders = {
+            Operations.GOTO: self.decode_jump,
+            Operations.GOTOF: self.decode_conditional_jump,
+            Operations.GOTOT: self.decode_conditional_jump,
+            Operations.ASSIGN: self.decode_assign,
+
+            Operations.ADD: self.decode_expression,
+            Operations.SUBS: self.decode_expression,
+            Operations.PROD: self.decode_expression,
+            Operations.DIV: self.decode_expression,
+            Operations.AND: self.decode_expression,
+            Operations.OR: self.decode_expression,
+            Operations.EQUAL: self.decode_expression,
+            Operations.NOT_EQUAL: self.decode_expression,
+            Operations.GREATER: self.decode_expression,
+            Operations.GREATER_EQUAL_THAN: self.decode_expression,
+            Operations.LESS: self.decode_expression,
+            Operations.LESS_EQUAL_THAN: self.decode_expression,
+            Operations.NOT: self.decode_not,
+
+            Operations.READ: self.decode_read,
+            Operations.WRITE: self.decode_write,
+            Operations.RETURN: self.decode_return,
+            Operations.VER_ACCS: self.decode_verify_access,
+            Operations.ERA: self.decode_era,
+            Operations.PARAM: self.decode_param,
+            Operations.GOSUB: self.decode_go_sub,
+            Operations.END_FUNC: self.decode_end_func,
+            Operations.PROD_LIT: self.decode_literal_product,
+            Operations.ADD_LIT: self.decode_literal_add,
+            Operations.RES_POINTER: self.decode_resolve_pointer,
+
+            Operations.FILL: self.decode_array_operation,
+            Operations.COPY: self.decode_array_operation,
+            Operations.ARRAY_ADD: self.decode_elementwise,
+            Operations.ARRAY_SUBS: self.decode_elementwise,
+            Operations.ARRAY_PROD: self.decode_elementwise,
+            Operations.ARRAY_DIV: self.decode_elementwise,
+            Operations.MATMUL: self.decode_array_operation,
+            Operations.SUM: self.decode_array_operation,
+            Operations.DOT: self.decode_array_operation,
+        }
+
+    def decode(self, quads: List[Tuple]) -> List[Instruction]:
+        """ Decodes the whole quad list.
+
+            Arguments:
+                - quads [List[Tuple]]: The quads generated by the compiler.
+
+            Returns:
+                - [List[Instruction]]: One instruction per quad, in the same order.
+        """
+        self.__pending_calls = []
+        return [self.decode_quad(ip, quad) for ip, quad in enumerate(quads)]
+
+    def decode_quad(self, ip: int, quad: Tuple) -> Instruction:
+        """ Decodes a single quad.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+                - quad [Tuple]: The quad to decode.
+
+            Returns:
+                - [Instruction]: The decoded instruction.
+
+            Raises:
+                - NotImplementedError: If the operation of the quad has no handler.
+        """
+        op = quad[0]
+        if self.__handlers is None:
+            handler = None
+        elif op in self.__handlers:
+            handler = self.__handlers[op]
+        else:
+            raise NotImplementedError(f"Operation {op} has no handler in the virtual machine.")
+
+        args = self.__decoders[op](quad, ip)
+        return Instruction(Opcodes.from_operation(op), handler, ip, args, quad)
+
+    def decode_jump(self, quad: Tuple, ip: int) -> Tuple[int]:
+        """ (GOTO, None, target) -> (target,) """
+        return (quad[2],)
+
+    def decode_conditional_jump(self, quad: Tuple, ip: int) -> Tuple[int, int, int]:
+        """ (GOTOF | GOTOT, condition, target) -> (location, mode, target) """
+        return self.__layout.resolve(quad[1], ip) + (quad[2],)
+
+    def decode_assign(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int]:
+        """ (ASSIGN, to, from[, address]) -> (to location, to mode, from location, from mode) """
+        return self.__layout.resolve(quad[1], ip) + self.__layout.resolve(quad[2], ip)
+
+    def decode_expression(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int, int, int]:
+        """ (op, left, right, result)
+            -> (left location, left mode, right location, right mode, result location, result mode) """
+        return (self.__layout.resolve(quad[1], ip) + self.__layout.resolve(quad[2], ip)
+                + self.__layout.resolve_address(quad[3], ip))
+
+    def decode_not(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int]:
+        """ (NOT, operand, result) -> (location, mode, result location, result mode) """
+        return self.__layout.resolve(quad[1], ip) + self.__layout.resolve_address(quad[2], ip)
+
+    def decode_read(self, quad: Tuple, ip: int) -> Tuple[int, int, str]:
+        """ (READ, temp) -> (location, mode, type) """
+        return self.__layout.resolve(quad[1], ip) + (quad[1].var_type,)
+
+    def decode_write(self, quad: Tuple, ip: int) -> Tuple[int, int]:
+        """ (WRITE, operand) -> (location, mode) """
+        return self.__layout.resolve(quad[1], ip)
+
+    def decode_return(self, quad: Tuple, ip: int) -> Tuple[Any, ...]:
+        """ (RETURN,) -> () and (RETURN, "constructor", return) -> (return location, return mode) """
+        if len(quad) > 1 and quad[1] == "constructor":
+            return self.__layout.resolve(quad[2], ip)
+        return ()
+
+    def decode_verify_access(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int]:
+        """ (VER_ACCS, index, lower, upper) -> (location, mode, lower, upper) """
+        return self.__layout.resolve(quad[1], ip) + (quad[2], quad[3])
+
+    def decode_era(self, quad: Tuple, ip: int) -> Tuple[Any, ...]:
+        """ (ERA, "self" | "constructor" | instance, name, scope)
+            -> (kind, name, frame layout) or (location, mode, name, frame layout) """
+        frame_layout = self.__layout.method_frame_layout(quad[3])
+        self.__pending_calls.append(frame_layout)
+        if isinstance(quad[1], Variable):
+            return self.__layout.resolve(quad[1], ip) + (quad[2], frame_layout)
+        return (quad[1], quad[2], frame_layout)
+
+    def decode_param(self, quad: Tuple, ip: int) -> Tuple[int, int, int]:
+        """ (PARAM, from, to) -> (from location, from mode, to offset in the called frame)
+
+            A dimensional variable is passed by reference, its location holds its ArrayStorage.
+        """
+        return self.__layout.resolve(quad[1], ip) + (self.__pending_calls[-1].offset(quad[2].memory_space),)
+
+    def decode_go_sub(self, quad: Tuple, ip: int) -> Tuple[str, int]:
+        """ (GOSUB, name, target) -> (name, target) """
+        if self.__pending_calls:
+            self.__pending_calls.pop()
+        return (quad[1], quad[2])
+
+    def decode_end_func(self, quad: Tuple, ip: int) -> Tuple:
+        """ (END_FUNC,) -> () """
+        return ()
+
+    def decode_literal_product(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int, int]:
+        """ (PROD_LIT, operand, literal, result) -> (location, mode, literal, result location, result mode) """
+        return self.__layout.resolve(quad[1], ip) + (quad[2],) + self.__layout.resolve(quad[3], ip)
+
+    def decode_literal_add(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int, int, int]:
+        """ (ADD_LIT, offset, base address, pointer)
+            -> (location, mode, base location, base mode, pointer location, pointer mode)
+
+            The base is the first element of a dimensional variable, so its mode is FRAME or ABSOLUTE.
+        """
+        return (self.__layout.resolve(quad[1], ip) + self.__layout.resolve_address(quad[2], ip)
+                + self.__layout.resolve_address(quad[3].memory_space, ip))
+
+    def decode_resolve_pointer(self, quad: Tuple, ip: int) -> Tuple[int, int, int, int]:
+        """ (RES_POINTER, operand, result) -> (location, mode, result location, result mode) """
+        return self.__layout.resolve(quad[1], ip) + self.__layout.resolve(quad[2], ip)
+
+    def decode_array_operation(self, quad: Tuple, ip: int) -> Tuple[int, ...]:
+        """ (FILL | COPY, value | source, array), (MATMUL, left, right, array), (SUM, array, result)
+            and (DOT, left, right, result) -> (location, mode) of every operand
+
+            A dimensional variable resolves to the slot of its ArrayStorage.
+        """
+        args = ()
+        for operand in quad[1:]:
+            args += self.__layout.resolve(operand, ip)
+        return args
+
+    def decode_elementwise(self, quad: Tuple, ip: int) -> Tuple[int, ...]:
+        """ (ARRAY_ADD | ARRAY_SUBS | ARRAY_PROD | ARRAY_DIV, left, right, array)
+            -> (opcode of the operation on the elements, left location, left mode, right location,
+                right mode, array location, array mode) """
+        return (Opcodes.from_operation(ELEMENTWISE_OPERATIONS[quad[0]]),) + self.decode_array_operation(quad, ip)
@@ -0,0 +1,125 @@
+from compilation.compiler import Compiler
+from .decoder import Instruction, Opcodes
+from typing import Callable, Dict, List, Optional
+
+
+class InlineCache:
+    """ The InlineCache of a call site remembers the method each class of instance runs, so a call
+        to an overridden method is a single lookup once its classes were seen.
+
+        The main parts of the InlineCache are:
+            __name [str]: The name of the method called.
+            __targets [Dict[str, int]]: The instruction pointer of the method each class runs.
+            __misses [int]: The amount of classes looked up in their method table.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__targets: Dict[str, int] = {}
+        self.__misses = 0
+
+    def __len__(self):
+        return len(self.__targets)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def targets(self) -> Dict[str, int]:
+        """ The targets found so far, the machines look them up directly and only call miss when
+            the class is not there.
+
+            Returns:
+                - [Dict[str, int]]: The instruction pointer of the method of every class.
+        """
+        return self.__targets
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    def miss(self, class_name: str) -> int:
+        """ Resolves the method a class runs with its method table and caches it.
+
+            Arguments:
+                - class_name [str]: The class of the instance called.
+
+            Returns:
+                - [int]: The instruction pointer of the method.
+        """
+        self.__misses += 1
+        target = Compiler._class_directory.search(class_name).method_table[self.__name].instruction_pointer
+        self.__targets[class_name] = target
+        return target
+
+    def lookup(self, class_name: str) -> int:
+        """ Gets the method a class runs.
+
+            Arguments:
+                - class_name [str]: The class of the instance called.
+
+            Returns:
+                - [int]: The instruction pointer of the method.
+        """
+        target = self.__targets.get(class_name)
+        return self.miss(class_name) if target is None else target
+
+
+class Dispatcher:
+    """ The Dispatcher replaces the calls to overridden methods with VIRTUAL_CALL instructions, which
+        run the method of the class of the instance instead of the one the compiler resolved from the
+        type of the variable, see ClassScope.method_table.
+
+        Every call site gets its own InlineCache. The methods that override each other take the same
+        arguments and have frames of the same size, so the ERA and PARAM instructions of the call do
+        not change. The machines give the frame the layout of the method that runs, so its
+        dimensional variables get their storage. The calls to methods that are never overridden keep
+        their GOSUB.
+
+        The main parts of the Dispatcher are:
+            __handlers [Dict[Opcodes, Callable]]: The handler to bind to VIRTUAL_CALL. When no
+                handlers are provided the instructions are built without one.
+            __caches [Dict[int, InlineCache]]: The cache of every call site, by the address of its call.
+    """
+
+    def __init__(self, handlers: Optional[Dict[Opcodes, Callable]] = None):
+        self.__handlers = handlers
+        self.__caches: Dict[int, InlineCache] = {}
+
+    @property
+    def caches(self) -> Dict[int, InlineCache]:
+        return self.__caches
+
+    def dispatch(self, program: List[Instruction]) -> List[Instruction]:
+        """ Replaces every GOSUB to an overridden method of the program with a VIRTUAL_CALL.
+
+            Arguments:
+                - program [List[Instruction]]: The decoded instructions.
+
+            Returns:
+                - [List[Instruction]]: The instructions with the dispatched calls replaced.
+
+            Raises:
+                - NotImplementedError: If VIRTUAL_CALL has no handler.
+        """
+        overridden = set()
+        for class_scope in Compiler._class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                if method_scope.overridden:
+                    overridden.add(method_scope.instruction_pointer)
+
+        dispatched = list(program)
+        for instruction in program:
+            if instruction.opcode != Opcodes.GOSUB or instruction.args[1] not in overridden:
+                continue
+            if self.__handlers is None:
+                handler = None
+            elif Opcodes.VIRTUAL_CALL in self.__handlers:
+                handler = self.__handlers[Opcodes.VIRTUAL_CALL]
+            else:
+                raise NotImplementedError(f"Instruction {Opcodes.VIRTUAL_CALL.name} has no handler in the virtual machine.")
+            cache = self.__caches.setdefault(instruction.ip, InlineCache(instruction.args[0]))
+            dispatched[instruction.ip] = Instruction(Opcodes.VIRTUAL_CALL, handler, instruction.ip,
+                                                     instruction.args + (cache,), instruction.quad)
+        return dispatched
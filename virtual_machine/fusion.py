@@ -0,0 +1,222 @@
+from .decoder import Addressing, Instruction, Opcodes
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+RELATIONAL_OPCODES = (
+    Opcodes.GREATER,
+    Opcodes.GREATER_EQUAL_THAN,
+    Opcodes.LESS,
+    Opcodes.LESS_EQUAL_THAN,
+    Opcodes.EQUAL,
+    Opcodes.NOT_EQUAL,
+)
+
+
+class FusionPattern:
+    """ A chain of consecutive instructions that can run as a single superinstruction.
+
+        The main parts of the FusionPattern are:
+            opcode [Opcodes]: The opcode of the superinstruction.
+            sequence [Tuple[Tuple[Opcodes, ...], ...]]: The opcodes accepted at each position of the chain.
+            match [Callable[[List[Instruction]], Optional[Tuple]]]: Checks that the operands of the chain
+                are connected and returns the arguments of the superinstruction, or None when the chain
+                cannot be fused.
+    """
+
+    def __init__(self, opcode: Opcodes, sequence: Tuple[Tuple[Opcodes, ...], ...],
+                 match: Callable[[List[Instruction]], Optional[Tuple]]):
+        self.opcode = opcode
+        self.sequence = sequence
+        self.match = match
+
+    def __len__(self):
+        return len(self.sequence)
+
+    def accepts(self, chain: List[Instruction]) -> bool:
+        """ Whether the opcodes of the chain follow the sequence of the pattern.
+
+            Arguments:
+                - chain [List[Instruction]]: The instructions to check.
+
+            Returns:
+                - [bool]: If every instruction has one of the opcodes expected at its position.
+        """
+        return len(chain) == len(self.sequence) and all(
+            instruction.opcode in opcodes for instruction, opcodes in zip(chain, self.sequence))
+
+
+def match_scaled_index(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (VER_ACCS i) (PROD_LIT i, m, t)
+        -> (index location, index mode, lower, upper, m, t) """
+    verify, product = chain
+    if verify.args[:2] != product.args[:2] or product.args[4] != Addressing.FRAME:
+        return None
+    return verify.args + product.args[2:4]
+
+
+def match_offset_load(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (ADD_LIT t, base, p) (ASSIGN to, *p)
+        -> (t location, t mode, base location, base mode, p, to location, to mode) """
+    add, assign = chain
+    pointer = add.args[4]
+    if add.args[5] != Addressing.FRAME or assign.args[2:] != (pointer, Addressing.INDIRECT):
+        return None
+    return add.args[:5] + assign.args[:2]
+
+
+def match_offset_store(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (ADD_LIT t, base, p) (ASSIGN *p, from)
+        -> (t location, t mode, base location, base mode, p, from location, from mode) """
+    add, assign = chain
+    pointer = add.args[4]
+    if add.args[5] != Addressing.FRAME or assign.args[:2] != (pointer, Addressing.INDIRECT):
+        return None
+    if assign.args[2:] in ((pointer, Addressing.FRAME), (pointer, Addressing.INDIRECT)):
+        return None
+    return add.args[:5] + assign.args[2:]
+
+
+def match_index_load(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (VER_ACCS i) (PROD_LIT i, m, t) (ADD_LIT t, base, p) (ASSIGN to, *p)
+        -> (index location, index mode, lower, upper, m, t, base location, base mode, p, to location, to mode) """
+    scaled = match_scaled_index(chain[:2])
+    if scaled is None or chain[2].args[:2] != (scaled[5], Addressing.FRAME):
+        return None
+    offset = match_offset_load(chain[2:])
+    if offset is None:
+        return None
+    return scaled + offset[2:]
+
+
+def match_index_store(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (VER_ACCS i) (PROD_LIT i, m, t) (ADD_LIT t, base, p) (ASSIGN *p, from)
+        -> (index location, index mode, lower, upper, m, t, base location, base mode, p, from location, from mode) """
+    scaled = match_scaled_index(chain[:2])
+    if scaled is None or chain[2].args[:2] != (scaled[5], Addressing.FRAME):
+        return None
+    offset = match_offset_store(chain[2:])
+    if offset is None:
+        return None
+    return scaled + offset[2:]
+
+
+def match_compare_jump(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (relational l, r, c) (GOTOF c, target)
+        -> (relational opcode, l location, l mode, r location, r mode, c, target) """
+    compare, jump = chain
+    if compare.args[5] != Addressing.FRAME or jump.args[:2] != compare.args[4:]:
+        return None
+    return (compare.opcode,) + compare.args[:5] + (jump.args[2],)
+
+
+def match_tail_call(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (GOSUB target) (ASSIGN t, r) (ASSIGN r, t) (RETURN)
+        -> (name, target)
+
+        The called method stores its result in the return variable of the current method, so
+        nothing is left to do after it returns.
+    """
+    go_sub, load, store, ret = chain
+    if ret.args or load.args[1] != Addressing.FRAME:
+        return None
+    if load.args[:2] != store.args[2:] or load.args[2:] != store.args[:2]:
+        return None
+    return go_sub.args
+
+
+def match_void_tail_call(chain: List[Instruction]) -> Optional[Tuple]:
+    """ (GOSUB target) (RETURN)
+        -> (name, target) """
+    go_sub, ret = chain
+    if ret.args:
+        return None
+    return go_sub.args
+
+
+# The patterns are tried in order at every instruction, so longer chains come first.
+FUSION_PATTERNS = [
+    FusionPattern(Opcodes.INDEX_LOAD,
+                  ((Opcodes.VER_ACCS,), (Opcodes.PROD_LIT,), (Opcodes.ADD_LIT,), (Opcodes.ASSIGN,)),
+                  match_index_load),
+    FusionPattern(Opcodes.INDEX_STORE,
+                  ((Opcodes.VER_ACCS,), (Opcodes.PROD_LIT,), (Opcodes.ADD_LIT,), (Opcodes.ASSIGN,)),
+                  match_index_store),
+    FusionPattern(Opcodes.SCALED_INDEX, ((Opcodes.VER_ACCS,), (Opcodes.PROD_LIT,)), match_scaled_index),
+    FusionPattern(Opcodes.OFFSET_LOAD, ((Opcodes.ADD_LIT,), (Opcodes.ASSIGN,)), match_offset_load),
+    FusionPattern(Opcodes.OFFSET_STORE, ((Opcodes.ADD_LIT,), (Opcodes.ASSIGN,)), match_offset_store),
+    FusionPattern(Opcodes.COMPARE_JUMP, (RELATIONAL_OPCODES, (Opcodes.GOTOF,)), match_compare_jump),
+    FusionPattern(Opcodes.TAIL_CALL,
+                  ((Opcodes.GOSUB,), (Opcodes.ASSIGN,), (Opcodes.ASSIGN,), (Opcodes.RETURN,)),
+                  match_tail_call),
+    FusionPattern(Opcodes.TAIL_CALL, ((Opcodes.GOSUB,), (Opcodes.RETURN,)), match_void_tail_call),
+]
+
+
+class Fuser:
+    """ The Fuser replaces chains of decoded instructions with superinstructions, so each chain
+        runs as a single dispatch.
+
+        A superinstruction takes the place of the first instruction of its chain and its next_ip
+        skips the rest of the chain. The other instructions of the chain are kept in place, so the
+        jump targets of the program do not change and a jump into the middle of a chain still runs
+        the original instructions.
+
+        The main parts of the Fuser are:
+            __handlers [Dict[Opcodes, Callable]]: The handler to bind to each superinstruction. When
+                no handlers are provided the superinstructions are built without one.
+            __patterns [List[FusionPattern]]: The patterns to look for, in order of preference.
+    """
+
+    def __init__(self, handlers: Optional[Dict[Opcodes, Callable]] = None,
+                 patterns: Optional[List[FusionPattern]] = None):
+        self.__handlers = handlers
+        self.__patterns = FUSION_PATTERNS if patterns is None else patterns
+
+    def fuse(self, program: List[Instruction]) -> List[Instruction]:
+        """ Fuses every chain of the program that matches a pattern.
+
+            Arguments:
+                - program [List[Instruction]]: The decoded instructions.
+
+            Returns:
+                - [List[Instruction]]: The instructions with the first instruction of every fused
+                    chain replaced by its superinstruction.
+        """
+        fused = list(program)
+        for ip in range(len(program)):
+            for pattern in self.__patterns:
+                chain = program[ip:ip + len(pattern)]
+                if not pattern.accepts(chain):
+                    continue
+                args = pattern.match(chain)
+                if args is not None:
+                    fused[ip] = self.build(pattern, chain, args)
+                    break
+        return fused
+
+    def build(self, pattern: FusionPattern, chain: List[Instruction], args: Tuple[Any, ...]) -> Instruction:
+        """ Builds the superinstruction of a matched chain.
+
+            Arguments:
+                - pattern [FusionPattern]: The matched pattern.
+                - chain [List[Instruction]]: The matched instructions.
+                - args [Tuple]: The arguments returned by the pattern.
+
+            Returns:
+                - [Instruction]: The superinstruction.
+
+            Raises:
+                - NotImplementedError: If the superinstruction has no handler.
+        """
+        if self.__handlers is None:
+            handler = None
+        elif pattern.opcode in self.__handlers:
+            handler = self.__handlers[pattern.opcode]
+        else:
+            raise NotImplementedError(f"Superinstruction {pattern.opcode.name} has no handler in the virtual machine.")
+
+        first = chain[0]
+        instruction = Instruction(pattern.opcode, handler, first.ip, args,
+                                  tuple(instruction.quad for instruction in chain))
+        instruction.next_ip = chain[-1].next_ip
+        return instruction
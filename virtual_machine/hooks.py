@@ -0,0 +1,90 @@
+from .decoder import Instruction, Opcodes
+from typing import Any, TextIO
+import logging
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualMachineHook:
+    """ Base class for the observers of a VirtualMachine execution. Every event does nothing
+        by default, so a hook only overrides the events it needs.
+
+        Hooks are registered with VirtualMachine.add_hook. A VirtualMachine without hooks runs
+        an uninstrumented loop that never calls them.
+    """
+
+    def on_instruction(self, instruction: Instruction):
+        """ Called before an instruction is executed.
+
+            Arguments:
+                - instruction [Instruction]: The instruction about to be executed.
+        """
+
+    def on_call(self, instruction: Instruction, target: int):
+        """ Called after a GOSUB transfers control to a method.
+
+            Arguments:
+                - instruction [Instruction]: The GOSUB instruction, or the call superinstruction.
+                - target [int]: The instruction pointer of the called method.
+        """
+
+    def on_return(self, instruction: Instruction, return_ip: int):
+        """ Called after a method returns control to its caller.
+
+            Arguments:
+                - instruction [Instruction]: The RETURN or END_FUNC instruction, or the MEMO_RETURN
+                    of a memoized call.
+                - return_ip [int]: The instruction pointer execution continues at.
+        """
+
+    def on_write(self, instruction: Instruction, value: Any):
+        """ Called after a WRITE prints a value.
+
+            Arguments:
+                - instruction [Instruction]: The WRITE instruction.
+                - value [Any]: The value printed.
+        """
+
+
+class DebugLoggingHook(VirtualMachineHook):
+    """ Logs every event of the execution at debug level.
+    """
+
+    def on_instruction(self, instruction: Instruction):
+        logger.debug(f"Current instruction: {instruction.quad}")
+
+    def on_call(self, instruction: Instruction, target: int):
+        logger.debug(f"Calling {instruction.args[0]}, moved instruction pointer from {instruction.ip} to {target}")
+
+    def on_return(self, instruction: Instruction, return_ip: int):
+        logger.debug(f"Returning, moved instruction pointer from {instruction.ip} to {return_ip}")
+
+    def on_write(self, instruction: Instruction, value: Any):
+        logger.debug(f"Wrote {value}")
+
+
+class CallTraceHook(VirtualMachineHook):
+    """ Prints every call and return of the execution, preceded by the depth of the call. A tail
+        call replaces the method that makes it, so it does not add depth.
+
+        The main parts of the CallTraceHook are:
+            __stream [TextIO]: Where the trace is printed.
+            __depth [int]: The amount of calls that did not return yet.
+    """
+
+    def __init__(self, stream: TextIO = sys.stderr):
+        self.__stream = stream
+        self.__depth = 0
+
+    def on_call(self, instruction: Instruction, target: int):
+        if instruction.opcode == Opcodes.TAIL_CALL:
+            print(f"{self.__depth - 1} tail call {instruction.args[0]}", file=self.__stream)
+            return
+        print(f"{self.__depth} call {instruction.args[0]}", file=self.__stream)
+        self.__depth += 1
+
+    def on_return(self, instruction: Instruction, return_ip: int):
+        self.__depth -= 1
+        print(f"{self.__depth} return", file=self.__stream)
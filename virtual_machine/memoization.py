@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from compilation.compiler import Compiler
+from scope.method_scope import MethodScope
+from scope.variable import Variable
+from .decoder import Instruction, Opcodes
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .memory_layout import MemoryLayout
+
+
+def call_key(values: List[Any], base_pointer: int, argument_offsets: Tuple[int, ...]) -> Tuple:
+    """ Builds the key of a call from the values of its arguments. Every value is paired with its
+        type, 2, 2.0 and True are the same key of a dictionary but not the same argument.
+
+        Arguments:
+            - values [List[Any]]: The values of the RegisterFile.
+            - base_pointer [int]: The base pointer of the frame of the call.
+            - argument_offsets [Tuple[int, ...]]: The offsets of the arguments in the frame.
+
+        Returns:
+            - [Tuple]: The key.
+    """
+    return tuple((type(value), value) for value in [values[base_pointer + offset] for offset in argument_offsets])
+
+
+class MemoCache:
+    """ The MemoCache keeps the results of the calls to a pure method, keyed by the values of
+        its arguments.
+
+        When the cache is full the oldest entry is evicted. With the "lru" policy an entry gets
+        younger every time it is found, with the "fifo" policy only when it is stored.
+
+        A call whose result is not cached is started with begin and finished with complete, the
+        calls in progress are kept in a stack so recursive calls finish in order.
+
+        The main parts of the MemoCache are:
+            __capacity [int]: The maximum amount of results kept.
+            __policy [str]: The eviction policy, "lru" or "fifo".
+            __entries [OrderedDict]: The results, from the oldest to the youngest.
+            __pending [List[Hashable]]: The keys of the calls in progress.
+            __hits [int]: The amount of calls answered by the cache.
+            __misses [int]: The amount of calls that had to run.
+            __evictions [int]: The amount of results that were discarded.
+    """
+
+    DEFAULT_CAPACITY = 256
+    POLICIES = ("lru", "fifo")
+    # Returned by lookup when the key is not cached, results can be any value of the language.
+    MISSING = object()
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, policy: str = "lru"):
+        if policy not in MemoCache.POLICIES:
+            raise ValueError(f"Unknown eviction policy {policy}, expected one of {MemoCache.POLICIES}.")
+        self.__capacity = capacity
+        self.__policy = policy
+        self.__entries = OrderedDict()
+        self.__pending: List[Hashable] = []
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def policy(self) -> str:
+        return self.__policy
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        return self.__evictions
+
+    def lookup(self, key: Hashable) -> Any:
+        """ Looks up the result of a call.
+
+            Arguments:
+                - key [Hashable]: The values of the arguments of the call.
+
+            Returns:
+                - [Any]: The result, or MemoCache.MISSING when it is not cached.
+        """
+        value = self.__entries.get(key, MemoCache.MISSING)
+        if value is MemoCache.MISSING:
+            self.__misses += 1
+        else:
+            self.__hits += 1
+            if self.__policy == "lru":
+                self.__entries.move_to_end(key)
+        return value
+
+    def begin(self, key: Hashable):
+        """ Starts a call whose result is not cached.
+
+            Arguments:
+                - key [Hashable]: The values of the arguments of the call.
+        """
+        self.__pending.append(key)
+
+    def complete(self, value: Any):
+        """ Finishes the innermost call in progress and caches its result.
+
+            Arguments:
+                - value [Any]: The result of the call.
+        """
+        self.store(self.__pending.pop(), value)
+
+    def store(self, key: Hashable, value: Any):
+        """ Caches the result of a call, evicting the oldest result when the cache is full.
+
+            Arguments:
+                - key [Hashable]: The values of the arguments of the call.
+                - value [Any]: The result of the call.
+        """
+        if self.__capacity <= 0:
+            return
+        if key in self.__entries:
+            self.__entries.move_to_end(key)
+        elif len(self.__entries) >= self.__capacity:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+        self.__entries[key] = value
+
+    def stats(self) -> Dict[str, int]:
+        """ The usage counters of the cache.
+
+            Returns:
+                - [Dict[str, int]]: The hits, misses, evictions and the amount of results kept.
+        """
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "evictions": self.__evictions,
+            "size": len(self.__entries),
+        }
+
+
+class Memoizer:
+    """ The Memoizer replaces the calls to pure methods with MEMO_CALL instructions, so their
+        results are looked up in a MemoCache before running the method, see PurityAnalyzer.
+
+        Only the methods that return a value and take no dimensional argument are memoized, the key of
+        a call with a dimensional argument would have to copy its elements on every call. A MEMO_CALL whose result is not cached
+        runs the method as a GOSUB whose return address is a MEMO_RETURN instruction appended at
+        the end of the program. The MEMO_RETURN caches the result and continues after the call,
+        so the RETURN of the method does not need to know whether it was memoized.
+
+        The main parts of the Memoizer are:
+            __layout [MemoryLayout]: Resolves the frames of the methods and their return variables.
+            __handlers [Dict[Opcodes, Callable]]: The handler to bind to MEMO_CALL and MEMO_RETURN.
+                When no handlers are provided the instructions are built without one.
+            __capacity [int]: The capacity of every MemoCache.
+            __policy [str]: The eviction policy of every MemoCache.
+            __caches [Dict[MethodScope, MemoCache]]: The cache of every memoized method.
+    """
+
+    def __init__(self, layout: "MemoryLayout", handlers: Optional[Dict[Opcodes, Callable]] = None,
+                 capacity: int = MemoCache.DEFAULT_CAPACITY, policy: str = "lru"):
+        self.__layout = layout
+        self.__handlers = handlers
+        self.__capacity = capacity
+        self.__policy = policy
+        self.__caches: Dict[MethodScope, MemoCache] = {}
+
+    @property
+    def caches(self) -> Dict[MethodScope, MemoCache]:
+        return self.__caches
+
+    def memoize(self, program: List[Instruction]) -> List[Instruction]:
+        """ Replaces every GOSUB to a pure method of the program with a MEMO_CALL.
+
+            Arguments:
+                - program [List[Instruction]]: The decoded instructions.
+
+            Returns:
+                - [List[Instruction]]: The instructions with the memoized calls replaced, followed
+                    by one MEMO_RETURN per memoized call.
+        """
+        methods = {}
+        for class_scope in Compiler._class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                if (method_scope.pure and isinstance(method_scope.return_memory_address, Variable)
+                        and not any(argument.has_multiple_dimensions() for argument in method_scope.ordered_arguments)):
+                    methods[method_scope.instruction_pointer] = method_scope
+
+        memoized = list(program)
+        for instruction in program:
+            if instruction.opcode != Opcodes.GOSUB or instruction.args[1] not in methods:
+                continue
+            method_scope = methods[instruction.args[1]]
+            cache = self.__caches.setdefault(method_scope, MemoCache(self.__capacity, self.__policy))
+            return_index = self.__layout.register_file.absolute_index(method_scope.return_memory_address.memory_space)
+
+            memo_return = self.build(Opcodes.MEMO_RETURN, len(memoized), (cache, return_index, instruction.next_ip),
+                                     instruction.quad)
+            memo_return.next_ip = instruction.next_ip
+            memoized.append(memo_return)
+            call = self.build(Opcodes.MEMO_CALL, instruction.ip,
+                              instruction.args + (cache, self.argument_offsets(method_scope), return_index,
+                                                  memo_return.ip),
+                              instruction.quad)
+            memoized[instruction.ip] = call
+        return memoized
+
+    def argument_offsets(self, method_scope: MethodScope) -> Tuple[int, ...]:
+        """ Computes the offsets of the arguments of a method in its frame.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+
+            Returns:
+                - [Tuple[int, ...]]: The offsets from the base pointer of the frame.
+        """
+        frame_layout = self.__layout.method_frame_layout(method_scope)
+        return tuple(frame_layout.offset(argument.memory_space) for argument in method_scope.ordered_arguments)
+
+    def build(self, opcode: Opcodes, ip: int, args: Tuple, quad: Tuple) -> Instruction:
+        """ Builds a memoization instruction.
+
+            Arguments:
+                - opcode [Opcodes]: MEMO_CALL or MEMO_RETURN.
+                - ip [int]: The address of the instruction.
+                - args [Tuple]: The arguments of the instruction.
+                - quad [Tuple]: The GOSUB quad the instruction comes from.
+
+            Returns:
+                - [Instruction]: The instruction.
+
+            Raises:
+                - NotImplementedError: If the instruction has no handler.
+        """
+        if self.__handlers is None:
+            handler = None
+        elif opcode in self.__handlers:
+            handler = self.__handlers[opcode]
+        else:
+            raise NotImplementedError(f"Instruction {opcode.name} has no handler in the virtual machine.")
+        return Instruction(opcode, handler, ip, args, quad)
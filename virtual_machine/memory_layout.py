@@ -0,0 +1,224 @@
+from compilation.compiler import Compiler
+from helpers.operations import Operations
+from helpers.quads import quad_variables, raw_address
+from memory.ranges import AddressDecodeTable
+from scope.method_scope import MethodScope
+from scope.scopes import Scopes
+from scope.variable import Variable
+from .decoder import Addressing
+from .runtime_memory.array_storage import ArrayShape
+from .runtime_memory.layout import FrameLayout, frame_index, frame_layout, get_frame_layout
+from .runtime_memory.register_file import RegisterFile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# The FrameLayout of a method and the offset of each type in the instance memory of its class.
+MethodContext = Tuple[FrameLayout, Tuple[int, ...]]
+
+
+class MemoryLayout:
+    """ The MemoryLayout resolves the addresses of the quads to locations of the RegisterFile, so the
+        machines never classify an address while the program runs.
+
+        Every address is resolved with the context of the method its quad belongs to:
+            - Local and temporal addresses are offsets from the base pointer of the frame (FRAME).
+            - Global and constant addresses are absolute indexes of the RegisterFile (ABSOLUTE).
+            - Instance addresses are slots of the memory of the current instance (INSTANCE).
+            - Array pointers are frame offsets whose value is an ArrayStorage and an offset (INDIRECT).
+
+        A dimensional variable takes a single slot, the one of its first element, which holds its
+        ArrayStorage. The storages of the global variables are created with the RegisterFile, the
+        ones of the local variables with every frame, see FrameLayout.arrays.
+
+        The methods that override each other get frames of the same size, the size of the largest
+        one, so a call dispatched on the class of the instance can run any of them.
+
+        The main parts of the MemoryLayout are:
+            __register_file [RegisterFile]: The value stack of the program.
+            __main_scope [MethodScope]: The constructor of Main.
+            __entry_layout [FrameLayout]: The layout of the frame the program starts with.
+            __family_sizes [Dict[MethodScope, int]]: The size of the largest frame of the methods that
+                override each other, by the method they all override.
+            __contexts [List[MethodContext]]: The context of every quad.
+    """
+
+    def __init__(self, register_file: RegisterFile, quads: List[Tuple]):
+        self.__register_file = register_file
+        AddressDecodeTable.build(MemoryLayout.program_addresses(quads))
+
+        global_scope = Compiler._global_scope
+        main_class = Compiler._class_directory.search("Main")
+        self.__main_scope = main_class.method_directory.search("constructor_Main")
+        # The global declarations and the constructor of Main share the first frame, Main is
+        # reached with a GOTO instead of an ERA.
+        self.__entry_layout = get_frame_layout(
+            tuple(map(max, global_scope.local_memory_needed, self.__main_scope.local_memory_needed)),
+            tuple(map(max, global_scope.temp_memory_needed, self.__main_scope.temp_memory_needed)),
+            MemoryLayout.arrays(self.__main_scope))
+
+        self.__family_sizes: Dict[MethodScope, int] = {}
+        for class_scope in Compiler._class_directory.symbols.values():
+            for method_scope in class_scope.method_directory.symbols.values():
+                root = MemoryLayout.family(method_scope)
+                if root is not None and method_scope.instruction_pointer is not None:
+                    size = get_frame_layout(method_scope.local_memory_needed, method_scope.temp_memory_needed,
+                                            MemoryLayout.arrays(method_scope), 0,
+                                            MemoryLayout.array_arguments(method_scope)).size
+                    self.__family_sizes[root] = max(self.__family_sizes.get(root, 0), size)
+
+        _, main_offsets = frame_layout(main_class.instance_memory.actual_memory_needed())
+        self.__contexts: List[MethodContext] = [(self.__entry_layout, main_offsets)] * len(quads)
+        for class_scope in Compiler._class_directory.symbols.values():
+            _, instance_offsets = frame_layout(class_scope.instance_memory.actual_memory_needed())
+            for method_scope in class_scope.method_directory.symbols.values():
+                if method_scope.instruction_pointer is None:
+                    continue
+                context = (self.method_frame_layout(method_scope), instance_offsets)
+                ip = method_scope.instruction_pointer
+                while ip < len(quads):
+                    self.__contexts[ip] = context
+                    if quads[ip][0] == Operations.END_FUNC:
+                        break
+                    ip += 1
+
+    @staticmethod
+    def program_addresses(quads: List[Tuple]) -> Iterator[int]:
+        """ Collects the addresses used by the quads. The elements of the dimensional variables are
+            reached through their ArrayStorage, so only their first address is used.
+
+            Arguments:
+                - quads [List[Tuple]]: The quads of the program.
+
+            Returns:
+                - [Iterator[int]]: The addresses, possibly repeated.
+        """
+        for quad in quads:
+            for variable in quad_variables(quad):
+                yield variable.memory_space
+            address = raw_address(quad)
+            if address is not None:
+                yield address
+
+    @staticmethod
+    def arrays(method_scope: MethodScope) -> Tuple[Tuple[int, ArrayShape], ...]:
+        """ Collects the dimensional variables declared in a method. The array arguments are not
+            collected, they get the storage passed by the PARAM of the call.
+
+            Arguments:
+                - method_scope [MethodScope]: The method, or the global scope.
+
+            Returns:
+                - [Tuple[Tuple[int, ArrayShape], ...]]: The address and the shape of every variable.
+        """
+        return tuple((variable.memory_space, ArrayShape.of(variable))
+                     for variable in method_scope.variables_directory.symbols.values()
+                     if variable.has_multiple_dimensions())
+
+    @staticmethod
+    def array_arguments(method_scope: MethodScope) -> Tuple[Tuple[int, ArrayShape], ...]:
+        """ Collects the dimensional arguments of a method. Each one takes a single slot of the frame,
+            which holds the ArrayStorage of the caller's variable.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+
+            Returns:
+                - [Tuple[Tuple[int, ArrayShape], ...]]: The address and the shape of every argument.
+        """
+        return tuple((variable.memory_space, ArrayShape.of(variable))
+                     for variable in method_scope.ordered_arguments
+                     if variable.has_multiple_dimensions())
+
+    @staticmethod
+    def family(method_scope: MethodScope) -> Optional[MethodScope]:
+        """ Finds the inherited method a method and the methods that override it replace.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+
+            Returns:
+                - [Optional[MethodScope]]: The method none of them overrides, or None if the method
+                    does not override and is not overridden.
+        """
+        if method_scope.overrides is None and not method_scope.overridden:
+            return None
+        while method_scope.overrides is not None:
+            method_scope = method_scope.overrides
+        return method_scope
+
+    @property
+    def register_file(self) -> RegisterFile:
+        return self.__register_file
+
+    @property
+    def entry_layout(self) -> FrameLayout:
+        """ The layout of the frame the program starts with, which runs the global declarations
+            and then the constructor of Main.
+
+            Returns:
+                - [FrameLayout]: The layout.
+        """
+        return self.__entry_layout
+
+    def method_frame_layout(self, method_scope: MethodScope) -> FrameLayout:
+        """ Gets the layout of the frame of a method.
+
+            Arguments:
+                - method_scope [MethodScope]: The method.
+
+            Returns:
+                - [FrameLayout]: The layout of its frame.
+        """
+        if method_scope is self.__main_scope:
+            return self.__entry_layout
+        return get_frame_layout(method_scope.local_memory_needed, method_scope.temp_memory_needed,
+                                MemoryLayout.arrays(method_scope),
+                                self.__family_sizes.get(MemoryLayout.family(method_scope), 0),
+                                MemoryLayout.array_arguments(method_scope))
+
+    def frame_layout_at(self, ip: int) -> FrameLayout:
+        """ Gets the layout of the frame a quad runs on.
+
+            Arguments:
+                - ip [int]: The address of the quad.
+
+            Returns:
+                - [FrameLayout]: The layout.
+        """
+        return self.__contexts[ip][0]
+
+    def resolve(self, variable: Variable, ip: int) -> Tuple[int, int]:
+        """ Resolves a variable to its location and its addressing mode.
+
+            Arguments:
+                - variable [Variable]: The variable to resolve.
+                - ip [int]: The address of the quad the variable is used in.
+
+            Returns:
+                - [Tuple[int, int]]: The location and the Addressing mode of the variable.
+        """
+        location, mode = self.resolve_address(variable.memory_space, ip)
+        if variable.is_array_pointer():
+            return location, Addressing.INDIRECT
+        return location, mode
+
+    def resolve_address(self, address: int, ip: int) -> Tuple[int, int]:
+        """ Resolves a raw address to its location and its addressing mode.
+
+            Arguments:
+                - address [int]: The address to resolve.
+                - ip [int]: The address of the quad the address is used in.
+
+            Returns:
+                - [Tuple[int, int]]: The location and the Addressing mode of the address.
+
+            Raises:
+                - ValueError: If the address does not belong to any scope.
+        """
+        layout, instance_offsets = self.__contexts[ip]
+        decoded = AddressDecodeTable.decode(address)
+        if decoded.segment == Scopes.LOCAL or decoded.segment == Scopes.TEMP:
+            return layout.index(decoded), Addressing.FRAME
+        if decoded.segment == Scopes.GLOBAL or decoded.segment == Scopes.CONSTANT:
+            return self.__register_file.absolute_index(address), Addressing.ABSOLUTE
+        return frame_index(instance_offsets, decoded), Addressing.INSTANCE
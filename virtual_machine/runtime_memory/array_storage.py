@@ -0,0 +1,332 @@
+from helpers import array_operations
+from helpers.types import Types
+from scope.variable import Variable
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The NumPy type the elements of the int and float variables are stored with.
+DTYPES = {
+    Types.INT: "int64",
+    Types.FLOAT: "float64",
+}
+
+# The Python type of the values a typed buffer holds, any other value is stored in a list.
+ELEMENT_TYPES = {
+    Types.INT: int,
+    Types.FLOAT: float,
+}
+
+# The int64 operations are exact while every value and every intermediate result is below this.
+INT_BOUND = 2 ** 63
+
+# The ints below this are converted to float64 exactly, so their division is the one of Python.
+EXACT_FLOAT_BOUND = 2 ** 53
+
+
+class ArrayShape(NamedTuple):
+    """ The metadata of a dimensional variable the runtime needs to store it.
+    """
+    # The type of the elements.
+    var_type: str
+    # The size of every dimension, from the first one.
+    dimensions: Tuple[int, ...]
+
+    @property
+    def size(self) -> int:
+        size = 1
+        for dimension in self.dimensions:
+            size *= dimension
+        return size
+
+    @staticmethod
+    def of(variable: Variable) -> "ArrayShape":
+        """ Gets the shape of a dimensional variable.
+
+            Arguments:
+                - variable [Variable]: The variable.
+
+            Returns:
+                - [ArrayShape]: Its shape.
+        """
+        return ArrayShape(variable.var_type, variable.dimensions)
+
+
+def max_abs(values: Any) -> int:
+    """ The largest absolute value of an int64 NumPy array, as a Python int so it cannot overflow.
+    """
+    return max(-int(values.min()), int(values.max()))
+
+
+class ArrayStorage:
+    """ The ArrayStorage keeps the elements of a dimensional variable in a contiguous buffer, laid
+        out row by row like the offsets the compiler computes.
+
+        When NumPy is installed the elements of the int and float variables are stored in a typed
+        int64 or float64 NumPy array. The buffer is a Python list while it holds a value the typed
+        array cannot: an unset element, an int that does not fit an int64 or a value of another type,
+        so the elements keep the semantics of the values of the language. Every variable starts as a
+        list of unset elements, None, and gets a typed buffer once every element is set, when a
+        built-in operation writes or reads it. Storing a value the typed buffer cannot hold turns it
+        back into a list. The variables of any other type, or of every type without NumPy, are always
+        stored in a list. The elements are read and written with load and store, which always take
+        and return Python values.
+
+        The built-in operations on dimensional variables run as single NumPy calls over the typed
+        buffers, but only when the result is the one of the Python operations: no int result can
+        overflow and no element is divided by zero. The float sum, dot and matmul add their terms in
+        order, like Python. Otherwise they run over the elements in Python.
+
+        The slot of the variable in the RegisterFile holds its ArrayStorage, and an array pointer
+        holds the storage and the offset of the element it points to. An array argument holds the
+        storage of the caller's variable, arrays are passed by reference.
+
+        The main parts of the ArrayStorage are:
+            shape [ArrayShape]: The type and the dimensions of the variable.
+            values [Any]: The buffer, a NumPy array or a list.
+            load [Callable[[int], Any]]: Reads the element at an offset.
+            store [Callable[[int, Any], None]]: Writes the element at an offset.
+    """
+    __slots__ = ("shape", "values", "load", "store")
+
+    def __init__(self, shape: ArrayShape):
+        self.shape = shape
+        self.use_list([None] * shape.size)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"<ArrayStorage: {self.shape.var_type}{list(self.shape.dimensions)}>"
+
+    @property
+    def typed(self) -> bool:
+        """ Whether the elements are stored in a NumPy array.
+
+            Returns:
+                - [bool]: True if the buffer is a NumPy array, False if it is a list.
+        """
+        return not isinstance(self.values, list)
+
+    def use_list(self, values: List[Any]):
+        """ Stores the elements in a list.
+
+            Arguments:
+                - values [List[Any]]: The elements.
+        """
+        self.values = values
+        self.load = values.__getitem__
+        self.store = values.__setitem__
+
+    def use_array(self, values: Any):
+        """ Stores the elements in a typed NumPy array.
+
+            Arguments:
+                - values [numpy.ndarray]: The elements, of the NumPy type of the variable.
+        """
+        self.values = values
+        self.load = values.item
+        self.store = self.store_element
+
+    def store_element(self, offset: int, value: Any):
+        """ Writes an element of a typed buffer. A value the buffer cannot hold turns it into a list.
+
+            Arguments:
+                - offset [int]: The offset of the element.
+                - value [Any]: The value.
+        """
+        if type(value) is ELEMENT_TYPES[self.shape.var_type]:
+            try:
+                self.values[offset] = value
+                return
+            except OverflowError:
+                pass
+        self.use_list(self.values.tolist())
+        self.values[offset] = value
+
+    def elements(self) -> List[Any]:
+        """ Gets the elements as Python values.
+
+            Returns:
+                - [List[Any]]: The elements, the buffer itself when it is a list.
+        """
+        return self.values.tolist() if self.typed else self.values
+
+    def array(self) -> Optional[Any]:
+        """ Gets the typed buffer of the elements for a built-in operation, storing the elements in one
+            when they are still in a list and every one of them fits it.
+
+            Returns:
+                - [Optional[numpy.ndarray]]: The buffer, or None when the elements are stored in a list.
+        """
+        if self.typed:
+            return self.values
+        dtype = DTYPES.get(self.shape.var_type) if numpy is not None else None
+        if dtype is None:
+            return None
+        element_type = ELEMENT_TYPES[self.shape.var_type]
+        if not all(type(value) is element_type for value in self.values):
+            return None
+        try:
+            values = numpy.array(self.values, dtype=dtype)
+        except OverflowError:
+            return None
+        self.use_array(values)
+        return values
+
+    def accepts(self, values: Any) -> bool:
+        """ Whether the result of a NumPy operation can be the typed buffer of the elements.
+
+            Arguments:
+                - values [numpy.ndarray]: The result.
+
+            Returns:
+                - [bool]: True if it has the NumPy type of the variable.
+        """
+        dtype = DTYPES.get(self.shape.var_type)
+        return dtype is not None and values.dtype == dtype
+
+    def fill(self, value: Any):
+        """ Sets every element to a value.
+
+            Arguments:
+                - value [Any]: The value.
+        """
+        if numpy is not None and type(value) is ELEMENT_TYPES.get(self.shape.var_type):
+            try:
+                self.use_array(numpy.full(len(self.values), value, dtype=DTYPES[self.shape.var_type]))
+                return
+            except OverflowError:
+                pass
+        self.use_list([value] * len(self.values))
+
+    def assign(self, storage: "ArrayStorage"):
+        """ Copies the elements of another storage of the same size.
+
+            Arguments:
+                - storage [ArrayStorage]: The storage to copy.
+        """
+        if storage.typed and self.accepts(storage.values):
+            self.use_array(storage.values.copy())
+        else:
+            self.use_list(list(storage.elements()))
+
+    def elementwise(self, operation: Callable[[Any, Any], Any], left: "ArrayStorage", right: "ArrayStorage"):
+        """ Sets every element to the result of an operation on the elements at the same offset of two
+            storages of the same size.
+
+            Arguments:
+                - operation [Callable[[Any, Any], Any]]: The operation, one of the operator functions.
+                - left [ArrayStorage]: The left operands.
+                - right [ArrayStorage]: The right operands.
+
+            Raises:
+                - ZeroDivisionError: If an element is divided by zero.
+        """
+        left_values = left.array()
+        right_values = right.array() if left_values is not None else None
+        if right_values is not None and ArrayStorage.is_exact(operation, left_values, right_values):
+            values = operation(left_values, right_values)
+            if self.accepts(values):
+                self.use_array(values)
+                return
+        self.use_list(list(map(operation, left.elements(), right.elements())))
+
+    @staticmethod
+    def is_exact(operation: Callable[[Any, Any], Any], left: Any, right: Any) -> bool:
+        """ Whether NumPy computes the same elements as Python for an element-wise operation.
+
+            Arguments:
+                - operation [Callable[[Any, Any], Any]]: The operation.
+                - left [numpy.ndarray]: The left operands.
+                - right [numpy.ndarray]: The right operands.
+
+            Returns:
+                - [bool]: True if the results are the same.
+        """
+        ints = left.dtype.kind == "i" and right.dtype.kind == "i"
+        if operation is operator.truediv:
+            # Python raises the division by zero, NumPy returns inf or nan.
+            if not right.all():
+                return False
+            return not ints or max(max_abs(left), max_abs(right)) < EXACT_FLOAT_BOUND
+        if not ints:
+            return True
+        if operation is operator.mul:
+            return max_abs(left) * max_abs(right) < INT_BOUND
+        return max_abs(left) + max_abs(right) < INT_BOUND
+
+    def matmul(self, left: "ArrayStorage", right: "ArrayStorage"):
+        """ Sets the elements to the matrix product of two storages of two dimensions.
+
+            Arguments:
+                - left [ArrayStorage]: The left matrix, with as many rows as this one.
+                - right [ArrayStorage]: The right matrix, with as many columns as this one.
+        """
+        rows, inner = left.shape.dimensions
+        columns = right.shape.dimensions[1]
+        left_values = left.array()
+        right_values = right.array() if left_values is not None else None
+        if right_values is not None:
+            left_matrix, right_matrix = left_values.reshape(rows, inner), right_values.reshape(inner, columns)
+            if left_values.dtype.kind == "i" and right_values.dtype.kind == "i":
+                product = (left_matrix @ right_matrix
+                           if inner * max_abs(left_values) * max_abs(right_values) < INT_BOUND else None)
+            else:
+                # Every element adds the products in order, like Python.
+                product = numpy.zeros((rows, columns))
+                for position in range(inner):
+                    product += numpy.multiply.outer(left_matrix[:, position], right_matrix[position])
+            if product is not None and self.accepts(product):
+                self.use_array(product.ravel())
+                return
+        self.use_list(array_operations.matmul(left.elements(), right.elements(), rows, inner, columns))
+
+    def sum(self) -> Any:
+        """ Adds every element.
+
+            Returns:
+                - [Any]: The sum.
+        """
+        values = self.array()
+        if values is not None:
+            if values.dtype.kind != "i":
+                return ArrayStorage.ordered_sum(values)
+            if len(values) * max_abs(values) < INT_BOUND:
+                return int(values.sum())
+        return sum(self.elements())
+
+    def dot(self, storage: "ArrayStorage") -> Any:
+        """ Computes the dot product with another storage of the same size.
+
+            Arguments:
+                - storage [ArrayStorage]: The other storage.
+
+            Returns:
+                - [Any]: The sum of the products of the elements.
+        """
+        left_values = self.array()
+        right_values = storage.array() if left_values is not None else None
+        if right_values is not None:
+            if left_values.dtype.kind != "i" or right_values.dtype.kind != "i":
+                return ArrayStorage.ordered_sum(left_values * right_values)
+            if len(left_values) * max_abs(left_values) * max_abs(right_values) < INT_BOUND:
+                return int(numpy.dot(left_values, right_values))
+        return array_operations.dot(self.elements(), storage.elements())
+
+    @staticmethod
+    def ordered_sum(values: Any) -> float:
+        """ Adds the elements of a float64 NumPy array in order, like the sum of Python, which starts
+            from the int zero so it never returns a negative zero.
+
+            Arguments:
+                - values [numpy.ndarray]: The elements.
+
+            Returns:
+                - [float]: The sum.
+        """
+        return numpy.cumsum(values)[-1].item() + 0
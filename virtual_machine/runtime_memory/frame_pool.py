@@ -0,0 +1,97 @@
+from .layout import FrameLayout
+from .method_memory import MethodMemory
+from .register_file import RegisterFile
+from .runtime_memory import RuntimeMemory
+from typing import Dict, List
+
+
+class FramePool:
+    """ The FramePool keeps the MethodMemory of the calls that already returned so the next calls
+        can reuse them instead of creating a new one on every ERA.
+
+        Frames are kept in one free list per FrameLayout, so every method reuses the frames of its
+        previous calls. Methods with the same counters share their free list. A frame frees its
+        slots of the RegisterFile when it is released and allocates them again when it is acquired.
+
+        The main parts of the FramePool are:
+            __register_file [RegisterFile]: The value stack the frames are allocated on.
+            __capacity [int]: The maximum amount of free frames kept for each layout.
+            __free_frames [Dict[FrameLayout, List[MethodMemory]]]: The free frames of each layout.
+            __hits [int]: The amount of frames that were reused.
+            __misses [int]: The amount of frames that had to be created.
+    """
+
+    DEFAULT_CAPACITY = 64
+
+    def __init__(self, register_file: RegisterFile, capacity: int = DEFAULT_CAPACITY):
+        self.__register_file = register_file
+        self.__capacity = capacity
+        self.__free_frames: Dict[FrameLayout, List[MethodMemory]] = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def acquire(self, instance_memory: RuntimeMemory, frame_layout: FrameLayout) -> MethodMemory:
+        """ Gets a frame for a call, reusing a free one when there is any.
+
+            Arguments:
+                - instance_memory [RuntimeMemory]: The memory of the instance being called.
+                - frame_layout [FrameLayout]: The layout of the frame of the method.
+
+            Returns:
+                - [MethodMemory]: A cleared frame for the call, allocated on top of the RegisterFile.
+        """
+        free_frames = self.__free_frames.get(frame_layout)
+        if free_frames:
+            self.__hits += 1
+            frame = free_frames.pop()
+            frame.allocate(instance_memory)
+            return frame
+
+        self.__misses += 1
+        return MethodMemory(self.__register_file, instance_memory, frame_layout)
+
+    def release(self, frame: MethodMemory):
+        """ Returns the frame of a call that finished to the pool, freeing its slots of the
+            RegisterFile. The frame is discarded when the free list of its layout is full.
+
+            Arguments:
+                - frame [MethodMemory]: The frame to release.
+        """
+        frame.reset()
+        self.recycle(frame)
+
+    def recycle(self, frame: MethodMemory):
+        """ Returns to the pool a frame whose slots of the RegisterFile were already freed or taken
+            over by a tail call, see MethodMemory.adopt.
+
+            Arguments:
+                - frame [MethodMemory]: The frame to recycle.
+        """
+        frame.instance_memory = None
+        free_frames = self.__free_frames.setdefault(frame.frame_layout, [])
+        if len(free_frames) < self.__capacity:
+            free_frames.append(frame)
+
+    def stats(self) -> Dict[str, int]:
+        """ The usage counters of the pool.
+
+            Returns:
+                - [Dict[str, int]]: The hits, misses and the amount of free frames kept.
+        """
+        return {
+            "hits": self.__hits,
+            "misses": self.__misses,
+            "free": sum(len(free_frames) for free_frames in self.__free_frames.values()),
+        }
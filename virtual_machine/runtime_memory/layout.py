@@ -0,0 +1,163 @@
+from memory.ranges import AddressDecodeTable, decoded_address
+from scope.scopes import Scopes
+from .array_storage import ArrayShape
+from typing import Tuple
+from functools import lru_cache
+
+# The amount of int, float, bool, string, object and array pointer variables of a memory.
+MemoryCounters = Tuple[int, int, int, int, int, int]
+
+# For every type, the offset of every dimensional variable and the amount of its elements left out
+# of the layout after its first slot, see element_gaps.
+ElementGaps = Tuple[Tuple[Tuple[int, int], ...], ...]
+
+
+@lru_cache(maxsize=None)
+def frame_layout(memory_counters: MemoryCounters) -> Tuple[int, Tuple[int, ...]]:
+    """ Computes the size of a list that stores the variables of each type one after the other,
+        and the offset where each type starts.
+
+        Arguments:
+            - memory_counters [MemoryCounters]: The amount of variables of each type.
+
+        Returns:
+            - [Tuple[int, Tuple[int, ...]]]: The size of the list and the offset of each type.
+    """
+    offsets = []
+    size = 0
+    for counter in memory_counters:
+        offsets.append(size)
+        size += counter
+    return size, tuple(offsets)
+
+
+def element_gaps(memory_counters: MemoryCounters,
+                 arrays: Tuple[Tuple[int, ArrayShape], ...]) -> Tuple[MemoryCounters, ElementGaps]:
+    """ Leaves the elements of the dimensional variables of a memory out of its layout. The compiler
+        reserves an address for every element, but the elements are stored in the ArrayStorage of the
+        variable, so only the first address of the variable keeps a slot.
+
+        Arguments:
+            - memory_counters [MemoryCounters]: The amount of variables of each type, every element
+                included.
+            - arrays [Tuple[Tuple[int, ArrayShape], ...]]: The address and the shape of every
+                dimensional variable of the memory.
+
+        Returns:
+            - [Tuple[MemoryCounters, ElementGaps]]: The amount of slots of each type and the elements
+                left out after each variable.
+    """
+    counters = list(memory_counters)
+    gaps = [[] for _ in memory_counters]
+    for address, shape in arrays:
+        decoded = AddressDecodeTable.decode(address)
+        counters[decoded.type] -= shape.size - 1
+        gaps[decoded.type].append((decoded.offset, shape.size - 1))
+    return tuple(counters), tuple(tuple(sorted(type_gaps)) for type_gaps in gaps)
+
+
+def frame_index(offsets: Tuple[int, ...], decoded: decoded_address, gaps: ElementGaps = ()) -> int:
+    """ Computes the index of an address in a list laid out by frame_layout.
+
+        Arguments:
+            - offsets [Tuple[int, ...]]: The offset of each type in the list.
+            - decoded [decoded_address]: The address, decoded by the AddressDecodeTable.
+            - gaps [ElementGaps]: The elements left out of the list, see element_gaps.
+
+        Returns:
+            - [int]: The index in the list.
+    """
+    index = offsets[decoded.type] + decoded.offset
+    if gaps:
+        for offset, elements in gaps[decoded.type]:
+            if offset < decoded.offset:
+                index -= elements
+    return index
+
+
+class FrameLayout:
+    """ The layout of the frame of a method in the RegisterFile: the local variables laid out by
+        frame_layout, followed by the temporals laid out the same way. A local dimensional variable
+        takes a single slot, which holds its ArrayStorage, see element_gaps. So does a dimensional
+        argument, its slot holds the ArrayStorage the caller passes.
+
+        The main parts of the FrameLayout are:
+            memory_needed [Tuple[MemoryCounters, MemoryCounters]]: The local and temporal counters
+                of the method.
+            size [int]: The amount of slots of the frame.
+            local_offsets [Tuple[int, ...]]: The offset of each type in the local part of the frame.
+            local_gaps [ElementGaps]: The elements of the local dimensional variables left out of the frame.
+            temp_offsets [Tuple[int, ...]]: The offset of each type in the temporal part of the frame.
+            arrays [Tuple[Tuple[int, ArrayShape], ...]]: The offset and the shape of every local
+                dimensional variable, whose ArrayStorage is created with the frame.
+    """
+    __slots__ = ("memory_needed", "size", "local_offsets", "local_gaps", "temp_offsets", "arrays")
+
+    def __init__(self, local_memory_needed: MemoryCounters, temp_memory_needed: MemoryCounters,
+                 arrays: Tuple[Tuple[int, ArrayShape], ...] = (), size: int = 0,
+                 references: Tuple[Tuple[int, ArrayShape], ...] = ()):
+        local_counters, self.local_gaps = element_gaps(local_memory_needed, references + arrays)
+        local_size, self.local_offsets = frame_layout(local_counters)
+        temp_size, temp_offsets = frame_layout(temp_memory_needed)
+        self.temp_offsets = tuple(local_size + offset for offset in temp_offsets)
+        self.size = max(local_size + temp_size, size)
+        self.memory_needed = (local_memory_needed, temp_memory_needed)
+        self.arrays = tuple((self.offset(address), shape) for address, shape in arrays)
+
+    def __repr__(self):
+        return f"<FrameLayout: {self.size} slots>"
+
+    def offset(self, address: int) -> int:
+        """ Computes the offset of a local or temporal address from the base pointer of the frame.
+
+            Arguments:
+                - address [int]: The local or temporal address.
+
+            Returns:
+                - [int]: The offset of the address in the frame.
+
+            Raises:
+                - ValueError: If the address is not local nor temporal.
+        """
+        return self.index(AddressDecodeTable.decode(address))
+
+    def index(self, decoded: decoded_address) -> int:
+        """ Computes the offset of a decoded local or temporal address from the base pointer of the frame.
+
+            Arguments:
+                - decoded [decoded_address]: The address, decoded by the AddressDecodeTable.
+
+            Returns:
+                - [int]: The offset of the address in the frame.
+
+            Raises:
+                - ValueError: If the address is not local nor temporal.
+        """
+        if decoded.segment == Scopes.LOCAL:
+            return frame_index(self.local_offsets, decoded, self.local_gaps)
+        if decoded.segment == Scopes.TEMP:
+            return frame_index(self.temp_offsets, decoded)
+        raise ValueError(f"Address {decoded} is not local nor temporal.")
+
+
+@lru_cache(maxsize=None)
+def get_frame_layout(local_memory_needed: MemoryCounters, temp_memory_needed: MemoryCounters,
+                     arrays: Tuple[Tuple[int, ArrayShape], ...] = (), size: int = 0,
+                     references: Tuple[Tuple[int, ArrayShape], ...] = ()) -> FrameLayout:
+    """ Gets the FrameLayout of the provided counters. Methods with the same counters and
+        dimensional variables share the same FrameLayout.
+
+        Arguments:
+            - local_memory_needed [MemoryCounters]: The local counters of the method.
+            - temp_memory_needed [MemoryCounters]: The temporal counters of the method.
+            - arrays [Tuple[Tuple[int, ArrayShape], ...]]: The address and the shape of every local
+                dimensional variable of the method.
+            - size [int]: The least amount of slots of the frame, so the methods that override each
+                other have frames of the same size.
+            - references [Tuple[Tuple[int, ArrayShape], ...]]: The address and the shape of every
+                dimensional argument of the method, which gets no ArrayStorage with the frame.
+
+        Returns:
+            - [FrameLayout]: The layout of the frame.
+    """
+    return FrameLayout(local_memory_needed, temp_memory_needed, arrays, size, references)
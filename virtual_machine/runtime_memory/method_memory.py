@@ -1,6 +1,9 @@
-from memory.ranges import ScopeRanges, remove_base_prefix
-from typing import Any, List
-from memory.const_memory import ConstMemory
+from memory.ranges import AddressDecodeTable
+from scope.scopes import Scopes
+from typing import Any, Optional, Tuple
+from .array_storage import ArrayStorage
+from .layout import FrameLayout, MemoryCounters
+from .register_file import RegisterFile
 from .runtime_memory import RuntimeMemory
 import logging
 
@@ -11,19 +14,106 @@ class MethodMemory:
     """ The MethodMemory class is responsible for taking care of the runtime memory
         of a method.
 
+        The local and temporal variables of a call live in a frame of the RegisterFile, which is
+        allocated from the base pointer of the memory on and sized with the FrameLayout of the
+        method. The global variables and the constants live at the start of the RegisterFile.
+        Addresses are classified with the AddressDecodeTable.
+
         The main parts of the MethodMemory are:
-            __temp_memory [List[Any]]: Keeps track of the temporal memory.
-            __local_memory [List[Any]]: Keeps track of the local memory.
-            __global_memory [List[Any]]: Keeps track of the global memory.
-            __const_memory [ConstMemory]: Keeps track of the const memory.
+            __register_file [RegisterFile]: The value stack of the program.
+            __frame_layout [FrameLayout]: The layout of the frame.
+            __base_pointer [int]: The index where the frame starts in the RegisterFile.
+            __instance_memory [RuntimeMemory]: The memory of the instance the method was called on.
     """
-    def __init__(self, const_memory: ConstMemory, global_memory: RuntimeMemory, instance_memory: RuntimeMemory):
-        self.__temp_memory = [None] * 12000
-        self.__local_memory = [None] * 10000
-        self.__global_memory = global_memory
-        self.__const_memory = const_memory
+    def __init__(self, register_file: RegisterFile, instance_memory: Optional[RuntimeMemory], frame_layout: FrameLayout):
+        self.__register_file = register_file
+        self.__frame_layout = frame_layout
+        self.__base_pointer = register_file.push_frame(frame_layout.size, frame_layout.arrays)
+        self.__instance_memory = instance_memory
+
+    @property
+    def memory_needed(self) -> Tuple[MemoryCounters, MemoryCounters]:
+        """ The local and temporal counters the memory was sized with.
+
+            Returns:
+                - [Tuple[MemoryCounters, MemoryCounters]]: The counters.
+        """
+        return self.__frame_layout.memory_needed
+
+    @property
+    def frame_layout(self) -> FrameLayout:
+        """ The layout of the frame.
+
+            Returns:
+                - [FrameLayout]: The layout.
+        """
+        return self.__frame_layout
+
+    @property
+    def base_pointer(self) -> int:
+        """ The index where the frame starts in the RegisterFile.
+
+            Returns:
+                - [int]: The base pointer.
+        """
+        return self.__base_pointer
+
+    @property
+    def instance_memory(self) -> Optional[RuntimeMemory]:
+        """ The memory of the instance the method was called on.
+
+            Returns:
+                - [RuntimeMemory]: The instance memory.
+        """
+        return self.__instance_memory
+
+    @instance_memory.setter
+    def instance_memory(self, instance_memory: RuntimeMemory):
+        self.__instance_memory = instance_memory
+
+    def allocate(self, instance_memory: RuntimeMemory) -> None:
+        """ Allocates a new frame on top of the RegisterFile, so a released MethodMemory can be
+            used by another call.
+
+            Arguments:
+                - instance_memory [RuntimeMemory]: The memory of the instance being called.
+        """
+        self.__base_pointer = self.__register_file.push_frame(self.__frame_layout.size, self.__frame_layout.arrays)
         self.__instance_memory = instance_memory
 
+    def relayout(self, frame_layout: FrameLayout) -> None:
+        """ Gives the frame the layout of another method of the same size, when a call dispatched on
+            the class of the instance runs a method that overrides the one the frame was acquired for.
+            The dimensional variables of that method get their ArrayStorage.
+
+            Arguments:
+                - frame_layout [FrameLayout]: The layout of the method that runs.
+        """
+        values = self.__register_file.values
+        for offset, shape in frame_layout.arrays:
+            values[self.__base_pointer + offset] = ArrayStorage(shape)
+        self.__frame_layout = frame_layout
+
+    def reset(self) -> None:
+        """ Frees the frame from the RegisterFile and drops the instance.
+        """
+        self.__register_file.pop_frame(self.__base_pointer)
+        self.__instance_memory = None
+
+    def adopt(self, method_memory: "MethodMemory") -> None:
+        """ Moves the frame and the instance of the memory of a tail call to the base pointer of this
+            memory, so the called method runs on the frame of its caller. The frame of the tail call
+            must be the one right above this frame in the RegisterFile.
+
+            Arguments:
+                - method_memory [MethodMemory]: The memory of the tail call.
+        """
+        values = self.__register_file.values
+        start = method_memory.base_pointer
+        values[self.__base_pointer:] = values[start:start + method_memory.frame_layout.size]
+        self.__frame_layout = method_memory.frame_layout
+        self.__instance_memory = method_memory.instance_memory
+
     def set_value(self, address: int, value: Any) -> None:
         """ Sets the provided value to the provided address.
 
@@ -31,50 +121,44 @@ class MethodMemory:
             - address [int]: The address where the value should be set.
             - value [Any]: The value to be set.
         """
-        if ScopeRanges.is_local(address):
-            self.__local_memory[remove_base_prefix(address)] = value
-        elif ScopeRanges.is_temp(address):
-            self.__temp_memory[remove_base_prefix(address)] = value
-        elif ScopeRanges.is_global(address):
-            self.__global_memory.set_value(address, value)
-        elif ScopeRanges.is_instance(address):
+        decoded = AddressDecodeTable.decode(address)
+        if decoded.segment == Scopes.LOCAL or decoded.segment == Scopes.TEMP:
+            self.__register_file.values[self.__base_pointer + self.__frame_layout.index(decoded)] = value
+        elif decoded.segment == Scopes.GLOBAL:
+            self.__register_file.values[self.__register_file.absolute_index(address)] = value
+        elif decoded.segment == Scopes.INSTANCE:
             self.__instance_memory.set_value(address, value)
         else:
             raise NotImplementedError(f"Variable {address} no es temp ni local ni global.")
 
     def get_value(self, address: int) -> Any:
-        """ Sets the provided value to the provided address.
+        """ Gets the value of the provided address.
 
         Arguments:
-            - address [int]: The address where the value should be set.
-            - value [Any]: The value to be set.
+            - address [int]: The address of the value.
+
+        Returns:
+            - [Any]: The value.
          """
-        if ScopeRanges.is_local(address):
-            return self.__local_memory[remove_base_prefix(address)]
-        elif ScopeRanges.is_temp(address):
-            return self.__temp_memory[remove_base_prefix(address)]
-        elif ScopeRanges.is_global(address):
-            return self.__global_memory.get_value(address)
-        elif ScopeRanges.is_instance(address):
+        decoded = AddressDecodeTable.decode(address)
+        if decoded.segment == Scopes.LOCAL or decoded.segment == Scopes.TEMP:
+            return self.__register_file.values[self.__base_pointer + self.__frame_layout.index(decoded)]
+        elif decoded.segment == Scopes.GLOBAL or decoded.segment == Scopes.CONSTANT:
+            return self.__register_file.values[self.__register_file.absolute_index(address)]
+        elif decoded.segment == Scopes.INSTANCE:
             return self.__instance_memory.get_value(address)
-        elif ScopeRanges.is_const(address):
-            return self.__const_memory.get_value_from_address(address)
         else:
             raise NotImplementedError("Variable no es temp ni local ni global ni const.")
 
     def debug_memory(self):
         """ Pretty prints the memory.
         """
-        logger.debug("======= TEMP ========")
-        for i in range(0, len(self.__temp_memory)):
-            el = self.__temp_memory[i]
-            if el is not None: logger.debug(f"{el} @{i+30000}")
-        logger.debug("======= LOCAL ========")
-        for i in range(0, len(self.__local_memory)):
-            el = self.__local_memory[i]
-            if el is not None: logger.debug(f"{el} @{i+10000}")
+        logger.debug("======= FRAME ========")
+        values = self.__register_file.values
+        for offset in range(0, self.__frame_layout.size):
+            el = values[self.__base_pointer + offset]
+            if el is not None: logger.debug(f"{el} @bp+{offset}")
         logger.debug("======= GLOBAL ========")
-        for i in range(0, len(self.__global_memory)):
-            el = self.__global_memory[i]
-            if el is not None: logger.debug(f"{el} @{i}")
-
+        for index in range(0, self.__register_file.frames_base):
+            el = values[index]
+            if el is not None: logger.debug(f"{el} @{index}")
@@ -0,0 +1,114 @@
+from memory.const_memory import ConstMemory
+from memory.ranges import AddressDecodeTable
+from scope.scopes import Scopes
+from .array_storage import ArrayShape, ArrayStorage
+from .layout import MemoryCounters, element_gaps, frame_index, frame_layout
+from typing import Any, Dict, List, Tuple
+
+
+class RegisterFile:
+    """ The RegisterFile is the single value stack of a running program. It starts with the global
+        variables, followed by the constants, and then the frame of every active method call. A frame
+        is a contiguous slice of the stack, its variables are addressed by the base pointer of the
+        frame plus the offset given by its FrameLayout.
+
+        The global variables and the constants are addressed by absolute indexes, which are
+        computed once by absolute_index, so no address is classified while the program runs. A global
+        dimensional variable takes a single slot, which holds its ArrayStorage.
+
+        The main parts of the RegisterFile are:
+            __values [List[Any]]: The value stack. The list is only modified in place, so it can be
+                captured by the handlers of a machine.
+            __global_offsets [Tuple[int, ...]]: The offset of each type in the global variables.
+            __global_gaps [ElementGaps]: The elements of the global dimensional variables left out of
+                the stack, see element_gaps.
+            __const_indexes [Dict[int, int]]: The absolute index of each constant address.
+            __frames_base [int]: The index where the first frame starts.
+    """
+
+    def __init__(self, global_memory_needed: MemoryCounters, const_memory: ConstMemory,
+                 arrays: Tuple[Tuple[int, ArrayShape], ...] = ()):
+        global_counters, self.__global_gaps = element_gaps(global_memory_needed, arrays)
+        global_size, self.__global_offsets = frame_layout(global_counters)
+        self.__values = [None] * global_size
+        self.__const_indexes: Dict[int, int] = {}
+        for address, value in sorted(const_memory.constants().items()):
+            self.__const_indexes[address] = len(self.__values)
+            self.__values.append(value)
+        self.__frames_base = len(self.__values)
+        for address, shape in arrays:
+            self.__values[self.absolute_index(address)] = ArrayStorage(shape)
+
+    @property
+    def values(self) -> List[Any]:
+        """ The value stack.
+
+            Returns:
+                - [List[Any]]: The values of the globals, the constants and the frames.
+        """
+        return self.__values
+
+    @property
+    def frames_base(self) -> int:
+        """ The index where the first frame starts, every index below it is a global
+            variable or a constant.
+
+            Returns:
+                - [int]: The index.
+        """
+        return self.__frames_base
+
+    def is_constant(self, index: int) -> bool:
+        """ Whether an absolute index holds a constant.
+
+            Arguments:
+                - index [int]: The absolute index.
+
+            Returns:
+                - [bool]: True if the index is a constant. False otherwise.
+        """
+        return self.__frames_base - len(self.__const_indexes) <= index < self.__frames_base
+
+    def absolute_index(self, address: int) -> int:
+        """ Computes the absolute index of a global or constant address.
+
+            Arguments:
+                - address [int]: The global or constant address.
+
+            Returns:
+                - [int]: The index of the address in the value stack.
+
+            Raises:
+                - ValueError: If the address is not global nor constant.
+        """
+        decoded = AddressDecodeTable.decode(address)
+        if decoded.segment == Scopes.GLOBAL:
+            return frame_index(self.__global_offsets, decoded, self.__global_gaps)
+        if decoded.segment == Scopes.CONSTANT:
+            return self.__const_indexes[address]
+        raise ValueError(f"Address {address} is not global nor constant.")
+
+    def push_frame(self, size: int, arrays: Tuple[Tuple[int, ArrayShape], ...] = ()) -> int:
+        """ Allocates a frame on top of the stack.
+
+            Arguments:
+                - size [int]: The amount of slots of the frame.
+                - arrays [Tuple[Tuple[int, ArrayShape], ...]]: The offset and the shape of every
+                    dimensional variable of the frame, see FrameLayout.arrays.
+
+            Returns:
+                - [int]: The base pointer of the frame.
+        """
+        base_pointer = len(self.__values)
+        self.__values.extend([None] * size)
+        for offset, shape in arrays:
+            self.__values[base_pointer + offset] = ArrayStorage(shape)
+        return base_pointer
+
+    def pop_frame(self, base_pointer: int):
+        """ Frees a frame and every frame above it.
+
+            Arguments:
+                - base_pointer [int]: The base pointer of the frame.
+        """
+        del self.__values[base_pointer:]
@@ -1,43 +1,40 @@
-from memory.ranges import TypeRanges, remove_base_type_prefix
-from typing import Any
+from memory.ranges import AddressDecodeTable
+from .layout import MemoryCounters, frame_index, frame_layout
+from typing import Any, List, Optional
 
 
 class RuntimeMemory:
-    def __init__(self, memory_counters: (int, int, int, int, int, int)):
-        int_m, float_m, bool_m, string_m, object_m, ap_m = memory_counters
-        self.__int_memory = [None] * int_m
-        self.__float_memory = [None] * float_m
-        self.__bool_memory = [None] * bool_m
-        self.__string_memory = [None] * string_m
-        self.__object_memory = [None] * object_m
-        self.__array_pointer_memory = [None] * ap_m
+    """ The RuntimeMemory keeps the variables of an instance in a single list, where the
+        variables of each type are stored one after the other, see frame_layout. Addresses are
+        looked up in the AddressDecodeTable.
+
+        The main parts of the RuntimeMemory are:
+            __slots [List[Any]]: The values of the variables.
+            __offsets [Tuple[int, ...]]: The offset of each type in the list.
+            __class_name [Optional[str]]: The class of the instance, its overridden methods are
+                dispatched on it.
+    """
+
+    def __init__(self, memory_counters: MemoryCounters, class_name: Optional[str] = None):
+        size, self.__offsets = frame_layout(memory_counters)
+        self.__slots = [None] * size
+        self.__class_name = class_name
+
+    @property
+    def class_name(self) -> Optional[str]:
+        return self.__class_name
+
+    @property
+    def slots(self) -> List[Any]:
+        """ The values of the memory, indexed by the slots precomputed by the MemoryLayout.
+
+            Returns:
+                - [List[Any]]: The values.
+        """
+        return self.__slots
 
     def set_value(self, address: int, value: Any):
-        address_without_prefix = remove_base_type_prefix(address)
-        if TypeRanges.is_int(address):
-            self.__int_memory[address_without_prefix] = value
-        if TypeRanges.is_float(address):
-            self.__float_memory[address_without_prefix] = value
-        if TypeRanges.is_bool(address):
-            self.__bool_memory[address_without_prefix] = value
-        if TypeRanges.is_string(address):
-            self.__string_memory[address_without_prefix] = value
-        if TypeRanges.is_object(address):
-            self.__object_memory[address_without_prefix] = value
-        if TypeRanges.is_array_pointer(address):
-            self.__array_pointer_memory[address_without_prefix] = value
-    
+        self.__slots[frame_index(self.__offsets, AddressDecodeTable.decode(address))] = value
+
     def get_value(self, address: int) -> Any:
-        address_without_prefix = remove_base_type_prefix(address)
-        if TypeRanges.is_int(address):
-            return self.__int_memory[address_without_prefix]
-        if TypeRanges.is_float(address):
-            return self.__float_memory[address_without_prefix]
-        if TypeRanges.is_bool(address):
-            return self.__bool_memory[address_without_prefix]
-        if TypeRanges.is_string(address):
-            return self.__string_memory[address_without_prefix]
-        if TypeRanges.is_object(address):
-            return self.__object_memory[address_without_prefix]
-        if TypeRanges.is_array_pointer(address):
-            return self.__array_pointer_memory[address_without_prefix]
+        return self.__slots[frame_index(self.__offsets, AddressDecodeTable.decode(address))]
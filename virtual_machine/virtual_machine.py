@@ -2,11 +2,18 @@ from helpers.operations import Operations
 from helpers.custom_stack import Stack
 from helpers.types import Types
 from memory.compilation_memory import CompilationMemory
+from .decoder import Addressing, Decoder, Instruction, Opcodes
+from .dispatch import Dispatcher, InlineCache
+from .fusion import Fuser
+from .hooks import VirtualMachineHook
+from .memoization import MemoCache, Memoizer, call_key
+from .memory_layout import MemoryLayout
+from .runtime_memory.frame_pool import FramePool
 from .runtime_memory.method_memory import MethodMemory
+from .runtime_memory.register_file import RegisterFile
 from .runtime_memory.runtime_memory import RuntimeMemory
-from ast import literal_eval
-from scope.variable import Variable
-from typing import Tuple, List
+from scope.method_scope import MethodScope
+from typing import Any, Dict, List
 from compilation.compiler import Compiler
 import operator
 import logging
@@ -19,27 +26,51 @@ class VirtualMachine:
     """ The Virtual Machine class is responsible for taking a list of quads as its input
         and based on the operation code of the quad take certain actions.
 
+        The quads are decoded once when the VirtualMachine is created, every Instruction
+        has its handler bound, and every handler returns the next instruction pointer.
+
+        Every value lives in the RegisterFile. The operands of the instructions are resolved by
+        the MemoryLayout, so the handlers read and write them through the base pointer of the
+        active frame, an absolute index or a slot of the current instance, see load and store.
+
         The main parts of the VirtualMachine are:
-            __global_memory [List[Any]]: A list to represent the global memory.
-            __instruction_pointer [int]: Points to the current quad.
+            __register_file [RegisterFile]: The value stack of the program.
+            __values [List[Any]]: The values of the RegisterFile.
+            __layout [MemoryLayout]: Resolves the addresses of the quads.
+            __instruction_pointer [int]: Points to the first instruction to execute.
             __quads [List[Any]]: List with all the quads for the program.
+            __program [List[Instruction]]: The decoded quads.
             __method_memory [MethodMemory]: Keeps track of the current active runtime memory.
+            __base_pointer [int]: The base pointer of the active frame.
+            __instance_slots [List[Any]]: The slots of the instance of the active frame.
             __memory_stack [Stack]: Keeps track of the stack of memory.
+            __frame_pool [FramePool]: Reuses the memory of the methods that already returned.
+            __memoizer [Memoizer]: Keeps the results of the calls to the pure methods.
             __jump_stack [Stack]: Keeps track of the jumps in the virtual machine.
-            __keep_running [bool]: Keeps track of wether we should keep executing the program or stop.
+            __hooks [List[VirtualMachineHook]]: The hooks notified of the execution events.
             __operations [dict]: Dictionary mapping all the Operations to its correct handler.
-            __expression_operations [dict]: Dictionary mapping each operation in a expression to its handler.
+            __superinstructions [dict]: Dictionary mapping the opcode of each superinstruction to its handler.
+            __expression_operations [dict]: Dictionary mapping each opcode in a expression to its handler.
     """
 
-    def __init__(self, quads: List):
-        self.__global_memory = RuntimeMemory(CompilationMemory.get_global_memory().actual_memory_needed())
+    # Instruction pointer returned by a handler to stop the execution.
+    HALT = -1
+
+    def __init__(self, quads: List, frame_pool_capacity: int = FramePool.DEFAULT_CAPACITY,
+                 memo_capacity: int = MemoCache.DEFAULT_CAPACITY, memo_policy: str = "lru"):
+        self.__register_file = RegisterFile(CompilationMemory.get_global_memory().actual_memory_needed(),
+                                            CompilationMemory.get_const_memory(),
+                                            MemoryLayout.arrays(Compiler._global_scope))
+        self.__values = self.__register_file.values
+        self.__layout = MemoryLayout(self.__register_file, quads)
+        self.__frame_pool = FramePool(self.__register_file, frame_pool_capacity)
         self.__instruction_pointer = 0
         self.__quads = quads
-        self.__current_instance = RuntimeMemory(Compiler._class_directory.search("Main").instance_memory.actual_memory_needed())
-        self.__method_memory = MethodMemory(CompilationMemory.get_const_memory(), self.__global_memory, self.__current_instance)
+        main_instance = RuntimeMemory(Compiler._class_directory.search("Main").instance_memory.actual_memory_needed(), "Main")
+        self.switch_memory(MethodMemory(self.__register_file, main_instance, self.__layout.entry_layout))
         self.__memory_stack = Stack()
         self.__jump_stack = Stack()
-        self.__keep_running = True
+        self.__hooks = []
 
         self.__operations = {
             Operations.GOTO: self.goto,
@@ -74,174 +105,454 @@ class VirtualMachine:
 
             Operations.GOTOF: self.go_to_f,
             Operations.GOTOT: self.go_to_t,
+
+            Operations.FILL: self.array_fill,
+            Operations.COPY: self.array_copy,
+            Operations.ARRAY_ADD: self.array_elementwise,
+            Operations.ARRAY_SUBS: self.array_elementwise,
+            Operations.ARRAY_PROD: self.array_elementwise,
+            Operations.ARRAY_DIV: self.array_elementwise,
+            Operations.MATMUL: self.array_matmul,
+            Operations.SUM: self.array_sum,
+            Operations.DOT: self.array_dot,
         }
 
         self.__expression_operations = {
-                Operations.ADD: operator.add,
-                Operations.SUBS: operator.sub,
-                Operations.DIV: operator.truediv,
-                Operations.PROD: operator.mul,
-                Operations.GREATER: operator.gt,
-                Operations.GREATER_EQUAL_THAN: operator.ge,
-                Operations.LESS: operator.lt,
-                Operations.LESS_EQUAL_THAN: operator.le,
-                Operations.EQUAL: operator.eq,
-                Operations.NOT_EQUAL: operator.ne,
-
-                Operations.AND: VirtualMachine.and_op,
-                Operations.OR: VirtualMachine.or_op,
+                Opcodes.ADD: operator.add,
+                Opcodes.SUBS: operator.sub,
+                Opcodes.DIV: operator.truediv,
+                Opcodes.PROD: operator.mul,
+                Opcodes.GREATER: operator.gt,
+                Opcodes.GREATER_EQUAL_THAN: operator.ge,
+                Opcodes.LESS: operator.lt,
+                Opcodes.LESS_EQUAL_THAN: operator.le,
+                Opcodes.EQUAL: operator.eq,
+                Opcodes.NOT_EQUAL: operator.ne,
+
+                Opcodes.AND: VirtualMachine.and_op,
+                Opcodes.OR: VirtualMachine.or_op,
                 }
 
+        self.__superinstructions = {
+            Opcodes.INDEX_LOAD: self.index_load,
+            Opcodes.INDEX_STORE: self.index_store,
+            Opcodes.SCALED_INDEX: self.scaled_index,
+            Opcodes.OFFSET_LOAD: self.offset_load,
+            Opcodes.OFFSET_STORE: self.offset_store,
+            Opcodes.COMPARE_JUMP: self.compare_jump,
+            Opcodes.TAIL_CALL: self.tail_call,
+            Opcodes.MEMO_CALL: self.memo_call,
+            Opcodes.MEMO_RETURN: self.memo_return,
+            Opcodes.VIRTUAL_CALL: self.virtual_call,
+        }
+
+        self.__dispatcher = Dispatcher(self.__superinstructions)
+        self.__program = Fuser(self.__superinstructions).fuse(
+            self.__dispatcher.dispatch(Decoder(self.__layout, self.__operations).decode(quads)))
+        # A capacity of 0 turns memoization off.
+        self.__memoizer = Memoizer(self.__layout, self.__superinstructions, memo_capacity, memo_policy)
+        if memo_capacity > 0:
+            self.__program = self.__memoizer.memoize(self.__program)
+
+    @property
+    def register_file(self) -> RegisterFile:
+        """ The value stack of the machine.
+
+            Returns:
+                - [RegisterFile]: The register file.
+        """
+        return self.__register_file
+
+    @property
+    def frame_pool(self) -> FramePool:
+        """ The pool of method memories of the machine.
+
+            Returns:
+                - [FramePool]: The frame pool.
+        """
+        return self.__frame_pool
+
+    @property
+    def memo_caches(self) -> Dict[MethodScope, MemoCache]:
+        """ The caches of the memoized methods, see Memoizer.
+
+            Returns:
+                - [Dict[MethodScope, MemoCache]]: The cache of every memoized method.
+        """
+        return self.__memoizer.caches
+
+    @property
+    def inline_caches(self) -> Dict[int, InlineCache]:
+        """ The caches of the calls to overridden methods, see Dispatcher.
+
+            Returns:
+                - [Dict[int, InlineCache]]: The cache of every call, by the address of the call.
+        """
+        return self.__dispatcher.caches
+
     @property
-    def current_instruction(self):
-        """ Takes the current quad.
+    def program(self) -> List[Instruction]:
+        """ The decoded instructions of the program.
 
             Returns:
-                - The quad that is pointed by __instruction_pointer.
+                - [List[Instruction]]: One Instruction per quad.
         """
-        return self.__quads[self.__instruction_pointer]
+        return self.__program
+
+    def add_hook(self, hook: VirtualMachineHook):
+        """ Registers a hook to be notified of the execution events.
+
+            Arguments:
+                - hook [VirtualMachineHook]: The hook to register.
+        """
+        self.__hooks.append(hook)
+
+    def remove_hook(self, hook: VirtualMachineHook):
+        """ Unregisters a hook.
+
+            Arguments:
+                - hook [VirtualMachineHook]: The hook to remove.
+        """
+        self.__hooks.remove(hook)
 
     def run(self):
-        """ Executes the virtual machine by looping thought all the quads and
-            running its corresponding handler.
+        """ Executes the virtual machine by looping thought all the instructions and
+            running its bound handler until one of them halts the machine. The hooks are
+            only notified when at least one is registered.
         """
-        while self.__keep_running:
-            logger.debug(f"Current instruction: {self.current_instruction}")
-            self.__operations.get(self.current_instruction[0])()
+        if self.__hooks:
+            self.run_instrumented()
+            return
 
-    def goto(self):
-        """ Handler for goto operation. Moves the __instruction_pointer to the
+        program = self.__program
+        ip = self.__instruction_pointer
+        while ip != VirtualMachine.HALT:
+            instruction = program[ip]
+            ip = instruction.handler(instruction)
+
+    def run_instrumented(self):
+        """ Executes the virtual machine notifying the registered hooks of every event.
+        """
+        program = self.__program
+        hooks = list(self.__hooks)
+        ip = self.__instruction_pointer
+        while ip != VirtualMachine.HALT:
+            instruction = program[ip]
+            for hook in hooks:
+                hook.on_instruction(instruction)
+
+            ip = instruction.handler(instruction)
+
+            opcode = instruction.opcode
+            if (opcode == Opcodes.GOSUB or opcode == Opcodes.TAIL_CALL or opcode == Opcodes.VIRTUAL_CALL
+                    or (opcode == Opcodes.MEMO_CALL and ip != instruction.next_ip)):
+                for hook in hooks:
+                    hook.on_call(instruction, ip)
+            elif opcode == Opcodes.WRITE:
+                value = self.load(*instruction.args)
+                for hook in hooks:
+                    hook.on_write(instruction, value)
+            # A memoized method returns to its MEMO_RETURN, which notifies the return to the caller.
+            elif ((opcode == Opcodes.RETURN or opcode == Opcodes.END_FUNC) and ip not in (VirtualMachine.HALT, instruction.next_ip)
+                    and program[ip].opcode != Opcodes.MEMO_RETURN) or opcode == Opcodes.MEMO_RETURN:
+                for hook in hooks:
+                    hook.on_return(instruction, ip)
+
+    def goto(self, instruction: Instruction) -> int:
+        """ Handler for goto operation. Moves the instruction pointer to the
             address indicated in the quad.
         """
-        self.__instruction_pointer = self.current_instruction[2]
+        return instruction.args[0]
 
-    def solveExpression(self):
+    def solveExpression(self, instruction: Instruction) -> int:
         """ Solves an operation.
         """
-        quad = self.current_instruction
-
-        # TODO: search whole memory instead of const memory
-        l_val = self.get_value(quad[1])
-        r_val = self.get_value(quad[2])
-        result = self.__expression_operations.get(quad[0])(literal_eval(str(l_val)), literal_eval(str(r_val)))
-        self.__method_memory.set_value(quad[3], result)
+        l_location, l_mode, r_location, r_mode, result_location, result_mode = instruction.args
 
-        logger.debug(f"Solved for values: <{quad[1]}> {quad[0]} <{quad[2]}> = {result}")
+        l_val = self.load(l_location, l_mode)
+        r_val = self.load(r_location, r_mode)
+        result = self.__expression_operations[instruction.opcode](l_val, r_val)
+        self.store(result_location, result_mode, result)
+        return instruction.next_ip
 
-        logger.debug(f"Solved for values: {literal_eval(str(l_val))} {literal_eval(str(r_val))} = {result}")
-        self.increase_instruction_pointer()
-
-    def not_op(self):
+    def not_op(self, instruction: Instruction) -> int:
         """ Handler for a Not Operation.
         """
-        quad = self.current_instruction
+        location, mode, result_location, result_mode = instruction.args
 
-        val = self.get_value(quad[1])
+        val = self.load(location, mode)
         result = not val
-        self.__method_memory.set_value(quad[2], result)
-
-        logger.debug(f"Not operator: <{quad[1]}> = {result}")
-        self.increase_instruction_pointer()
+        self.store(result_location, result_mode, result)
+        return instruction.next_ip
 
-    def verify_access(self):
+    def verify_access(self, instruction: Instruction) -> int:
         """ Handler to verify that an index is within the range of a dimensional
             variable.
 
             Raises:
                 - Exception: When the index is out of bounds.
         """
-        quad = self.current_instruction
-        index = self.get_value(quad[1])
-        if type(index) == str:
-            index = literal_eval(index)
-        upper_bound = quad[3]
-        lower_bound = quad[2]
+        self.check_index(*instruction.args)
+        return instruction.next_ip
+
+    def check_index(self, location: int, mode: int, lower_bound: int, upper_bound: int) -> int:
+        """ Loads an index and verifies that it is within the range of a dimensional variable.
+
+            Arguments:
+                - location [int]: The location of the index.
+                - mode [int]: The Addressing mode of the index.
+                - lower_bound [int]: The first valid index.
+                - upper_bound [int]: The size of the dimension.
+
+            Returns:
+                - [int]: The index.
+
+            Raises:
+                - Exception: When the index is out of bounds.
+        """
+        index = self.load(location, mode)
         if not (index >= lower_bound and index < upper_bound):
             raise ValueError(f"Segmentation fault. Index: {index} is out of range({lower_bound, upper_bound})")
+        return index
 
-        self.increase_instruction_pointer()
-
-    def literal_product(self):
+    def literal_product(self, instruction: Instruction) -> int:
         """ Handler to make a product with a int primitive instead of a variable.
         """
-        quad = self.current_instruction
-        var = self.get_value(quad[1])
-        if type(var) == str:
-            var = literal_eval(var)
-        m = quad[2]
+        location, mode, m, result_location, result_mode = instruction.args
+        var = self.load(location, mode)
         result = var * m
 
-        self.__method_memory.set_value(quad[3].memory_space, result)
+        self.store(result_location, result_mode, result)
 
-        self.increase_instruction_pointer()
+        return instruction.next_ip
 
-    def literal_add(self):
-        """ Handler to make an addition with a int primitive instead of a variable.
+    def literal_add(self, instruction: Instruction) -> int:
+        """ Handler to make an addition with the base of a dimensional variable. The result is
+            a pointer to an element, its ArrayStorage and its offset.
         """
-        quad = self.current_instruction
-        var = self.get_value(quad[1])
-        m = quad[2]
-        result = var + m
+        location, mode, base, base_mode, result_location, result_mode = instruction.args
+        var = self.load(location, mode)
+        result = (self.load(base, base_mode), var)
 
-        self.__method_memory.set_value(quad[3].memory_space, result)
+        self.store(result_location, result_mode, result)
 
-        self.increase_instruction_pointer()
+        return instruction.next_ip
 
-    def era(self):
-        """ Handler for ERA Operation. Creates a new method memory for the method
-            that is going to be called.
+    def scaled_index(self, instruction: Instruction) -> int:
+        """ Handler for the VER_ACCS, PROD_LIT superinstruction. Verifies an index and multiplies
+            it by the size of the elements of its dimension.
         """
-        quad = self.current_instruction
-        if quad[1] == "constructor":
-            self.__current_instance = RuntimeMemory(Compiler._class_directory.search(quad[2]).instance_memory.actual_memory_needed())
-        elif quad[1] != "self":
-            self.__current_instance = self.get_value(quad[1])
+        location, mode, lower_bound, upper_bound, m, result_offset = instruction.args
+        index = self.check_index(location, mode, lower_bound, upper_bound)
+        self.__values[self.__base_pointer + result_offset] = index * m
+        return instruction.next_ip
+
+    def offset_load(self, instruction: Instruction) -> int:
+        """ Handler for the ADD_LIT, ASSIGN superinstruction that reads an element of a
+            dimensional variable.
+        """
+        offset_location, offset_mode, base, base_mode, pointer_offset, to_location, to_mode = instruction.args
+        storage = self.load(base, base_mode)
+        offset = self.load(offset_location, offset_mode)
+        self.__values[self.__base_pointer + pointer_offset] = (storage, offset)
+        self.store(to_location, to_mode, storage.load(offset))
+        return instruction.next_ip
+
+    def offset_store(self, instruction: Instruction) -> int:
+        """ Handler for the ADD_LIT, ASSIGN superinstruction that writes an element of a
+            dimensional variable.
+        """
+        offset_location, offset_mode, base, base_mode, pointer_offset, from_location, from_mode = instruction.args
+        storage = self.load(base, base_mode)
+        offset = self.load(offset_location, offset_mode)
+        self.__values[self.__base_pointer + pointer_offset] = (storage, offset)
+        storage.store(offset, self.load(from_location, from_mode))
+        return instruction.next_ip
+
+    def index_load(self, instruction: Instruction) -> int:
+        """ Handler for the VER_ACCS, PROD_LIT, ADD_LIT, ASSIGN superinstruction that reads an
+            element of a dimensional variable.
+        """
+        (location, mode, lower_bound, upper_bound, m, offset_offset,
+         base, base_mode, pointer_offset, to_location, to_mode) = instruction.args
+        offset = self.check_index(location, mode, lower_bound, upper_bound) * m
+        storage = self.load(base, base_mode)
+        self.__values[self.__base_pointer + offset_offset] = offset
+        self.__values[self.__base_pointer + pointer_offset] = (storage, offset)
+        self.store(to_location, to_mode, storage.load(offset))
+        return instruction.next_ip
+
+    def index_store(self, instruction: Instruction) -> int:
+        """ Handler for the VER_ACCS, PROD_LIT, ADD_LIT, ASSIGN superinstruction that writes an
+            element of a dimensional variable.
+        """
+        (location, mode, lower_bound, upper_bound, m, offset_offset,
+         base, base_mode, pointer_offset, from_location, from_mode) = instruction.args
+        offset = self.check_index(location, mode, lower_bound, upper_bound) * m
+        storage = self.load(base, base_mode)
+        self.__values[self.__base_pointer + offset_offset] = offset
+        self.__values[self.__base_pointer + pointer_offset] = (storage, offset)
+        storage.store(offset, self.load(from_location, from_mode))
+        return instruction.next_ip
+
+    def array_fill(self, instruction: Instruction) -> int:
+        """ Handler for FILL Operation. Sets every element of a dimensional variable to a value.
+        """
+        location, mode, array_location, array_mode = instruction.args
+        self.load(array_location, array_mode).fill(self.load(location, mode))
+        return instruction.next_ip
+
+    def array_copy(self, instruction: Instruction) -> int:
+        """ Handler for COPY Operation. Copies the elements of a dimensional variable to another one.
+        """
+        location, mode, array_location, array_mode = instruction.args
+        self.load(array_location, array_mode).assign(self.load(location, mode))
+        return instruction.next_ip
+
+    def array_elementwise(self, instruction: Instruction) -> int:
+        """ Handler for the element-wise operations on dimensional variables.
+        """
+        opcode, l_location, l_mode, r_location, r_mode, array_location, array_mode = instruction.args
+        self.load(array_location, array_mode).elementwise(
+            self.__expression_operations[opcode], self.load(l_location, l_mode), self.load(r_location, r_mode))
+        return instruction.next_ip
+
+    def array_matmul(self, instruction: Instruction) -> int:
+        """ Handler for MATMUL Operation. Multiplies two matrices into a third one.
+        """
+        l_location, l_mode, r_location, r_mode, array_location, array_mode = instruction.args
+        self.load(array_location, array_mode).matmul(self.load(l_location, l_mode), self.load(r_location, r_mode))
+        return instruction.next_ip
+
+    def array_sum(self, instruction: Instruction) -> int:
+        """ Handler for SUM Operation. Adds the elements of a dimensional variable.
+        """
+        array_location, array_mode, result_location, result_mode = instruction.args
+        self.store(result_location, result_mode, self.load(array_location, array_mode).sum())
+        return instruction.next_ip
 
-        new_memory = MethodMemory(CompilationMemory.get_const_memory(), self.__global_memory, self.__current_instance)
+    def array_dot(self, instruction: Instruction) -> int:
+        """ Handler for DOT Operation. Computes the dot product of two dimensional variables.
+        """
+        l_location, l_mode, r_location, r_mode, result_location, result_mode = instruction.args
+        self.store(result_location, result_mode,
+                   self.load(l_location, l_mode).dot(self.load(r_location, r_mode)))
+        return instruction.next_ip
+
+    def compare_jump(self, instruction: Instruction) -> int:
+        """ Handler for the relational operation, GOTOF superinstruction. Solves the comparison and
+            moves the instruction pointer when it is false.
+        """
+        opcode, l_location, l_mode, r_location, r_mode, result_offset, target = instruction.args
+        l_val = self.load(l_location, l_mode)
+        r_val = self.load(r_location, r_mode)
+        result = self.__expression_operations[opcode](l_val, r_val)
+        self.__values[self.__base_pointer + result_offset] = result
+
+        if result == False:
+            return target
+        return instruction.next_ip
+
+    def era(self, instruction: Instruction) -> int:
+        """ Handler for ERA Operation. Takes a method memory from the frame pool for the method
+            that is going to be called, which allocates its frame on top of the RegisterFile.
+        """
+        args = instruction.args
+        if args[0] == "constructor":
+            instance = RuntimeMemory(Compiler._class_directory.search(args[1]).instance_memory.actual_memory_needed(),
+                                     args[1])
+        elif args[0] == "self":
+            instance = self.__method_memory.instance_memory
+        else:
+            instance = self.load(args[0], args[1])
+
+        new_memory = self.__frame_pool.acquire(instance, args[-1])
         self.__memory_stack.push(new_memory)
-        self.increase_instruction_pointer()
+        return instruction.next_ip
 
-    def go_sub(self):
+    def go_sub(self, instruction: Instruction) -> int:
         """ Handler for GOSUB Operation. Assigns the __method_memory to the memory of the method
             that is going to go to, and stores the current memory in the memory stack.
         """
-        quad = self.current_instruction
-        self.__jump_stack.push(self.get_next_ip)
+        self.__jump_stack.push(instruction.next_ip)
         aux = self.__method_memory
-        self.__method_memory = self.__memory_stack.pop()
+        self.switch_memory(self.__memory_stack.pop())
         self.__memory_stack.push(aux)
 
-        self.move_instruction_pointer(quad[2])
+        return instruction.args[1]
 
-    def param(self):
-        """ Handler for PARAM Operation. Assigns the function arguments from the current memory to
-            the memory of the method to be called.
+    def virtual_call(self, instruction: Instruction) -> int:
+        """ Handler for the GOSUB of an overridden method. Runs the method of the class of the instance
+            called, found in the inline cache of the call, see Dispatcher.
         """
-        quad = self.current_instruction
-
-        function_memory = self.__memory_stack.top()
-
-        from_variable = quad[1]
-        to_variable = quad[2]
+        _, _, cache = instruction.args
+        method_memory = self.__memory_stack.top()
+        class_name = method_memory.instance_memory.class_name
+        target = cache.targets.get(class_name)
+        if target is None:
+            target = cache.miss(class_name)
+        frame_layout = self.__layout.frame_layout_at(target)
+        if method_memory.frame_layout is not frame_layout:
+            method_memory.relayout(frame_layout)
+
+        self.__jump_stack.push(instruction.next_ip)
+        aux = self.__method_memory
+        self.switch_memory(self.__memory_stack.pop())
+        self.__memory_stack.push(aux)
 
-        if from_variable.has_multiple_dimensions():
-            for index in range(0, from_variable.size):
-                from_variable_value = self.get_value_from_memory_address(from_variable.memory_space + index)
-                function_memory.set_value(to_variable.memory_space + index, from_variable_value)
+        return target
 
-        else:
-            from_variable_value = self.get_value(quad[1])
-            function_memory.set_value(to_variable.memory_space, from_variable_value)
-        self.increase_instruction_pointer()
+    def tail_call(self, instruction: Instruction) -> int:
+        """ Handler for the GOSUB, RETURN superinstruction. The method called in tail position runs
+            on the frame of the current method and returns straight to its caller, so a tail
+            recursion uses constant memory.
+        """
+        method_memory = self.__memory_stack.pop()
+        self.__method_memory.adopt(method_memory)
+        self.__frame_pool.recycle(method_memory)
+        self.switch_memory(self.__method_memory)
+
+        return instruction.args[1]
+
+    def memo_call(self, instruction: Instruction) -> int:
+        """ Handler for the GOSUB of a memoized method. When the values of the arguments are in the
+            cache of the method, its result is assigned to the return variable and the frame of the
+            call is released without running the method. Otherwise the method runs and returns to
+            the MEMO_RETURN of the call.
+        """
+        _, target, cache, argument_offsets, return_index, memo_return = instruction.args
+        base_pointer = self.__memory_stack.top().base_pointer
+        key = call_key(self.__values, base_pointer, argument_offsets)
+        result = cache.lookup(key)
+        if result is not MemoCache.MISSING:
+            self.__frame_pool.release(self.__memory_stack.pop())
+            self.__values[return_index] = result
+            return instruction.next_ip
+
+        cache.begin(key)
+        self.__jump_stack.push(memo_return)
+        aux = self.__method_memory
+        self.switch_memory(self.__memory_stack.pop())
+        self.__memory_stack.push(aux)
+        return target
 
-    @property
-    def get_next_ip(self) -> int:
-        """ Returns the next instruction pointer.
+    def memo_return(self, instruction: Instruction) -> int:
+        """ Handler for the return of a memoized method that ran. Caches its result and continues
+            after the call.
+        """
+        cache, return_index, next_ip = instruction.args
+        cache.complete(self.__values[return_index])
+        return next_ip
 
-            Returns:
-                - [int]: The next instruction pointer.
+    def param(self, instruction: Instruction) -> int:
+        """ Handler for PARAM Operation. Assigns the function arguments from the current memory to
+            the frame of the method to be called.
         """
-        return self.__instruction_pointer + 1
+        from_location, from_mode, to_offset = instruction.args
+
+        to_index = self.__memory_stack.top().base_pointer + to_offset
+        self.__values[to_index] = self.load(from_location, from_mode)
+        return instruction.next_ip
 
     @staticmethod
     def and_op(l: bool, r: bool) -> bool:
@@ -269,147 +580,125 @@ class VirtualMachine:
         """
         return l or r
 
-    def write(self):
+    def write(self, instruction: Instruction) -> int:
         """ Handler for WRITE Operation.
         """
-        quad = self.current_instruction
-
-        val = self.get_value(quad[1])
-        if quad[1].var_type == Types.STRING:
-            val = val.strip("\"")
-        print(val)
-        self.increase_instruction_pointer()
+        location, mode = instruction.args
+        print(self.load(location, mode))
+        return instruction.next_ip
 
-    def read(self):
-        """ Handler for READ Operation.
+    def read(self, instruction: Instruction) -> int:
+        """ Handler for READ Operation. The input is converted to the type it is read as.
         """
-        quad = self.current_instruction
-        io_input = input()
-        self.__method_memory.set_value(quad[1].memory_space, io_input)
-        self.increase_instruction_pointer()
+        location, mode, read_type = instruction.args
+        io_input = Types.parse(input(), read_type)
+        self.store(location, mode, io_input)
+        return instruction.next_ip
 
-    def assign(self):
+    def assign(self, instruction: Instruction) -> int:
         """ Handler for ASSIGN operation. When the variable is an array pointer, instead of
-            just using its direction for the assing operation, its memory_space should be
-            looked on memory and use the value as the address.
-        """
-        quad = self.current_instruction
-        if quad[1].is_array_pointer() and quad[2].is_array_pointer():
-            address = self.__method_memory.get_value(quad[1].memory_space)
-            pointer_address = self.__method_memory.get_value(quad[2].memory_space)
-            value = self.__method_memory.get_value(pointer_address)
-        elif quad[1].is_array_pointer():
-            address = self.__method_memory.get_value(quad[1].memory_space)
-            value = self.__method_memory.get_value(quad[2].memory_space)
-        elif quad[2].is_array_pointer():
-            ## Assign of a quad of type (<Operations.ASSIGN: '='>, <temp: int | 10012>, <40004: array_pointer | 40004>, 10012).
-            address = quad[1].memory_space
-            pointer_address = self.__method_memory.get_value(quad[2].memory_space)
-            value = self.__method_memory.get_value(pointer_address)
-        else:
-            address = quad[1].memory_space
-            value = self.__method_memory.get_value(quad[2].memory_space)
-
-        self.__method_memory.set_value(address, value)
-
-        logger.debug(f"Assigned value {value} to {address}")
-        self.increase_instruction_pointer()
+            just using its direction for the assing operation, its value is used as the index
+            of the element, see store.
+        """
+        to_location, to_mode, from_location, from_mode = instruction.args
+        self.store(to_location, to_mode, self.load(from_location, from_mode))
+        return instruction.next_ip
 
-    def end_func(self):
-        """ Handler for ENDFUNC Operation. Finish the execution of the VirtualMachine if it is 
+    def end_func(self, instruction: Instruction) -> int:
+        """ Handler for ENDFUNC Operation. Finish the execution of the VirtualMachine if it is
             the end of the program.
         """
         # TODO: Handle memory swaps.
         if self.__jump_stack.isEmpty():
             # END PROGRAM
-            self.__keep_running = False
-            return
+            return VirtualMachine.HALT
 
-        self.move_instruction_pointer(self.__jump_stack.pop())
+        return self.__jump_stack.pop()
 
-    def go_to_f(self):
-        """ Handler for GOTOF. Moves the __instruction_pointer when the condition value is false.
+    def go_to_f(self, instruction: Instruction) -> int:
+        """ Handler for GOTOF. Moves the instruction pointer when the condition value is false.
         """
-        quad = self.current_instruction
+        location, mode, target = instruction.args
 
-        if self.get_value(quad[1]) == False:
-            self.move_instruction_pointer(quad[2])
-        else:
-            self.increase_instruction_pointer()
+        if self.load(location, mode) == False:
+            return target
+        return instruction.next_ip
 
-    def go_to_t(self):
-        """ Handler for GOTOT. Moves the __instruction_pointer when the condition variable is true.
+    def go_to_t(self, instruction: Instruction) -> int:
+        """ Handler for GOTOT. Moves the instruction pointer when the condition variable is true.
         """
-        quad = self.current_instruction
+        location, mode, target = instruction.args
 
-        if self.get_value(quad[1]) == True:
-            self.move_instruction_pointer(quad[2])
-        else:
-            self.increase_instruction_pointer()
+        if self.load(location, mode) == True:
+            return target
+        return instruction.next_ip
 
-    def resolve_pointer(self):
-        quad = self.current_instruction
+    def resolve_pointer(self, instruction: Instruction) -> int:
+        location, mode, result_location, result_mode = instruction.args
 
-        value = self.get_value(quad[1])
-        self.__method_memory.set_value(quad[2].memory_space, value)
-        self.increase_instruction_pointer()
+        value = self.load(location, mode)
+        self.store(result_location, result_mode, value)
+        return instruction.next_ip
 
-    def return_op(self):
-        """ Handler for RETURN Operation. Swaps active memory and moves the instruction pointer
-            to where it was before the GOSUB Operation.
+    def return_op(self, instruction: Instruction) -> int:
+        """ Handler for RETURN Operation. Swaps active memory, releases the memory of the method to the
+            frame pool and moves the instruction pointer to where it was before the GOSUB Operation.
         """
-        quad = self.current_instruction
-
         # The return from Main will not have a next memory.
         if not self.__jump_stack.isEmpty():
-            if not self.__memory_stack.isEmpty() and len(quad) > 1 and quad[1] == "constructor":
-                self.__memory_stack.top().set_value(quad[2].memory_space, self.__current_instance)
-
-            self.__method_memory = self.__memory_stack.pop()
-            self.move_instruction_pointer(self.__jump_stack.pop())
-        else:
-            self.increase_instruction_pointer()
+            # The return variable of a constructor is global, so it is stored before the swap.
+            if not self.__memory_stack.isEmpty() and instruction.args:
+                self.store(*instruction.args, self.__method_memory.instance_memory)
 
-    def increase_instruction_pointer(self):
-        """ Increases the instruction pointer by one.
-        """
-        self.__instruction_pointer += 1
+            self.__frame_pool.release(self.__method_memory)
+            self.switch_memory(self.__memory_stack.pop())
+            return self.__jump_stack.pop()
+        return instruction.next_ip
 
-    def get_value(self, variable: Variable):
-        """ Retrieves the value of the variabel from the active memory.
+    def switch_memory(self, method_memory: MethodMemory):
+        """ Makes a method memory the active one.
 
             Arguments:
-                - variable [Variable]: The variable to be retrieved.
-
-            Returns:
-                - The value in memory of the provieded variable.
+                - method_memory [MethodMemory]: The memory to activate.
         """
-        return self.get_value_from_memory(variable, self.__method_memory)
+        self.__method_memory = method_memory
+        self.__base_pointer = method_memory.base_pointer
+        instance_memory = method_memory.instance_memory
+        self.__instance_slots = None if instance_memory is None else instance_memory.slots
 
-    def get_value_from_memory(self, variable: Variable, memory: MethodMemory):
-        """ Retrieves the value of the variable from the provided memory.
+    def load(self, location: int, mode: int) -> Any:
+        """ Retrieves the value of a decoded operand from the active memory.
 
             Arguments:
-                - variable [Variable]: The variable to be retrieved.
-                - memory [MethodMemory]: The memory to be used to retireved the variable.
+                - location [int]: The location of the operand.
+                - mode [int]: The Addressing mode of the operand.
 
             Returns:
-                - The value in memory of the provieded variable.
+                - The value in memory of the operand.
         """
-        if variable.is_array_pointer():
-            address = memory.get_value(variable.memory_space)
-            return memory.get_value(address)
-        return memory.get_value(variable.memory_space)
-
-    def get_value_from_memory_address(self, address):
-        return self.__method_memory.get_value(address)
-
-    def move_instruction_pointer(self, new_pointer: int):
-        """ Moves the instruction pointer to the provided address.
+        if mode == Addressing.FRAME:
+            return self.__values[self.__base_pointer + location]
+        if mode == Addressing.ABSOLUTE:
+            return self.__values[location]
+        if mode == Addressing.INDIRECT:
+            storage, offset = self.__values[self.__base_pointer + location]
+            return storage.load(offset)
+        return self.__instance_slots[location]
+
+    def store(self, location: int, mode: int, value: Any):
+        """ Assigns a value to a decoded operand of the active memory.
 
             Arguments:
-                - new_pointer [int]: Pointer to new address.
+                - location [int]: The location of the operand.
+                - mode [int]: The Addressing mode of the operand.
+                - value [Any]: The value to assign.
         """
-        logger.debug(
-            f"Moved instruction pointer from {self.__instruction_pointer} to {new_pointer}")
-        self.__instruction_pointer = new_pointer
+        if mode == Addressing.FRAME:
+            self.__values[self.__base_pointer + location] = value
+        elif mode == Addressing.ABSOLUTE:
+            self.__values[location] = value
+        elif mode == Addressing.INDIRECT:
+            storage, offset = self.__values[self.__base_pointer + location]
+            storage.store(offset, value)
+        else:
+            self.__instance_slots[location] = value